@@ -4,6 +4,7 @@ from config import config
 from database import db, init_db
 from flask import Flask, jsonify
 from flask_cors import CORS
+from utils.uploads import SpooledUploadRequest
 
 
 def create_app(config_name=None):
@@ -13,6 +14,8 @@ def create_app(config_name=None):
 
     app = Flask(__name__)
     app.config.from_object(config[config_name])
+    # Uploads are parsed from memory, spilling to a temporary file only when large
+    app.request_class = SpooledUploadRequest
 
     # Initialize CORS
     CORS(app, origins=app.config['CORS_ORIGINS'])
@@ -26,6 +29,7 @@ def create_app(config_name=None):
     from routes.department_routes import department_bp
     from routes.exam_routes import exam_bp
     from routes.excel_routes import excel_bp
+    from routes.job_routes import job_bp
     from routes.export_routes import export_bp
     from routes.room_routes import room_bp
     from routes.schedule_routes import schedule_bp
@@ -39,6 +43,7 @@ def create_app(config_name=None):
     app.register_blueprint(export_bp)
     app.register_blueprint(excel_bp)
     app.register_blueprint(room_bp)
+    app.register_blueprint(job_bp)
 
     # Error handlers
     @app.errorhandler(404)
@@ -85,6 +90,7 @@ def create_app(config_name=None):
                 'departments': '/api/departments',
                 'settings': '/api/settings',
                 'export': '/api/export',
+                'jobs': '/api/jobs/<job_id>',
                 'health': '/api/health'
             }
         }), 200
@@ -94,11 +100,6 @@ def create_app(config_name=None):
 if __name__ == '__main__':
     app = create_app()
 
-    # Create uploads directory if it doesn't exist
-    upload_dir = app.config.get('UPLOAD_FOLDER', 'uploads')
-    if not os.path.exists(upload_dir):
-        os.makedirs(upload_dir)
-
     print("Starting Exam Orchestrator API...")
     print(f"Environment: {os.getenv('FLASK_ENV', 'development')}")
     print(f"Database: {app.config['SQLALCHEMY_DATABASE_URI']}")
@@ -4,7 +4,8 @@ Veritabanını temizleme scripti
 """
 
 from database import db
-from models import Exam, ExamSchedule, Room, Course, Department, Settings
+from models import Exam, ExamSchedule, ExcelImport, Room, Course, Department, ScheduleRoomAssignment, Settings
+from services.schedule_version import bump_schedule_version
 from app import create_app
 
 def clean_database():
@@ -15,7 +16,9 @@ def clean_database():
         print("=== Veritabanı Temizleme Başlıyor ===\n")
         
         try:
-            # 1. Sınav programlarını sil
+            # 1. Sınav programlarını ve oda atamalarını sil
+            assignment_count = ScheduleRoomAssignment.query.delete()
+            print(f"Siliniyor: {assignment_count} oda ataması")
             schedules = ExamSchedule.query.all()
             print(f"Siliniyor: {len(schedules)} sınav programı")
             for schedule in schedules:
@@ -39,13 +42,15 @@ def clean_database():
             for room in rooms:
                 db.session.delete(room)
             
-            # 5. Bölümleri sil (ayarları koruyalım)
+            # 5. Excel yükleme kayıtlarını ve bölümleri sil (ayarları koruyalım)
+            ExcelImport.query.delete()
             departments = Department.query.all()
             print(f"Siliniyor: {len(departments)} bölüm")
             for department in departments:
                 db.session.delete(department)
             
             # Değişiklikleri kaydet
+            bump_schedule_version()
             db.session.commit()
             
             print("\n=== Temizlik Tamamlandı ===")
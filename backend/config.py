@@ -23,8 +23,29 @@ class Config:
     CORS_ORIGINS = os.getenv('CORS_ORIGINS', 'http://localhost:5173').split(',')
     
     # Upload configuration
-    UPLOAD_FOLDER = os.getenv('UPLOAD_FOLDER', 'uploads')
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
+    # Uploaded files above this size spill from memory to a temporary file
+    UPLOAD_SPOOL_MAX_BYTES = int(os.getenv('UPLOAD_SPOOL_MAX_BYTES', 1024 * 1024))
+    # Rows read, validated and imported at a time from an uploaded workbook
+    EXCEL_CHUNK_ROWS = int(os.getenv('EXCEL_CHUNK_ROWS', 1000))
+    # Re-uploads changing at most this many rows only swap those exams instead of rebuilding
+    EXCEL_PARTIAL_UPDATE_MAX_ROWS = int(os.getenv('EXCEL_PARTIAL_UPDATE_MAX_ROWS', 20))
+
+    # Scheduler configuration
+    SOLVER_TIME_LIMIT_SECONDS = int(os.getenv('SOLVER_TIME_LIMIT_SECONDS', 30))
+    MULTI_START_RESTARTS = int(os.getenv('MULTI_START_RESTARTS', 8))
+    # Placed exams a single-exam (re)schedule may move to make room
+    RESCHEDULE_MAX_MOVES = int(os.getenv('RESCHEDULE_MAX_MOVES', 2))
+
+    # Background scheduling jobs
+    SCHEDULER_JOB_WORKERS = int(os.getenv('SCHEDULER_JOB_WORKERS', 1))
+    JOB_RESULT_RETENTION_SECONDS = int(os.getenv('JOB_RESULT_RETENTION_SECONDS', 3600))
+
+    # Response cache (local = per-worker LRU, redis = shared, none = off)
+    RESPONSE_CACHE_BACKEND = os.getenv('RESPONSE_CACHE_BACKEND', 'local')
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', 256))
+    RESPONSE_CACHE_TTL_SECONDS = int(os.getenv('RESPONSE_CACHE_TTL_SECONDS', 300))
+    RESPONSE_CACHE_URL = os.getenv('RESPONSE_CACHE_URL', 'redis://localhost:6379/0')
 
 class DevelopmentConfig(Config):
     DEBUG = True
@@ -32,8 +53,13 @@ class DevelopmentConfig(Config):
 class ProductionConfig(Config):
     DEBUG = False
 
+class TestingConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+
 config = {
     'development': DevelopmentConfig,
     'production': ProductionConfig,
+    'testing': TestingConfig,
     'default': DevelopmentConfig
 }
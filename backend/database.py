@@ -17,7 +17,12 @@ def init_db(app):
         db.create_all()
 
         # Insert default data if tables are empty
-        from models import Course, Department, Room, Settings
+        from models import Course, Department, Room, ScheduleVersion, Settings
+
+        # schedule_version tables created before the row was seeded with them
+        if db.session.get(ScheduleVersion, 1) is None:
+            db.session.add(ScheduleVersion(id=1, version=1))
+            db.session.commit()
 
         # Add default departments if none exist
         if Department.query.count() == 0:
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Run EXPLAIN on the hot scheduler, schedule and export queries and fail on full table scans
+
+Usage:
+    python explain_queries.py                                 # configured database (seed it first)
+    python explain_queries.py --database-url sqlite:// --seed # throwaway SQLite database with demo data
+"""
+
+import argparse
+import os
+import re
+import sys
+from datetime import date, time, timedelta
+
+from sqlalchemy import text
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from config import config
+from database import db, ma
+from flask import Flask
+from models import (Course, Department, Exam, ExamSchedule, Room,
+                    ScheduleRoomAssignment)
+
+WEEK_START = date(2024, 1, 15)
+WEEK_END = date(2024, 1, 26)
+
+
+def create_app(database_url=None):
+    """Create Flask app for the audit"""
+    app = Flask(__name__)
+    app.config.from_object(config['development'])
+    if database_url:
+        app.config['SQLALCHEMY_DATABASE_URI'] = database_url
+    db.init_app(app)
+    ma.init_app(app)
+    return app
+
+
+def seed_demo_data(exam_count=400):
+    """Create tables and fill them with enough rows for meaningful plans"""
+    db.create_all()
+
+    departments = [Department(name=f'Department {i}', code=f'D{i}') for i in range(1, 6)]
+    db.session.add_all(departments)
+    db.session.flush()
+
+    rooms = [Room(name=f'R{i:03d}', capacity=30 + (i % 5) * 15, has_computer=i % 4 == 0,
+                  department_id=departments[i % 5].id) for i in range(40)]
+    db.session.add_all(rooms)
+    db.session.flush()
+
+    days = [WEEK_START + timedelta(days=i) for i in range(12) if (WEEK_START + timedelta(days=i)).weekday() < 5]
+    for i in range(exam_count):
+        department = departments[i % 5]
+        course = Course(name=f'Course {i}', code=f'C{i:04d}', class_level=i % 4 + 1, department_id=department.id)
+        db.session.add(course)
+        db.session.flush()
+
+        exam = Exam(course_id=course.id, instructor='Demo', student_count=40, duration=90,
+                    department_id=department.id, status='planned' if i % 3 else 'pending',
+                    exam_session_id=f'session-{i % 10}', available_rooms=[])
+        db.session.add(exam)
+        db.session.flush()
+
+        if exam.status == 'planned':
+            schedule = ExamSchedule(exam_id=exam.id, scheduled_date=days[i % len(days)],
+                                    start_time=time(9 + i % 7, 0), end_time=time(10 + i % 7, 30))
+            schedule.assign_rooms([rooms[i % 40]], exam.student_count)
+            db.session.add(schedule)
+
+    db.session.commit()
+
+    if db.engine.dialect.name == 'sqlite':
+        db.session.execute(text('ANALYZE'))
+
+
+def hot_queries():
+    """(name, query) pairs mirroring the queries the routes and services run"""
+    return [
+        ('pending exams of a department (scheduler)',
+         Exam.query.filter_by(status='pending', department_id=1)),
+        ('pending exams (scheduler)',
+         Exam.query.filter_by(status='pending')),
+        ('latest upload session (export)',
+         db.session.query(Exam.exam_session_id).filter(
+             Exam.department_id == 1, Exam.exam_session_id.isnot(None)
+         ).order_by(Exam.created_at.desc()).limit(1)),
+        ('department schedule of a session (export)',
+         db.session.query(ExamSchedule).join(Exam).join(Room).filter(
+             Exam.department_id == 1, Exam.exam_session_id == 'session-1'
+         ).order_by(ExamSchedule.scheduled_date.asc(), ExamSchedule.start_time.asc())),
+        ('schedules in a date range (/api/schedule)',
+         ExamSchedule.query.filter(
+             ExamSchedule.scheduled_date >= WEEK_START, ExamSchedule.scheduled_date <= WEEK_END
+         ).order_by(ExamSchedule.scheduled_date.asc(), ExamSchedule.start_time.asc())),
+        ('schedules of a department (/api/schedule, Excel import)',
+         ExamSchedule.query.join(Exam).filter(Exam.department_id == 1)),
+        ('schedules of given exams',
+         ExamSchedule.query.filter(ExamSchedule.exam_id.in_([1, 2, 3]))),
+        ('room usage of the exam week (occupancy index)',
+         db.session.query(ScheduleRoomAssignment.room_id, ScheduleRoomAssignment.scheduled_date,
+                          ScheduleRoomAssignment.start_time, ScheduleRoomAssignment.end_time).filter(
+             ScheduleRoomAssignment.scheduled_date >= WEEK_START,
+             ScheduleRoomAssignment.scheduled_date <= WEEK_END)),
+        ('room conflicts on a date',
+         ScheduleRoomAssignment.query.filter(
+             ScheduleRoomAssignment.room_id == 1, ScheduleRoomAssignment.scheduled_date == WEEK_START
+         ).order_by(ScheduleRoomAssignment.start_time)),
+        ('room assignments of schedules (selectin load)',
+         ScheduleRoomAssignment.query.filter(ScheduleRoomAssignment.schedule_id.in_([1, 2, 3]))),
+    ]
+
+
+def compile_query(query):
+    """Render a query as SQL with its parameters inlined"""
+    return str(query.statement.compile(dialect=db.engine.dialect, compile_kwargs={'literal_binds': True}))
+
+
+def explain(sql):
+    """Return (plan lines, full scan tables, warnings) for a statement"""
+    dialect = db.engine.dialect.name
+    full_scans = []
+    warnings = []
+
+    if dialect == 'sqlite':
+        rows = db.session.execute(text(f'EXPLAIN QUERY PLAN {sql}')).fetchall()
+        lines = [row[-1] for row in rows]
+        for line in lines:
+            # "SCAN exams" is a table scan; "SCAN exams USING INDEX ..." walks an index
+            match = re.match(r'^SCAN (?:TABLE )?(\w+)(?: AS \w+)?$', line)
+            if match:
+                full_scans.append(match.group(1))
+        return lines, full_scans, warnings
+
+    if dialect == 'mysql':
+        result = db.session.execute(text(f'EXPLAIN {sql}'))
+        keys = list(result.keys())
+        lines = []
+        for row in result.fetchall():
+            plan = dict(zip(keys, row))
+            lines.append(f"{plan.get('table')}: type={plan.get('type')} key={plan.get('key')} "
+                         f"rows={plan.get('rows')} {plan.get('Extra') or ''}".rstrip())
+            if plan.get('type') == 'ALL':
+                if plan.get('possible_keys'):
+                    # An index exists but the optimizer preferred a scan (usually a tiny table)
+                    warnings.append(f"{plan.get('table')} scanned although {plan.get('possible_keys')} could be used")
+                else:
+                    full_scans.append(plan.get('table'))
+        return lines, full_scans, warnings
+
+    raise RuntimeError(f'EXPLAIN parsing is not implemented for {dialect}')
+
+
+def main():
+    """Explain every hot query; exit with 1 if any needs a full table scan"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--database-url', help='Database to audit (default: configured database)')
+    parser.add_argument('--seed', action='store_true', help='Create tables and demo rows first (throwaway databases only)')
+    args = parser.parse_args()
+
+    app = create_app(args.database_url)
+
+    with app.app_context():
+        if args.seed:
+            print("🌱 Seeding throwaway database...")
+            seed_demo_data()
+
+        failures = 0
+        for name, query in hot_queries():
+            lines, full_scans, warnings = explain(compile_query(query))
+            status = '❌' if full_scans else '✅'
+            print(f"{status} {name}")
+            for line in lines:
+                print(f"     {line}")
+            for warning in warnings:
+                print(f"   ⚠️  {warning}")
+            if full_scans:
+                failures += 1
+                print(f"   Full table scan on: {', '.join(full_scans)}")
+
+        if failures:
+            print(f"💥 {failures} hot queries fall back to a full table scan")
+            return 1
+
+        print("🎉 Every hot query uses an index")
+        return 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -1,5 +1,6 @@
 from app import create_app
-from models import ExamSchedule, Exam
+from models import ExamSchedule, Exam, ScheduleRoomAssignment
+from services.schedule_version import bump_schedule_version
 from database import db
 
 app = create_app()
@@ -9,6 +10,8 @@ with app.app_context():
     
     # Tüm sınavları sil ve yeniden planla
     print("Tüm sınav planlarını siliniyor...")
+    # Toplu silme oda atamalarına cascade etmez; önce onları sil
+    ScheduleRoomAssignment.query.delete()
     ExamSchedule.query.delete()
     
     # Tüm sınavları pending durumuna al
@@ -16,6 +19,7 @@ with app.app_context():
     for exam in exams:
         exam.status = 'pending'
     
+    bump_schedule_version()
     db.session.commit()
     
     print(f"Temizlendi: {len(exams)} sınav pending durumuna alındı")
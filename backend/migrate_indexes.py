@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Migration script to add the composite indexes declared on the models to an existing database
+"""
+
+import os
+import sys
+
+from sqlalchemy import inspect
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from config import config
+from database import db, init_db
+from flask import Flask
+
+import models  # noqa: F401  (registers the tables and their indexes)
+
+# Tables whose hot-query indexes are managed here
+INDEXED_TABLES = ['exams', 'exam_schedules', 'schedule_room_assignments']
+
+
+def create_app():
+    """Create Flask app for migration"""
+    app = Flask(__name__)
+    app.config.from_object(config['development'])
+    init_db(app)
+    return app
+
+
+def missing_indexes():
+    """Model indexes that do not exist in the database yet"""
+    inspector = inspect(db.engine)
+    existing_tables = set(inspector.get_table_names())
+
+    missing = []
+    for table_name in INDEXED_TABLES:
+        if table_name not in existing_tables:
+            print(f"⚠️  Table {table_name} does not exist, skipping (run its migration first)")
+            continue
+
+        existing = {index['name'] for index in inspector.get_indexes(table_name)}
+        for index in db.metadata.tables[table_name].indexes:
+            if index.name not in existing:
+                missing.append(index)
+    return missing
+
+
+def migrate_database():
+    """Create missing indexes"""
+    try:
+        indexes = missing_indexes()
+
+        if not indexes:
+            print("✅ Database indexes are already up to date!")
+            return True
+
+        for index in indexes:
+            columns = ', '.join(column.name for column in index.columns)
+            print(f"🔄 Creating index {index.name} on {index.table.name} ({columns})")
+            index.create(bind=db.engine)
+
+        print(f"✅ Created {len(indexes)} indexes successfully!")
+        return True
+
+    except Exception as e:
+        print(f"❌ Migration failed: {str(e)}")
+        return False
+
+
+def main():
+    """Main migration function"""
+    print("🚀 Starting database migration...")
+
+    app = create_app()
+
+    with app.app_context():
+        success = migrate_database()
+
+        if success:
+            print("🎉 Migration completed successfully!")
+            return 0
+        else:
+            print("💥 Migration failed!")
+            return 1
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Migration script to add the response_cache_generations table shared by the workers' response caches
+"""
+
+import os
+import sys
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from config import config
+from database import db, init_db
+from flask import Flask
+from models import ResponseCacheGeneration
+
+
+def create_app():
+    """Create Flask app for migration"""
+    app = Flask(__name__)
+    app.config.from_object(config['development'])
+    init_db(app)
+    return app
+
+
+def migrate_database():
+    """Create the response_cache_generations table"""
+    try:
+        print("🔄 Creating response_cache_generations table if missing...")
+        ResponseCacheGeneration.__table__.create(bind=db.engine, checkfirst=True)
+        print("✅ response_cache_generations table ready")
+        return True
+
+    except Exception as e:
+        print(f"❌ Migration failed: {str(e)}")
+        db.session.rollback()
+        return False
+
+
+def main():
+    """Main migration function"""
+    print("🚀 Starting database migration...")
+
+    app = create_app()
+
+    with app.app_context():
+        success = migrate_database()
+
+        if success:
+            print("🎉 Migration completed successfully!")
+            return 0
+        else:
+            print("💥 Migration failed!")
+            return 1
+
+
+if __name__ == '__main__':
+    exit(main())
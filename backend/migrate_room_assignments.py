@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Migration script to move exam_schedules.additional_rooms into the schedule_room_assignments table
+"""
+
+import json
+import os
+import sys
+
+from sqlalchemy import text
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from config import config
+from database import db, init_db
+from flask import Flask
+
+
+def create_app():
+    """Create Flask app for migration"""
+    app = Flask(__name__)
+    app.config.from_object(config['development'])
+    init_db(app)
+    return app
+
+
+def migrate_database():
+    """Create the room assignment table and backfill it"""
+    try:
+        # Check if the table already exists (MySQL version)
+        result = db.session.execute(text("SHOW TABLES LIKE 'schedule_room_assignments'"))
+        if result.fetchone():
+            print("✅ schedule_room_assignments table already exists")
+        else:
+            migration = """
+                CREATE TABLE schedule_room_assignments (
+                    id INT AUTO_INCREMENT PRIMARY KEY,
+                    schedule_id INT NOT NULL,
+                    room_id INT NOT NULL,
+                    position INT NOT NULL DEFAULT 0,
+                    seats_allocated INT NOT NULL DEFAULT 0,
+                    scheduled_date DATE NOT NULL,
+                    start_time TIME NOT NULL,
+                    end_time TIME NOT NULL,
+                    INDEX ix_schedule_room_assignments_schedule_id (schedule_id),
+                    INDEX ix_room_assignments_room_date_start (room_id, scheduled_date, start_time),
+                    FOREIGN KEY (schedule_id) REFERENCES exam_schedules(id) ON DELETE CASCADE,
+                    FOREIGN KEY (room_id) REFERENCES rooms(id)
+                )
+            """
+            print("🔄 Creating schedule_room_assignments table...")
+            db.session.execute(text(migration))
+            db.session.commit()
+            print("✅ Table created successfully!")
+
+        backfill_assignments()
+        return True
+
+    except Exception as e:
+        print(f"❌ Migration failed: {str(e)}")
+        db.session.rollback()
+        return False
+
+
+def backfill_assignments():
+    """Create assignment rows for schedules that have none yet"""
+    try:
+        print("🔄 Backfilling room assignments from exam_schedules...")
+
+        result = db.session.execute(text("SHOW COLUMNS FROM exam_schedules"))
+        columns = [row[0] for row in result.fetchall()]
+        additional_column = "s.additional_rooms" if 'additional_rooms' in columns else "NULL"
+
+        result = db.session.execute(text(f"""
+            SELECT s.id, s.room_id, {additional_column}, s.scheduled_date, s.start_time, s.end_time,
+                   e.student_count
+            FROM exam_schedules s
+            JOIN exams e ON s.exam_id = e.id
+            LEFT JOIN schedule_room_assignments a ON a.schedule_id = s.id
+            WHERE a.id IS NULL
+        """))
+        schedules = result.fetchall()
+
+        capacities = dict(db.session.execute(text("SELECT id, capacity FROM rooms")).fetchall())
+        created_count = 0
+
+        for schedule in schedules:
+            schedule_id, room_id, additional_rooms, scheduled_date, start_time, end_time, student_count = schedule
+
+            if isinstance(additional_rooms, str):
+                additional_rooms = json.loads(additional_rooms)
+            room_ids = [room_id] + [int(r) for r in (additional_rooms or []) if int(r) in capacities]
+
+            # Fill rooms in order up to their capacity, as the scheduler does
+            remaining = student_count or 0
+            for position, assigned_room_id in enumerate(room_ids):
+                seats = max(min(capacities.get(assigned_room_id, 0), remaining), 0)
+                remaining -= seats
+
+                db.session.execute(text("""
+                    INSERT INTO schedule_room_assignments
+                        (schedule_id, room_id, position, seats_allocated, scheduled_date, start_time, end_time)
+                    VALUES (:schedule_id, :room_id, :position, :seats, :scheduled_date, :start_time, :end_time)
+                """), {
+                    'schedule_id': schedule_id,
+                    'room_id': assigned_room_id,
+                    'position': position,
+                    'seats': seats,
+                    'scheduled_date': scheduled_date,
+                    'start_time': start_time,
+                    'end_time': end_time
+                })
+                created_count += 1
+
+        db.session.commit()
+        print(f"✅ Created {created_count} room assignments for {len(schedules)} schedules")
+        print("ℹ️  exam_schedules.additional_rooms is no longer read and can be dropped once verified")
+
+    except Exception as e:
+        print(f"❌ Failed to backfill room assignments: {str(e)}")
+        db.session.rollback()
+        raise
+
+
+def main():
+    """Main migration function"""
+    print("🚀 Starting database migration...")
+
+    app = create_app()
+
+    with app.app_context():
+        success = migrate_database()
+
+        if success:
+            print("🎉 Migration completed successfully!")
+            return 0
+        else:
+            print("💥 Migration failed!")
+            return 1
+
+
+if __name__ == '__main__':
+    exit(main())
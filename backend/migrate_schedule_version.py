@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Migration script to add the schedule_version table behind the read endpoints' ETags
+"""
+
+import os
+import sys
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from config import config
+from database import db, init_db
+from flask import Flask
+from models import ScheduleVersion
+
+
+def create_app():
+    """Create Flask app for migration"""
+    app = Flask(__name__)
+    app.config.from_object(config['development'])
+    init_db(app)
+    return app
+
+
+def migrate_database():
+    """Create the schedule_version table and its single row"""
+    try:
+        print("🔄 Creating schedule_version table if missing...")
+        ScheduleVersion.__table__.create(bind=db.engine, checkfirst=True)
+
+        if db.session.get(ScheduleVersion, 1):
+            print("✅ schedule_version row already exists")
+        else:
+            db.session.add(ScheduleVersion(id=1, version=1))
+            db.session.commit()
+            print("✅ schedule_version row created")
+        return True
+
+    except Exception as e:
+        print(f"❌ Migration failed: {str(e)}")
+        db.session.rollback()
+        return False
+
+
+def main():
+    """Main migration function"""
+    print("🚀 Starting database migration...")
+
+    app = create_app()
+
+    with app.app_context():
+        success = migrate_database()
+
+        if success:
+            print("🎉 Migration completed successfully!")
+            return 0
+        else:
+            print("💥 Migration failed!")
+            return 1
+
+
+if __name__ == '__main__':
+    exit(main())
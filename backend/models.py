@@ -2,6 +2,7 @@ from datetime import datetime
 
 from database import db, ma
 from marshmallow import fields
+from sqlalchemy import event
 
 
 class Department(db.Model):
@@ -53,6 +54,12 @@ class Room(db.Model):
 
 class Exam(db.Model):
     __tablename__ = 'exams'
+    __table_args__ = (
+        # Pending exams, optionally per department (scheduler)
+        db.Index('ix_exams_status_department', 'status', 'department_id'),
+        # Department exams and their latest upload session (exports, Excel import)
+        db.Index('ix_exams_department_session', 'department_id', 'exam_session_id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     course_id = db.Column(db.Integer, db.ForeignKey('courses.id'), nullable=False)
@@ -82,6 +89,11 @@ class Exam(db.Model):
         """Get course name from related course"""
         return self.course.name if self.course else ""
 
+    @property
+    def course_code(self):
+        """Get course code from related course"""
+        return self.course.code if self.course else ""
+
     @property
     def class_name(self):
         """Get class level from related course"""
@@ -94,14 +106,126 @@ class Exam(db.Model):
 
 class ExamSchedule(db.Model):
     __tablename__ = 'exam_schedules'
+    __table_args__ = (
+        # Date range listings ordered by date and start time
+        db.Index('ix_exam_schedules_date_start', 'scheduled_date', 'start_time'),
+        # Schedules of an exam, and exam -> schedule joins
+        db.Index('ix_exam_schedules_exam', 'exam_id'),
+        # Primary room usage per day
+        db.Index('ix_exam_schedules_room_date', 'room_id', 'scheduled_date'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     exam_id = db.Column(db.Integer, db.ForeignKey('exams.id'), nullable=False)
+    room_id = db.Column(db.Integer, db.ForeignKey('rooms.id'), nullable=False)  # Primary room
+    scheduled_date = db.Column(db.Date, nullable=False)
+    start_time = db.Column(db.Time, nullable=False)
+    end_time = db.Column(db.Time, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Every room used by the exam, primary room first
+    room_assignments = db.relationship('ScheduleRoomAssignment', backref='schedule', lazy='selectin',
+                                       order_by='ScheduleRoomAssignment.position',
+                                       cascade='all, delete-orphan')
+
+    @property
+    def additional_rooms(self):
+        """Get additional room IDs (all rooms except the primary one)"""
+        room_ids = [assignment.room_id for assignment in self.room_assignments if assignment.position > 0]
+        return room_ids or None
+
+    @property
+    def additional_room_objects(self):
+        """Get additional Room objects in assignment order"""
+        return [assignment.room for assignment in self.room_assignments if assignment.position > 0]
+
+    def assign_rooms(self, rooms, student_count):
+        """Replace the room assignments, filling rooms in order up to their capacity
+
+        Rooms left over once every student is seated are not assigned; the
+        primary room is always kept.
+        """
+        self.room_id = rooms[0].id
+        remaining = student_count
+        assignments = []
+        for position, room in enumerate(rooms):
+            if position > 0 and remaining <= 0:
+                break
+            seats = max(min(room.capacity, remaining), 0)
+            remaining -= seats
+            assignments.append(ScheduleRoomAssignment(
+                room_id=room.id,
+                position=position,
+                seats_allocated=seats,
+                scheduled_date=self.scheduled_date,
+                start_time=self.start_time,
+                end_time=self.end_time
+            ))
+        self.room_assignments = assignments
+
+    def sync_room_assignments(self):
+        """Copy the schedule's primary room, date and times onto its room assignments"""
+        for assignment in self.room_assignments:
+            if assignment.position == 0:
+                assignment.room_id = self.room_id
+            assignment.scheduled_date = self.scheduled_date
+            assignment.start_time = self.start_time
+            assignment.end_time = self.end_time
+
+class ScheduleRoomAssignment(db.Model):
+    __tablename__ = 'schedule_room_assignments'
+    __table_args__ = (
+        # Room conflict checks: one room, one date, ordered by start time
+        db.Index('ix_room_assignments_room_date_start', 'room_id', 'scheduled_date', 'start_time'),
+        # Room usage of the exam week (occupancy index load)
+        db.Index('ix_room_assignments_date', 'scheduled_date'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    schedule_id = db.Column(db.Integer, db.ForeignKey('exam_schedules.id', ondelete='CASCADE'),
+                            nullable=False, index=True)
     room_id = db.Column(db.Integer, db.ForeignKey('rooms.id'), nullable=False)
-    additional_rooms = db.Column(db.JSON, nullable=True)  # Store additional room IDs as JSON array
+    position = db.Column(db.Integer, nullable=False, default=0)  # 0 = primary room
+    seats_allocated = db.Column(db.Integer, nullable=False, default=0)
+    # Copied from the schedule so conflict checks never join exam_schedules
     scheduled_date = db.Column(db.Date, nullable=False)
     start_time = db.Column(db.Time, nullable=False)
     end_time = db.Column(db.Time, nullable=False)
+
+    # Relationships
+    room = db.relationship('Room', lazy='joined')
+
+class ScheduleVersion(db.Model):
+    __tablename__ = 'schedule_version'
+
+    # Single row (id=1) bumped by every write that changes exams or schedules
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=0)
+
+@event.listens_for(ScheduleVersion.__table__, 'after_create')
+def _seed_schedule_version(target, connection, **kw):
+    """Create the single version row with the table, so bumps only ever UPDATE it"""
+    connection.execute(target.insert().values(id=1, version=1))
+
+class ResponseCacheGeneration(db.Model):
+    __tablename__ = 'response_cache_generations'
+
+    # Generation of each response cache tag, shared by every worker (local cache backend)
+    tag = db.Column(db.String(50), primary_key=True)
+    generation = db.Column(db.BigInteger, nullable=False, default=0)
+
+class ExcelImport(db.Model):
+    __tablename__ = 'excel_imports'
+
+    # Latest Excel import of each department, used to skip or narrow re-uploads
+    id = db.Column(db.Integer, primary_key=True)
+    department_id = db.Column(db.Integer, db.ForeignKey('departments.id', ondelete='CASCADE'),
+                              nullable=False, unique=True)
+    exam_session_id = db.Column(db.String(50), nullable=False)
+    content_hash = db.Column(db.String(64), nullable=False)  # SHA-256 of the sorted row hashes
+    rows = db.Column(db.JSON)  # [row_hash, exam_id or null] per workbook row, in order
+    result = db.Column(db.JSON)  # Upload response, returned again for an identical upload
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -167,26 +291,21 @@ class ExamScheduleSchema(ma.SQLAlchemyAutoSchema):
         load_instance = True
         include_fk = True
 
-    exam = fields.Nested(ExamSchema, exclude=['exam_schedule'])
+    exam = fields.Nested(ExamSchema, exclude=['exam_schedules'])
     room = fields.Nested(RoomSchema)
     additional_rooms = fields.Raw()  # Include JSON field as-is
     additional_room_details = fields.Method("get_additional_room_details")
 
     def get_additional_room_details(self, obj):
         """Get detailed information about additional rooms"""
-        if not obj.additional_rooms:
-            return []
-
         room_details = []
-        for room_id in obj.additional_rooms:
-            room = Room.query.get(room_id)
-            if room:
-                room_details.append({
-                    'id': room.id,
-                    'name': room.name,
-                    'capacity': room.capacity,
-                    'has_computer': room.has_computer
-                })
+        for room in obj.additional_room_objects:
+            room_details.append({
+                'id': room.id,
+                'name': room.name,
+                'capacity': room.capacity,
+                'has_computer': room.has_computer
+            })
         return room_details
 
 class SettingsSchema(ma.SQLAlchemyAutoSchema):
@@ -1,6 +1,9 @@
 from flask import Blueprint, request, jsonify
 from database import db
-from models import Course, courses_schema, course_schema, Department
+from sqlalchemy.orm import joinedload
+from models import Course, CourseSchema, courses_schema, course_schema, Department
+from services.schedule_version import bump_schedule_version
+from utils.pagination import keyset_page, parse_cursor, parse_fields, parse_limit, projection_options
 
 course_bp = Blueprint('courses', __name__)
 
@@ -11,7 +14,21 @@ def get_courses():
         department_id = request.args.get('department_id')
         class_level = request.args.get('class_level')
         
-        query = Course.query.filter_by(is_active=True)
+        sort_columns = [Course.class_level, Course.name, Course.id]
+        try:
+            limit = parse_limit(request.args)
+            after = parse_cursor(request.args, sort_columns)
+            fields = parse_fields(request.args, courses_schema.fields)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 400
+        
+        options = projection_options(Course, fields, sort_columns, {
+            'department': [joinedload(Course.department)]
+        })
+        query = Course.query.options(*options).filter_by(is_active=True)
         
         if department_id:
             query = query.filter_by(department_id=department_id)
@@ -19,12 +36,16 @@ def get_courses():
         if class_level:
             query = query.filter_by(class_level=int(class_level))
         
-        courses = query.order_by(Course.class_level.asc(), Course.name.asc()).all()
+        courses, next_cursor = keyset_page(query, sort_columns, limit, after)
         
-        return jsonify({
+        schema = courses_schema if fields is None else CourseSchema(many=True, only=fields)
+        response = {
             'success': True,
-            'data': courses_schema.dump(courses)
-        }), 200
+            'data': schema.dump(courses)
+        }
+        if limit is not None:
+            response['next_cursor'] = next_cursor
+        return jsonify(response), 200
     except Exception as e:
         return jsonify({
             'success': False,
@@ -76,6 +97,7 @@ def create_course():
         )
         
         db.session.add(new_course)
+        bump_schedule_version([new_course.department_id])
         db.session.commit()
         
         return jsonify({
@@ -125,6 +147,7 @@ def update_course(course_id):
             }), 404
         
         data = request.get_json()
+        previous_department_id = course.department_id
         
         # Update fields if provided
         if 'name' in data:
@@ -158,6 +181,7 @@ def update_course(course_id):
                 }), 404
             course.department_id = data['department_id']
         
+        bump_schedule_version([previous_department_id, course.department_id])
         db.session.commit()
         
         return jsonify({
@@ -193,6 +217,7 @@ def delete_course(course_id):
         
         # Soft delete - just deactivate
         course.is_active = False
+        bump_schedule_version([course.department_id])
         db.session.commit()
         
         return jsonify({
@@ -213,7 +238,21 @@ def get_courses_by_department(department_id):
     try:
         class_level = request.args.get('class_level')
         
-        query = Course.query.filter_by(
+        sort_columns = [Course.class_level, Course.name, Course.id]
+        try:
+            limit = parse_limit(request.args)
+            after = parse_cursor(request.args, sort_columns)
+            fields = parse_fields(request.args, courses_schema.fields)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 400
+        
+        options = projection_options(Course, fields, sort_columns, {
+            'department': [joinedload(Course.department)]
+        })
+        query = Course.query.options(*options).filter_by(
             department_id=department_id,
             is_active=True
         )
@@ -221,12 +260,16 @@ def get_courses_by_department(department_id):
         if class_level:
             query = query.filter_by(class_level=int(class_level))
         
-        courses = query.order_by(Course.class_level.asc(), Course.name.asc()).all()
+        courses, next_cursor = keyset_page(query, sort_columns, limit, after)
         
-        return jsonify({
+        schema = courses_schema if fields is None else CourseSchema(many=True, only=fields)
+        response = {
             'success': True,
-            'data': courses_schema.dump(courses)
-        }), 200
+            'data': schema.dump(courses)
+        }
+        if limit is not None:
+            response['next_cursor'] = next_cursor
+        return jsonify(response), 200
         
     except Exception as e:
         return jsonify({
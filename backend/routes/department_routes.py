@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify
 from database import db
-from models import Department, departments_schema, department_schema
+from models import Department, ExcelImport, departments_schema, department_schema
+from services.schedule_version import bump_schedule_version
 
 department_bp = Blueprint('departments', __name__)
 
@@ -47,6 +48,7 @@ def create_department():
         )
         
         db.session.add(new_department)
+        bump_schedule_version()
         db.session.commit()
         
         return jsonify({
@@ -113,6 +115,7 @@ def update_department(department_id):
                 }), 400
             department.code = data['code']
         
+        bump_schedule_version()
         db.session.commit()
         
         return jsonify({
@@ -146,7 +149,9 @@ def delete_department(department_id):
                 'message': 'Cannot delete department with existing exams'
             }), 400
         
+        ExcelImport.query.filter_by(department_id=department_id).delete()
         db.session.delete(department)
+        bump_schedule_version()
         db.session.commit()
         
         return jsonify({
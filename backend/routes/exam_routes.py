@@ -3,38 +3,29 @@ import random
 from datetime import datetime, time
 
 from database import db
-from flask import Blueprint, jsonify, request
-from models import (Department, Exam, ExamSchedule, Room, Settings,
-                    exam_schema, exams_schema)
+from flask import Blueprint, current_app, jsonify, request
+from models import (Department, Exam, ExamSchedule, ExamSchema, Room,
+                    Settings, exam_schema, exams_schema)
+from services.event_broker import deleted_schedule_delta, queue_schedule_event
+from services.excel_service import ExcelService
+from services.schedule_version import (bump_schedule_version,
+                                       versioned_by_schedule)
+from sqlalchemy.orm import joinedload, selectinload
+from utils.pagination import (keyset_page, parse_cursor, parse_fields,
+                              parse_limit, projection_options)
 
 exam_bp = Blueprint('exams', __name__)
 
 def auto_schedule_exam(exam):
-    """Automatically schedule a single exam"""
+    """Place a single exam into the current schedule, moving a few others if needed"""
     try:
-        from services.advanced_scheduler import AdvancedSchedulerService
-
-        # Prepare exam data for scheduler
-        exam_data = [{
-            'id': exam.id,
-            'course_code': exam.course.code if exam.course else 'Unknown',
-            'instructor': exam.instructor,
-            'student_count': exam.student_count,
-            'duration': exam.duration,
-            'needs_computer': exam.needs_computer,
-            'preferred_dates': exam.preferred_dates or [],
-            'available_rooms': exam.available_rooms or [],
-            'department_id': exam.department_id,
-            'difficulty_level': exam.difficulty_level,
-            'status': exam.status
-        }]
-
-        # Run scheduler
-        scheduler = AdvancedSchedulerService()
-        result = scheduler.schedule_exams(exam_data)
-
-        if result['success'] and result['scheduled_count'] > 0:
-            print(f"Successfully scheduled exam {exam.course.code if exam.course else exam.id}")
+        from services.incremental_scheduler import IncrementalSchedulerService
+
+        scheduler = IncrementalSchedulerService()
+        result = scheduler.place_exam(exam.id, max_moves=current_app.config.get('RESCHEDULE_MAX_MOVES', 2))
+
+        if result['success']:
+            print(f"Successfully scheduled exam {exam.course.code if exam.course else exam.id}: {result['message']}")
             return True
         else:
             print(f"Failed to schedule exam {exam.course.code if exam.course else exam.id}: {result.get('message', 'Unknown error')}")
@@ -44,19 +35,55 @@ def auto_schedule_exam(exam):
         print(f"Auto-scheduling error for exam {exam.id}: {str(e)}")
         return False
 
+def unschedule_exam(exam):
+    """Remove the exam's schedules and room assignments and set it back to pending"""
+    for schedule in ExamSchedule.query.filter_by(exam_id=exam.id).all():
+        queue_schedule_event('schedule_deleted', deleted_schedule_delta(schedule, exam.department_id))
+        db.session.delete(schedule)
+    exam.status = 'pending'
+    bump_schedule_version([exam.department_id])
+    db.session.commit()
+
 
 
 
 
 @exam_bp.route('/api/exams', methods=['GET'])
+@versioned_by_schedule
 def get_exams():
     """Get all exams"""
     try:
-        exams = Exam.query.all()
-        return jsonify({
+        sort_columns = [Exam.id]
+        try:
+            limit = parse_limit(request.args)
+            after = parse_cursor(request.args, sort_columns)
+            fields = parse_fields(request.args, exams_schema.fields)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 400
+
+        # course_name, class_name and credits are read from the course
+        course_loaders = [joinedload(Exam.course)]
+        options = projection_options(Exam, fields, sort_columns, {
+            'course': course_loaders,
+            'course_name': course_loaders,
+            'class_name': course_loaders,
+            'credits': course_loaders,
+            'department': [joinedload(Exam.department)],
+            'exam_schedules': [selectinload(Exam.exam_schedules)]
+        })
+        exams, next_cursor = keyset_page(Exam.query.options(*options), sort_columns, limit, after)
+
+        schema = exams_schema if fields is None else ExamSchema(many=True, only=fields)
+        response = {
             'success': True,
-            'data': exams_schema.dump(exams)
-        }), 200
+            'data': schema.dump(exams)
+        }
+        if limit is not None:
+            response['next_cursor'] = next_cursor
+        return jsonify(response), 200
     except Exception as e:
         return jsonify({
             'success': False,
@@ -128,6 +155,7 @@ def create_exam():
         )
 
         db.session.add(new_exam)
+        bump_schedule_version([new_exam.department_id])
         db.session.commit()
 
         # Otomatik planlama yap
@@ -185,6 +213,7 @@ def update_exam(exam_id):
             }), 404
 
         data = request.get_json()
+        previous_department_id = exam.department_id
 
         # Update fields if provided
         if 'course_id' in data:
@@ -220,23 +249,20 @@ def update_exam(exam_id):
             exam.department_id = data['department_id']
 
         exam.updated_at = datetime.utcnow()
+        ExcelService().invalidate_imports([previous_department_id, exam.department_id])
+        bump_schedule_version([previous_department_id, exam.department_id])
         db.session.commit()
 
         # Eğer sınav bilgileri değiştiyse, yeniden planlama yap
         schedule_fields = ['student_count', 'duration', 'needs_computer', 'preferred_dates']
         if any(field in data for field in schedule_fields):
-            try:
-                # Mevcut schedule'ı sil
-                if exam.exam_schedule:
-                    db.session.delete(exam.exam_schedule)
-                    db.session.commit()
-
-                # Yeniden planla
-                auto_schedule_exam(exam)
+            # Yeniden planla; mevcut schedule yerinde güncellenir
+            if auto_schedule_exam(exam):
                 message = 'Sınav güncellendi ve yeniden planlandı'
-            except Exception as e:
-                print(f"Re-scheduling error: {str(e)}")
-                message = 'Sınav güncellendi ancak yeniden planlama başarısız'
+            else:
+                # Eski schedule güncellenen sınava uymayabilir; sınav beklemeye alınır
+                unschedule_exam(exam)
+                message = 'Sınav güncellendi ancak yeniden planlama başarısız; sınav beklemede'
         else:
             message = 'Sınav güncellendi'
 
@@ -269,6 +295,7 @@ def delete_exam(exam_id):
             db.session.delete(exam.exam_schedule)
 
         db.session.delete(exam)
+        bump_schedule_version([exam.department_id])
         db.session.commit()
 
         return jsonify({
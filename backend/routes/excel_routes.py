@@ -1,29 +1,109 @@
-import os
-import time
+import logging
 import uuid
 
 from database import db
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, current_app, jsonify, request
+from services.event_broker import deleted_schedule_delta, queue_schedule_event
 from services.excel_service import ExcelService
+from services.job_service import get_job_manager
+from services.schedule_version import bump_schedule_version
 from services.scheduler_service import SchedulerService
-from werkzeug.utils import secure_filename
+from utils.uploads import upload_stream
 
 excel_bp = Blueprint('excel', __name__)
+logger = logging.getLogger(__name__)
 
-UPLOAD_FOLDER = 'uploads'
 ALLOWED_EXTENSIONS = {'xlsx', 'xls'}
 
-# Ensure upload folder exists
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-
 def allowed_file(filename):
     """Check if file extension is allowed"""
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def _schedule_upload_job(job, exam_data, department_id=None, session_id=None):
+    """Background job body for the auto-schedule step of /api/excel/upload"""
+    from services.advanced_scheduler import AdvancedSchedulerService
+
+    scheduler = AdvancedSchedulerService()
+    scheduler.progress_callback = job.update_progress
+    schedule_result = scheduler.schedule_exams(exam_data)
+    print(f"DEBUG: Scheduling result: {schedule_result}")
+    if session_id:
+        ExcelService().save_import_scheduling(department_id, session_id, schedule_result)
+    return schedule_result['success'], schedule_result['message'], schedule_result
+
+def _place_upload_job(job, exam_ids, department_id=None, session_id=None):
+    """Background job body for placing the exams of a partial re-upload"""
+    schedule_result = _place_exams(exam_ids, job.update_progress)
+    if session_id:
+        ExcelService().save_import_scheduling(department_id, session_id, schedule_result)
+    return schedule_result['success'], schedule_result['message'], schedule_result
+
+def _place_exams(exam_ids, progress_callback=None):
+    """Place exams one at a time into the department's persisted schedule"""
+    from services.incremental_scheduler import IncrementalSchedulerService
+
+    max_moves = current_app.config.get('RESCHEDULE_MAX_MOVES', 2)
+    scheduled_count = 0
+    failed_count = 0
+    details = []
+    for exam_id in exam_ids:
+        placement = IncrementalSchedulerService().place_exam(exam_id, max_moves=max_moves)
+        if placement['success']:
+            scheduled_count += 1
+        else:
+            failed_count += 1
+        details.append(f"Exam {exam_id}: {placement['message']}")
+        if progress_callback:
+            progress_callback('placing', total=len(exam_ids), placed=scheduled_count, failed=failed_count)
+
+    return {
+        'success': True,
+        'message': f'Scheduled {scheduled_count} out of {len(exam_ids)} exams',
+        'scheduled_count': scheduled_count,
+        'failed_count': failed_count,
+        'details': details
+    }
+
+def _delete_department_exams(department_id, exam_ids=None):
+    """Delete a department's exams (all, or only exam_ids) with their schedules
+
+    Set-based deletes, children first (due to foreign key constraints). Returns
+    the number of deleted schedules and exams.
+    """
+    from models import Exam, ExamSchedule, ScheduleRoomAssignment
+
+    exam_query = db.session.query(Exam.id).filter(Exam.department_id == department_id)
+    if exam_ids is not None:
+        exam_query = exam_query.filter(Exam.id.in_(exam_ids))
+        # Only a partial update removes exams from a live schedule; tell the listeners
+        for schedule in ExamSchedule.query.filter(ExamSchedule.exam_id.in_(exam_query)).all():
+            queue_schedule_event('schedule_deleted', deleted_schedule_delta(schedule, department_id))
+    schedule_ids = db.session.query(ExamSchedule.id).filter(ExamSchedule.exam_id.in_(exam_query))
+
+    ScheduleRoomAssignment.query.filter(
+        ScheduleRoomAssignment.schedule_id.in_(schedule_ids)
+    ).delete(synchronize_session=False)
+    deleted_schedules = ExamSchedule.query.filter(
+        ExamSchedule.exam_id.in_(exam_query)
+    ).delete(synchronize_session=False)
+    # MySQL cannot delete from a table it selects from in a subquery, so filter directly
+    deleted_exams = Exam.query.filter(Exam.department_id == department_id)
+    if exam_ids is not None:
+        deleted_exams = deleted_exams.filter(Exam.id.in_(exam_ids))
+    deleted_exams = deleted_exams.delete(synchronize_session=False)
+    return deleted_schedules, deleted_exams
+
 @excel_bp.route('/api/excel/upload', methods=['POST'])
 def upload_excel():
-    """Upload and process Excel file for exam creation"""
+    """Upload and process Excel file for exam creation
+
+    The workbook is validated and fingerprinted before anything changes. An
+    upload identical to the department's latest import returns that import's
+    result. If only up to EXCEL_PARTIAL_UPDATE_MAX_ROWS rows differ, just those
+    exams are removed, added and placed; otherwise the department's exams are
+    rebuilt. import_mode in the response tells which happened.
+    """
     try:
         # Check if file is present
         if 'file' not in request.files:
@@ -35,6 +115,7 @@ def upload_excel():
         file = request.files['file']
         department_id = request.form.get('department_id')
         auto_schedule = request.form.get('auto_schedule', 'true').lower() == 'true'
+        async_schedule = request.form.get('async_schedule', 'false').lower() == 'true'
         
         # Validate inputs
         if file.filename == '':
@@ -55,44 +136,65 @@ def upload_excel():
                 'message': 'Invalid file type. Only .xlsx and .xls files are allowed'
             }), 400
         
-        # Save uploaded file
-        filename = secure_filename(file.filename)
-        timestamp = str(int(time.time()))
-        filename = f"{timestamp}_{filename}"
-        file_path = os.path.join(UPLOAD_FOLDER, filename)
-        file.save(file_path)
-        
+        excel_service = ExcelService()
         try:
-            # Generate unique session ID for this upload
-            session_id = str(uuid.uuid4())
+            department_id = int(department_id)
 
-            # Clear existing exams and schedules for this department before processing new file
-            from models import Exam, ExamSchedule
+            # Validate and fingerprint before anything is deleted
+            fingerprint = excel_service.validate_excel_file(upload_stream(file), fingerprint=True)
+            if not fingerprint['valid']:
+                return jsonify(fingerprint), 400
 
-            # Delete existing exam schedules first (due to foreign key constraints)
-            existing_schedules = db.session.query(ExamSchedule).join(Exam).filter(
-                Exam.department_id == int(department_id)
-            ).all()
+            previous = excel_service.find_previous_import(department_id)
+            if previous and previous.content_hash == fingerprint['content_hash']:
+                logger.info("Upload matches import %s of department %s", previous.exam_session_id, department_id)
+                result = dict(previous.result or {})
+                result['import_mode'] = 'cached'
+                return jsonify(result), 200
 
-            for schedule in existing_schedules:
-                db.session.delete(schedule)
+            diff = excel_service.diff_rows(previous.rows, fingerprint['row_hashes']) if previous else None
+            max_changed_rows = current_app.config.get('EXCEL_PARTIAL_UPDATE_MAX_ROWS', 20)
+            partial = diff is not None and diff['unchanged'] > 0 and diff['added'] + diff['removed'] <= max_changed_rows
 
-            # Delete existing exams
-            existing_exams = Exam.query.filter_by(department_id=int(department_id)).all()
-            for exam in existing_exams:
-                db.session.delete(exam)
+            if partial:
+                # Keep the unchanged rows' exams and schedules; swap only the changed rows
+                session_id = previous.exam_session_id
+                deleted_schedules, deleted_exams = _delete_department_exams(department_id, diff['removed_exam_ids'])
+                logger.info("Partial update: %s rows added, %s removed, %s exams and %s schedules deleted",
+                            diff['added'], diff['removed'], deleted_exams, deleted_schedules)
+                result = excel_service.process_excel_file(upload_stream(file), department_id, session_id,
+                                                          rows=set(diff['added_rows']))
+                rows = diff['rows']
+            else:
+                # Generate unique session ID for this upload
+                session_id = str(uuid.uuid4())
 
-            # Commit deletions
-            db.session.commit()
-            print(f"DEBUG: Cleared {len(existing_schedules)} schedules and {len(existing_exams)} exams for department {department_id}")
+                # Clear existing exams and schedules for this department before processing new file
+                deleted_schedules, deleted_exams = _delete_department_exams(department_id)
 
-            # Process Excel file
-            excel_service = ExcelService()
-            result = excel_service.process_excel_file(file_path, int(department_id), session_id)
+                # Commit deletions
+                bump_schedule_version([department_id])
+                db.session.commit()
+                logger.info("Cleared %s schedules and %s exams for department %s",
+                            deleted_schedules, deleted_exams, department_id)
+
+                # Process Excel file
+                result = excel_service.process_excel_file(upload_stream(file), department_id, session_id)
+                rows = [None] * len(fingerprint['row_hashes'])
             
             if result['success']:
                 # Commit changes to database
+                bump_schedule_version([department_id])
                 excel_service.commit_changes()
+
+                result['import_mode'] = 'partial' if partial else 'full'
+                if partial:
+                    result['diff'] = {key: diff[key] for key in ('added', 'removed', 'unchanged')}
+                for exam_info in result.get('created_exams', []):
+                    rows[exam_info['row'] - 1] = exam_info['id']
+                result['content_hash'] = fingerprint['content_hash']
+                import_rows = [[row_hash, exam_id] for row_hash, exam_id in zip(fingerprint['row_hashes'], rows)]
+                import_saved = False
                 
                 # Auto-schedule if requested
                 print(f"DEBUG: auto_schedule={auto_schedule}, processed={result['processed']}")
@@ -102,32 +204,41 @@ def upload_excel():
                         from services.advanced_scheduler import \
                             AdvancedSchedulerService
 
-                        # Get created exams data for scheduling
-                        exam_data = []
-                        for exam_info in result.get('created_exams', []):
-                            # Get full exam data from database
-                            from models import Exam
-                            exam = Exam.query.get(exam_info['id'])
-                            if exam:
-                                exam_data.append({
-                                    'id': exam.id,
-                                    'course_code': exam_info['course_code'],
-                                    'instructor': exam_info['instructor'],
-                                    'student_count': exam.student_count,
-                                    'duration': exam.duration,
-                                    'needs_computer': exam.needs_computer,
-                                    'preferred_dates': exam.preferred_dates,
-                                    'available_rooms': exam.available_rooms,
-                                    'difficulty_level': exam_info['difficulty']
-                                })
+                        # The scheduler loads the exams itself; it only needs their IDs
+                        exam_data = [{
+                            'id': exam_info['id'],
+                            'course_code': exam_info['course_code'],
+                            'instructor': exam_info['instructor'],
+                            'difficulty_level': exam_info['difficulty']
+                        } for exam_info in result.get('created_exams', [])]
 
                         print(f"DEBUG: Prepared {len(exam_data)} exams for scheduling")
 
-                        scheduler = AdvancedSchedulerService()
-                        schedule_result = scheduler.schedule_exams(exam_data)
+                        if async_schedule:
+                            # Saved before the job starts, so the job can add its outcome to the import
+                            excel_service.save_import(department_id, session_id, fingerprint['content_hash'], import_rows, result)
+                            import_saved = True
 
-                        print(f"DEBUG: Scheduling result: {schedule_result}")
-                        result['scheduling'] = schedule_result
+                            # Schedule in the background; the client polls /api/jobs/<id>
+                            if partial:
+                                job = get_job_manager().submit('schedule_upload', _place_upload_job,
+                                                               [exam['id'] for exam in exam_data], department_id, session_id)
+                            else:
+                                job = get_job_manager().submit('schedule_upload', _schedule_upload_job,
+                                                               exam_data, department_id, session_id)
+                            result['scheduling_job'] = {
+                                'job_id': job.id,
+                                'status_url': f'/api/jobs/{job.id}'
+                            }
+                        elif partial:
+                            # New exams go around the kept schedule, moving a few exams at most
+                            result['scheduling'] = _place_exams([exam['id'] for exam in exam_data])
+                        else:
+                            scheduler = AdvancedSchedulerService()
+                            schedule_result = scheduler.schedule_exams(exam_data)
+
+                            print(f"DEBUG: Scheduling result: {schedule_result}")
+                            result['scheduling'] = schedule_result
 
                     except Exception as e:
                         import traceback
@@ -137,6 +248,10 @@ def upload_excel():
                             'success': False,
                             'message': f'Scheduling failed: {str(e)}'
                         }
+
+                # Remember this import so an identical re-upload can be answered from it
+                if not import_saved:
+                    excel_service.save_import(department_id, session_id, fingerprint['content_hash'], import_rows, result)
                 
                 return jsonify(result), 200
             else:
@@ -160,13 +275,6 @@ def upload_excel():
                 'message': f'Processing error: {str(e)}',
                 'traceback': traceback.format_exc()
             }), 500
-            
-        finally:
-            # Clean up uploaded file
-            try:
-                os.remove(file_path)
-            except:
-                pass
                 
     except Exception as e:
         return jsonify({
@@ -270,29 +378,11 @@ def validate_excel():
                 'message': 'Invalid file type. Only .xlsx and .xls files are allowed'
             }), 400
         
-        # Save temporary file
-        filename = secure_filename(file.filename)
-        timestamp = str(int(time.time()))
-        filename = f"temp_{timestamp}_{filename}"
-        file_path = os.path.join(UPLOAD_FOLDER, filename)
-        file.save(file_path)
-        
         try:
-            import pandas as pd
-
-            # Read and validate Excel file
-            df = pd.read_excel(file_path)
-            
+            # Stream and validate Excel file; fail_fast stops at the first chunk with errors
+            fail_fast = request.form.get('fail_fast', 'false').lower() == 'true'
             excel_service = ExcelService()
-            validation_result = excel_service._validate_columns(df)
-            
-            if validation_result['valid']:
-                # Additional validation
-                validation_result.update({
-                    'total_rows': len(df),
-                    'columns_found': list(df.columns),
-                    'sample_data': df.head(3).to_dict('records') if len(df) > 0 else []
-                })
+            validation_result = excel_service.validate_excel_file(upload_stream(file), fail_fast=fail_fast)
             
             return jsonify(validation_result), 200
             
@@ -301,13 +391,6 @@ def validate_excel():
                 'success': False,
                 'message': f'File validation error: {str(e)}'
             }), 400
-            
-        finally:
-            # Clean up temp file
-            try:
-                os.remove(file_path)
-            except:
-                pass
                 
     except Exception as e:
         return jsonify({
@@ -5,6 +5,8 @@ from database import db
 from flask import Blueprint, jsonify, request, send_file
 from models import Department, Exam, ExamSchedule, Room
 from services.export_service import ExportService
+from services.response_cache import cached_response
+from services.schedule_version import versioned_by_schedule
 
 export_bp = Blueprint('export', __name__)
 
@@ -93,6 +95,8 @@ def export_department_excel(department_id):
         }), 500
 
 @export_bp.route('/api/export/departments-summary', methods=['GET'])
+@versioned_by_schedule
+@cached_response(lambda kwargs: None)
 def get_departments_summary():
     """Get summary of all departments for export panel"""
     try:
@@ -127,6 +131,7 @@ def get_departments_summary():
         }), 500
 
 @export_bp.route('/api/export/preview/<int:department_id>', methods=['GET'])
+@cached_response(lambda kwargs: kwargs['department_id'])
 def preview_department_export(department_id):
     """Preview department export data"""
     try:
@@ -181,13 +186,9 @@ def preview_department_export(department_id):
             total_capacity = schedule.room.capacity
 
             # Add additional rooms if any
-            if schedule.additional_rooms:
-                from models import Room
-                for room_id in schedule.additional_rooms:
-                    additional_room = Room.query.get(room_id)
-                    if additional_room:
-                        rooms.append(additional_room.name)
-                        total_capacity += additional_room.capacity
+            for additional_room in schedule.additional_room_objects:
+                rooms.append(additional_room.name)
+                total_capacity += additional_room.capacity
 
             # Format room information
             if len(rooms) > 1:
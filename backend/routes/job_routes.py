@@ -0,0 +1,19 @@
+from flask import Blueprint, jsonify
+from services.job_service import get_job_manager
+
+job_bp = Blueprint('jobs', __name__)
+
+@job_bp.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Get the progress or result of a background job"""
+    job = get_job_manager().get(job_id)
+    if not job:
+        return jsonify({
+            'success': False,
+            'message': 'Job not found or expired'
+        }), 404
+    
+    return jsonify({
+        'success': True,
+        'data': job.to_dict()
+    }), 200
@@ -1,6 +1,10 @@
 from flask import Blueprint, jsonify, request
 from database import db
-from models import Room, Department, room_schema, rooms_schema
+from sqlalchemy.orm import joinedload
+from models import Room, Department, RoomSchema, room_schema, rooms_schema
+from services.room_registry import invalidate_room_registry
+from services.schedule_version import bump_schedule_version
+from utils.pagination import keyset_page, parse_cursor, parse_fields, parse_limit, projection_options
 
 room_bp = Blueprint('room', __name__)
 
@@ -10,15 +14,37 @@ def get_rooms():
     try:
         department_id = request.args.get('department_id')
         
+        sort_columns = [Room.id]
+        try:
+            limit = parse_limit(request.args)
+            after = parse_cursor(request.args, sort_columns)
+            fields = parse_fields(request.args, rooms_schema.fields)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 400
+        
+        options = projection_options(Room, fields, sort_columns, {
+            'department': [joinedload(Room.department)]
+        })
+        query = Room.query.options(*options)
+        
         if department_id:
-            rooms = Room.query.filter_by(department_id=department_id, is_active=True).all()
+            query = query.filter_by(department_id=department_id, is_active=True)
         else:
-            rooms = Room.query.filter_by(is_active=True).all()
+            query = query.filter_by(is_active=True)
         
-        return jsonify({
+        rooms, next_cursor = keyset_page(query, sort_columns, limit, after)
+        
+        schema = rooms_schema if fields is None else RoomSchema(many=True, only=fields)
+        response = {
             'success': True,
-            'data': rooms_schema.dump(rooms)
-        }), 200
+            'data': schema.dump(rooms)
+        }
+        if limit is not None:
+            response['next_cursor'] = next_cursor
+        return jsonify(response), 200
         
     except Exception as e:
         return jsonify({
@@ -71,7 +97,9 @@ def create_room():
         )
         
         db.session.add(room)
+        bump_schedule_version()
         db.session.commit()
+        invalidate_room_registry()
         
         return jsonify({
             'success': True,
@@ -109,7 +137,9 @@ def update_room(room_id):
         if 'is_active' in data:
             room.is_active = data['is_active']
         
+        bump_schedule_version()
         db.session.commit()
+        invalidate_room_registry()
         
         return jsonify({
             'success': True,
@@ -137,7 +167,9 @@ def delete_room(room_id):
         
         # Soft delete
         room.is_active = False
+        bump_schedule_version()
         db.session.commit()
+        invalidate_room_registry()
         
         return jsonify({
             'success': True,
@@ -1,12 +1,23 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, current_app, request, jsonify
 from database import db
-from models import ExamSchedule, Exam, Room, exam_schedules_schema, exam_schedule_schema
+from sqlalchemy.orm import joinedload, lazyload, selectinload
+from models import ExamSchedule, Exam, Room, ScheduleRoomAssignment, exam_schedules_schema, exam_schedule_schema
+from services.response_cache import cached_response
+from services.schedule_version import bump_schedule_version, versioned_by_schedule
+from services.event_broker import (deleted_schedule_delta, event_stream, get_event_broker,
+                                   queue_schedule_event, schedule_delta)
+from services.excel_service import ExcelService
+from services.job_service import get_job_manager
 from services.scheduler_service import SchedulerService
+from utils.pagination import keyset_page, parse_cursor, parse_fields, parse_limit, projection_options
+from utils.serializers import SCHEDULE_FIELDS, serialize_schedule
 from datetime import datetime, date
 
 schedule_bp = Blueprint('schedule', __name__)
 
 @schedule_bp.route('/api/schedule', methods=['GET'])
+@versioned_by_schedule
+@cached_response(lambda kwargs: request.args.get('department_id'))
 def get_schedule():
     """Get all scheduled exams"""
     try:
@@ -15,7 +26,35 @@ def get_schedule():
         end_date = request.args.get('end_date')
         department_id = request.args.get('department_id')
         
-        query = ExamSchedule.query
+        sort_columns = [ExamSchedule.scheduled_date, ExamSchedule.start_time, ExamSchedule.id]
+        try:
+            limit = parse_limit(request.args)
+            after = parse_cursor(request.args, sort_columns)
+            fields = parse_fields(request.args, SCHEDULE_FIELDS)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 400
+        
+        # Load exams, courses, rooms and departments with the schedules so
+        # serializing does not issue one query per row
+        exam_loaders = [
+            joinedload(ExamSchedule.exam).joinedload(Exam.course),
+            joinedload(ExamSchedule.exam).joinedload(Exam.department)
+        ]
+        room_loaders = [joinedload(ExamSchedule.room).joinedload(Room.department)]
+        assignment_loaders = [selectinload(ExamSchedule.room_assignments).joinedload(ScheduleRoomAssignment.room)]
+        options = projection_options(ExamSchedule, fields, sort_columns, {
+            'exam': exam_loaders,
+            'room': room_loaders,
+            'additional_rooms': assignment_loaders,
+            'additional_room_details': assignment_loaders
+        })
+        if fields is not None and 'additional_rooms' not in fields and 'additional_room_details' not in fields:
+            # room_assignments is selectin-loaded by default
+            options.append(lazyload(ExamSchedule.room_assignments))
+        query = ExamSchedule.query.options(*options)
         
         # Apply filters
         if start_date:
@@ -42,10 +81,7 @@ def get_schedule():
             query = query.join(Exam).filter(Exam.department_id == department_id)
         
         # Order by date and time
-        schedules = query.order_by(
-            ExamSchedule.scheduled_date.asc(),
-            ExamSchedule.start_time.asc()
-        ).all()
+        schedules, next_cursor = keyset_page(query, sort_columns, limit, after)
         
         # Group by date for frontend
         grouped_schedule = {}
@@ -54,7 +90,7 @@ def get_schedule():
             if date_str not in grouped_schedule:
                 grouped_schedule[date_str] = []
             
-            schedule_data = exam_schedule_schema.dump(schedule)
+            schedule_data = serialize_schedule(schedule, fields)
             grouped_schedule[date_str].append(schedule_data)
         
         # Convert to list format expected by frontend
@@ -65,10 +101,13 @@ def get_schedule():
                 'timeSlots': time_slots
             })
         
-        return jsonify({
+        response = {
             'success': True,
             'data': result
-        }), 200
+        }
+        if limit is not None:
+            response['next_cursor'] = next_cursor
+        return jsonify(response), 200
         
     except Exception as e:
         return jsonify({
@@ -76,6 +115,46 @@ def get_schedule():
             'message': f'Error fetching schedule: {str(e)}'
         }), 500
 
+@schedule_bp.route('/api/schedule/stream', methods=['GET'])
+def stream_schedule():
+    """Stream scheduling progress and schedule changes as Server-Sent Events
+
+    Events: exam_placed while a run is in progress, then schedule_created,
+    schedule_moved and schedule_deleted once their transaction commits.
+    """
+    department_id = request.args.get('department_id', type=int)
+    last_event_id = request.headers.get('Last-Event-ID', type=int)
+    
+    broker = get_event_broker()
+    subscriber = broker.subscribe(last_event_id)
+    return Response(event_stream(broker, subscriber, department_id), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+def _generate_response_data(result):
+    """Response data of a successful generate_schedule run"""
+    response_data = {
+        'scheduled_count': result['scheduled_count'],
+        'failed_count': result['failed_count'],
+        'failed_exams': result['failed_exams']
+    }
+    if 'score_trajectory' in result:
+        response_data['score_trajectory'] = result['score_trajectory']
+    if 'diff' in result:
+        response_data['dry_run'] = True
+        response_data['diff'] = result['diff']
+    return response_data
+
+def _generate_schedule_job(job, **params):
+    """Background job body for /api/schedule/generate"""
+    scheduler = SchedulerService()
+    scheduler.progress_callback = job.update_progress
+    result = scheduler.generate_schedule(**params)
+    if not result['success']:
+        return False, result['message'], None
+    return True, result['message'], _generate_response_data(result)
+
 @schedule_bp.route('/api/schedule/generate', methods=['POST'])
 def generate_schedule():
     """Generate automatic schedule for pending exams"""
@@ -85,25 +164,63 @@ def generate_schedule():
         # Get parameters
         force_regenerate = data.get('force_regenerate', False)
         department_id = data.get('department_id')
+        solver = data.get('solver', 'greedy')
+        
+        if solver not in ('greedy', 'cpsat', 'multistart', 'partitioned'):
+            return jsonify({
+                'success': False,
+                'message': 'Invalid solver. Use "greedy", "cpsat", "multistart" or "partitioned"'
+            }), 400
+        
+        try:
+            time_budget_ms = int(data.get('time_budget_ms', 0))
+        except (ValueError, TypeError):
+            return jsonify({
+                'success': False,
+                'message': 'time_budget_ms must be an integer'
+            }), 400
+        
+        try:
+            restarts = int(data.get('restarts', current_app.config.get('MULTI_START_RESTARTS', 8)))
+        except (ValueError, TypeError):
+            return jsonify({
+                'success': False,
+                'message': 'restarts must be an integer'
+            }), 400
+        
+        params = {
+            'force_regenerate': force_regenerate,
+            'department_id': department_id,
+            'solver': solver,
+            'solver_time_limit': current_app.config.get('SOLVER_TIME_LIMIT_SECONDS', 30),
+            'time_budget_ms': time_budget_ms,
+            'restarts': restarts,
+            'dry_run': bool(data.get('dry_run', False))
+        }
+        
+        # Run in the background and let the client poll /api/jobs/<id>
+        if data.get('async', False):
+            job = get_job_manager().submit('generate_schedule', _generate_schedule_job, **params)
+            return jsonify({
+                'success': True,
+                'message': 'Scheduling job queued',
+                'data': {
+                    'job_id': job.id,
+                    'status_url': f'/api/jobs/{job.id}'
+                }
+            }), 202
         
         # Initialize scheduler service
         scheduler = SchedulerService()
         
         # Generate schedule
-        result = scheduler.generate_schedule(
-            force_regenerate=force_regenerate,
-            department_id=department_id
-        )
+        result = scheduler.generate_schedule(**params)
         
         if result['success']:
             return jsonify({
                 'success': True,
                 'message': result['message'],
-                'data': {
-                    'scheduled_count': result['scheduled_count'],
-                    'failed_count': result['failed_count'],
-                    'failed_exams': result['failed_exams']
-                }
+                'data': _generate_response_data(result)
             }), 200
         else:
             return jsonify({
@@ -129,8 +246,10 @@ def update_schedule(schedule_id):
             }), 404
         
         data = request.get_json()
+        previous_date = schedule.scheduled_date.strftime('%d/%m/%Y')
         
         # Update fields if provided
+        room = None
         if 'room_id' in data:
             room = Room.query.get(data['room_id'])
             if not room:
@@ -138,7 +257,6 @@ def update_schedule(schedule_id):
                     'success': False,
                     'message': 'Room not found'
                 }), 404
-            schedule.room_id = data['room_id']
         
         if 'scheduled_date' in data:
             try:
@@ -167,7 +285,19 @@ def update_schedule(schedule_id):
                     'message': 'Invalid end_time format. Use HH:MM'
                 }), 400
         
+        # Keep the room assignment rows in step with the edited schedule
+        if room is not None and room.id != schedule.room_id:
+            # A new primary room changes how the students are split over the rooms
+            rooms = [room] + [other for other in schedule.additional_room_objects if other.id != room.id]
+            schedule.assign_rooms(rooms, schedule.exam.student_count)
+        else:
+            schedule.sync_room_assignments()
         schedule.updated_at = datetime.utcnow()
+        delta = schedule_delta(schedule, schedule.exam.department_id)
+        delta['previous_date'] = previous_date
+        queue_schedule_event('schedule_moved', delta)
+        ExcelService().invalidate_imports([schedule.exam.department_id])
+        bump_schedule_version([schedule.exam.department_id])
         db.session.commit()
         
         return jsonify({
@@ -198,7 +328,10 @@ def delete_schedule(schedule_id):
         exam = schedule.exam
         exam.status = 'pending'
         
+        queue_schedule_event('schedule_deleted', deleted_schedule_delta(schedule, exam.department_id))
         db.session.delete(schedule)
+        ExcelService().invalidate_imports([exam.department_id])
+        bump_schedule_version([exam.department_id])
         db.session.commit()
         
         return jsonify({
@@ -1,12 +1,35 @@
+import logging
 from datetime import date, datetime, time, timedelta
 
 from database import db
 from models import Exam, ExamSchedule, Room, Settings
-from sqlalchemy import func
+from services.event_broker import (publish_event, queue_schedule_event,
+                                   schedule_delta)
+from services.exact_solver import ExactSolverService
+from services.local_search import LocalSearchImprover
+from services.multi_start import run_multi_start, run_partitioned
+from services.room_allocator import RoomAllocator
+from services.room_occupancy import RoomOccupancyIndex
+from services.room_registry import get_room_registry
+from services.schedule_diff import build_schedule_diff
+from services.schedule_version import bump_schedule_version
+from services.snapshot import build_schedule_problem
+from utils.time_grid import (DayGrid, TimeGrid, normalize_difficulty,
+                             time_interval_mask, time_to_minutes)
+
+logger = logging.getLogger(__name__)
 
 
 class AdvancedSchedulerService:
     """Advanced scheduler with comprehensive constraint checking"""
+
+    # Scheduler variant rebuilt inside multi-start worker processes
+    snapshot_kind = 'advanced'
+
+    # Rules the exact solver models for this scheduler's placements
+    enforces_time_gap = True
+    enforces_class_level_conflicts = True
+    max_rooms_per_exam = None  # No limit
     
     def __init__(self):
         # Define working hours
@@ -24,47 +47,57 @@ class AdvancedSchedulerService:
         # Time slot generation parameters for flexible scheduling
         self.time_slot_interval = 15  # Generate time slots every 15 minutes
 
-    def _generate_possible_start_times(self, target_date, exam_duration):
-        """Generate all possible start times for an exam on a given date"""
-        possible_times = []
+        # Minimum gap between exams on the same day
+        self.gap_minutes = 15
 
-        # Start from working hours start
-        current_time = self.working_hours_start
+        # Bitmask engine for lunch, prayer and working hour rules
+        self.time_grid = TimeGrid(
+            self.working_hours_start, self.working_hours_end,
+            self.lunch_break_start, self.lunch_break_end,
+            self.friday_prayer_start, self.friday_prayer_end,
+            slot_interval=self.time_slot_interval,
+            gap_minutes=self.gap_minutes
+        )
 
-        while current_time < self.working_hours_end:
-            # Calculate end time for this start time
-            end_time = (datetime.combine(target_date, current_time) +
-                       timedelta(minutes=exam_duration)).time()
+        # Room usage for the exam week, loaded once per run
+        self.room_occupancy = RoomOccupancyIndex()
 
-            # Check if exam would end within working hours
-            if end_time <= self.working_hours_end:
-                # Check basic time slot rules (lunch break, prayer time)
-                if self._check_time_slot_rules(target_date, current_time, end_time):
-                    possible_times.append(current_time)
+        # Knapsack room selection, cached per free room set and student count
+        self.room_allocator = RoomAllocator()
 
-            # Move to next time slot (15 minute intervals)
-            current_time = (datetime.combine(target_date, current_time) +
-                           timedelta(minutes=self.time_slot_interval)).time()
+        # Placements made during this run: exam ID -> (date, start_time, end_time, room IDs)
+        self.placements = {}
+
+        # Schedules created during this run, by exam ID
+        self.created_schedules = {}
+
+        # Snapshot of the exams and rooms of this run; constraint checks read only this
+        self.problem = None
+        # Exam rows of this run by ID, only touched to write back results
+        self.exam_rows = {}
+
+        # Called as progress_callback(phase, total=None, placed=None, failed=None) by background jobs
+        self.progress_callback = None
+
+        # Dry runs keep placements in memory and never add to the database session
+        self.dry_run = False
+
+    def _generate_possible_start_times(self, target_date, exam_duration):
+        """Generate all possible start times for an exam on a given date"""
+        return [start_time for start_time, _, _ in self.time_grid.candidates(target_date, exam_duration)]
+
+    def _candidate_slots(self, exam, target_date):
+        """(start_time, end_time) pairs this scheduler may place the exam in on a date"""
+        return [(start_time, end_time) for start_time, end_time, _ in self.time_grid.candidates(target_date, exam.duration)]
+
+    def _candidate_dates(self, exam, exam_dates):
+        """Dates this scheduler may place the exam on"""
+        return list(exam_dates)
 
-        return possible_times
-    
     def _check_time_slot_rules(self, target_date, start_time, end_time):
-        """Check time slot constraints"""
-        # Check if exam is within working hours
-        if start_time < self.working_hours_start or end_time > self.working_hours_end:
-            return False
-        
-        # Rule 1: No exams during lunch break
-        if (start_time < self.lunch_break_end and end_time > self.lunch_break_start):
-            return False
-        
-        # Rule 2: Friday prayer time restriction
-        if target_date.weekday() == 4:  # Friday
-            if (start_time < self.friday_prayer_end and end_time > self.friday_prayer_start):
-                return False
-        
-        return True
-    
+        """Check time slot constraints (working hours, lunch break, Friday prayer)"""
+        return self.time_grid.fits(target_date, time_to_minutes(start_time), time_to_minutes(end_time))
+
     def _check_difficulty_level_rules(self, exam, target_date, daily_schedules):
         """Check difficulty level constraints based on user-defined Excel input"""
         # Get existing schedules for the day
@@ -76,105 +109,54 @@ class AdvancedSchedulerService:
         # 1. "Zor" (hard) sınavlar - o gün başka hiçbir sınav yapılamaz
         # 2. "Orta" (normal) sınavlar - aynı gün birden fazla orta sınav olabilir + kolay sınavlar da eklenebilir
         # 3. "Kolay" (easy) sınavlar - birden fazla olabilir (zor yoksa)
+        day = daily_schedules[date_key]
 
-        difficulty_counts = {
-            'hard': 0,      # Zor
-            'normal': 0,    # Orta
-            'easy': 0       # Kolay
-        }
-
-        # Count existing exams by difficulty
-        for scheduled_exam in daily_schedules[date_key]:
-            difficulty = getattr(scheduled_exam, 'difficulty_level', 'normal')
-            # Map old difficulty levels to new system
-            if difficulty == 'very_hard':
-                difficulty = 'hard'  # Map very_hard to hard
-            difficulty_counts[difficulty] = difficulty_counts.get(difficulty, 0) + 1
-
-        # Check constraints for the new exam
-        exam_difficulty = getattr(exam, 'difficulty_level', 'normal')
-        # Map old difficulty levels to new system
-        if exam_difficulty == 'very_hard':
-            exam_difficulty = 'hard'
-
-        print(f"DEBUG: Advanced scheduler - Checking difficulty rules for {exam.course.code if exam.course else 'Unknown'}")
-        print(f"DEBUG: Exam difficulty: {exam_difficulty}")
-        print(f"DEBUG: Existing counts: {difficulty_counts}")
-
-        if exam_difficulty == 'hard':  # Zor sınav
+        if normalize_difficulty(getattr(exam, 'difficulty_level', 'normal')) == 'hard':  # Zor sınav
             # Zor sınav varsa o gün başka hiçbir sınav yapılamaz
-            total_existing = difficulty_counts['hard'] + difficulty_counts['normal'] + difficulty_counts['easy']
-            result = total_existing == 0
-            print(f"DEBUG: Hard exam check - total existing: {total_existing}, result: {result}")
-            return result
-        elif exam_difficulty == 'normal':  # Orta sınav
-            # Orta sınavlar: Zor sınav yoksa birden fazla orta + kolay olabilir
-            result = difficulty_counts['hard'] == 0
-            print(f"DEBUG: Normal exam check - hard count: {difficulty_counts['hard']}, result: {result}")
-            return result
-        else:  # easy - Kolay sınav
-            # Kolay sınavlar: Zor sınav yoksa birden fazla olabilir
-            result = difficulty_counts['hard'] == 0
-            print(f"DEBUG: Easy exam check - hard count: {difficulty_counts['hard']}, result: {result}")
-            return result
-    
+            return day.count('hard') + day.count('normal') + day.count('easy') == 0
+
+        # Orta ve kolay sınavlar: Zor sınav yoksa birden fazla olabilir
+        return day.count('hard') == 0
+
     def _check_class_level_conflicts(self, exam, target_date, start_time, end_time, daily_schedules):
         """Check class level conflict constraints"""
         date_key = target_date.strftime('%Y-%m-%d')
         if date_key not in daily_schedules:
             return True
-        
-        # Check for same class level conflicts in the same time slot
-        for scheduled_exam in daily_schedules[date_key]:
-            if scheduled_exam.class_name == exam.class_name:
-                # Get the scheduled time for this exam
-                schedule = scheduled_exam.exam_schedules[0] if scheduled_exam.exam_schedules else None
-                if schedule:
-                    # Check time overlap
-                    if self._times_overlap(start_time, end_time, schedule.start_time, schedule.end_time):
-                        return False
-        
-        return True
-    
+
+        # Same class level exams may not overlap in time
+        level_mask = daily_schedules[date_key].level_masks.get(exam.class_name, 0)
+        return level_mask & time_interval_mask(start_time, end_time) == 0
+
     def _check_time_gap_requirement(self, target_date, start_time, end_time, daily_schedules):
         """Check 15-minute gap requirement between exams"""
         date_key = target_date.strftime('%Y-%m-%d')
         if date_key not in daily_schedules:
             return True
-        
-        # Check gap with existing exams
-        for scheduled_exam in daily_schedules[date_key]:
-            schedule = scheduled_exam.exam_schedules[0] if scheduled_exam.exam_schedules else None
-            if schedule:
-                # Check if there's at least 15 minutes gap
-                if not self._has_sufficient_gap(start_time, end_time, schedule.start_time, schedule.end_time):
-                    return False
-        
-        return True
-    
+
+        # Widen the new exam by the gap on both sides; it must not touch any exam
+        return daily_schedules[date_key].occupied & self.time_grid.gap_mask(start_time, end_time) == 0
+
     def _times_overlap(self, start1, end1, start2, end2):
         """Check if two time ranges overlap"""
         return start1 < end2 and start2 < end1
     
     def _has_sufficient_gap(self, start1, end1, start2, end2):
         """Check if there's at least 15 minutes gap between time slots"""
-        gap_minutes = 15
-        
-        # Convert times to minutes for easier calculation
-        start1_minutes = start1.hour * 60 + start1.minute
-        end1_minutes = end1.hour * 60 + end1.minute
-        start2_minutes = start2.hour * 60 + start2.minute
-        end2_minutes = end2.hour * 60 + end2.minute
-        
+        start1_minutes = time_to_minutes(start1)
+        end1_minutes = time_to_minutes(end1)
+        start2_minutes = time_to_minutes(start2)
+        end2_minutes = time_to_minutes(end2)
+
         # Check gap in both directions
         if end1_minutes <= start2_minutes:
-            return (start2_minutes - end1_minutes) >= gap_minutes
+            return (start2_minutes - end1_minutes) >= self.gap_minutes
         elif end2_minutes <= start1_minutes:
-            return (start1_minutes - end2_minutes) >= gap_minutes
+            return (start1_minutes - end2_minutes) >= self.gap_minutes
         else:
             # Times overlap, no gap
             return False
-    
+
     def _find_suitable_rooms(self, exam, target_date, start_time, end_time):
         """Find suitable rooms for the exam with capacity splitting if needed"""
         # Get available rooms from exam's available_rooms list
@@ -185,7 +167,7 @@ class AdvancedSchedulerService:
         # Get room objects that match the names and meet requirements
         available_rooms = []
         for room_name in available_room_names:
-            room = Room.query.filter_by(name=room_name.strip(), is_active=True).first()
+            room = self._get_room_by_name(room_name)
             if room:
                 # Check computer requirement
                 if exam.needs_computer and not room.has_computer:
@@ -198,149 +180,157 @@ class AdvancedSchedulerService:
         if not available_rooms:
             return []
 
-        # Sort by capacity (largest first for better optimization)
-        available_rooms.sort(key=lambda r: r.capacity, reverse=True)
-
         # Try to find room combination that fits all students
         return self._find_room_combination(available_rooms, exam.student_count)
     
     def _find_room_combination(self, available_rooms, required_capacity):
         """Find combination of rooms to accommodate all students"""
-        print(f"DEBUG: Finding room combination for {required_capacity} students")
-        print(f"DEBUG: Available rooms: {[(r.name, r.capacity) for r in available_rooms]}")
-
-        # Try single room first
-        for room in available_rooms:
-            if room.capacity >= required_capacity:
-                print(f"DEBUG: Single room sufficient: {room.name} (capacity: {room.capacity})")
-                return [room]
-
-        print(f"DEBUG: No single room sufficient, trying combinations...")
-
-        # Try combination of rooms (up to 3 rooms)
-        for i, room1 in enumerate(available_rooms):
-            remaining_capacity = required_capacity - room1.capacity
-            if remaining_capacity <= 0:
-                continue
+        rooms = self.room_allocator.allocate(available_rooms, required_capacity)
+        if not rooms:
+            logger.debug("No suitable room combination found for %s students", required_capacity)
+        elif logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Room combination for %s students: %s (total: %s)", required_capacity,
+                         ', '.join(room.name for room in rooms), sum(room.capacity for room in rooms))
+        return rooms
+
+    def _get_room_by_name(self, room_name):
+        """Get an active room by name"""
+        if self.problem is not None:
+            return self.problem.rooms_by_name.get(room_name.strip())
+        return get_room_registry().get_active(room_name)
+
+    def _get_active_rooms(self):
+        """Get all active rooms"""
+        if self.problem is not None:
+            return list(self.problem.rooms)
+        return get_room_registry().active_rooms()
+
+    def _report_progress(self, phase, total=None, placed=None, failed=None):
+        """Forward progress to the job running this scheduler, if any"""
+        if self.progress_callback:
+            self.progress_callback(phase, total=total, placed=placed, failed=failed)
+
+    def _report_placement(self, exam, rooms, target_date, start_time, end_time):
+        """Publish a per-exam placement event to /api/schedule/stream listeners"""
+        publish_event('exam_placed', {
+            'exam_id': exam.id,
+            'department_id': exam.department_id,
+            'scheduled_date': target_date.isoformat(),
+            'start_time': start_time.isoformat(),
+            'end_time': end_time.isoformat(),
+            'room_ids': [room.id for room in rooms]
+        })
+
+    def _queue_created_schedule_events(self):
+        """Queue a schedule_created delta per schedule of this run, published on commit"""
+        db.session.flush()
+        for exam_id, schedule in self.created_schedules.items():
+            queue_schedule_event('schedule_created', schedule_delta(schedule, self.exam_rows[exam_id].department_id))
+
+    def _use_problem(self, problem):
+        """Run the constraint checks on a snapshot instead of ORM objects"""
+        self.problem = problem
+
+    def _load_snapshot(self, exams, exam_dates):
+        """Snapshot the exams of this run in bulk and return them in priority order"""
+        self.exam_rows = {exam.id: exam for exam in exams}
+        problem = build_schedule_problem([exam.id for exam in exams], exam_dates, self.room_occupancy)
+        problem.exams = self._order_exams(problem.exams)
+        self._use_problem(problem)
+        return problem.exams
 
-            for j, room2 in enumerate(available_rooms[i+1:], i+1):
-                total_capacity = room1.capacity + room2.capacity
-                if total_capacity >= required_capacity:
-                    print(f"DEBUG: Two-room combination found: {room1.name} + {room2.name} (total: {total_capacity})")
-                    return [room1, room2]
-
-                remaining_capacity2 = required_capacity - total_capacity
-                if remaining_capacity2 <= 0:
-                    continue
-
-                for room3 in available_rooms[j+1:]:
-                    total_capacity3 = room1.capacity + room2.capacity + room3.capacity
-                    if total_capacity3 >= required_capacity:
-                        print(f"DEBUG: Three-room combination found: {room1.name} + {room2.name} + {room3.name} (total: {total_capacity3})")
-                        return [room1, room2, room3]
-
-        print(f"DEBUG: No suitable room combination found for {required_capacity} students")
-        return []  # No suitable combination found
-    
     def _is_room_available(self, room_id, target_date, start_time, end_time):
         """Check if room is available at the given time"""
-        # Check for overlapping schedules in primary room
-        overlapping = ExamSchedule.query.filter(
-            ExamSchedule.room_id == room_id,
-            ExamSchedule.scheduled_date == target_date,
-            db.or_(
-                # New exam starts during existing exam
-                db.and_(
-                    ExamSchedule.start_time <= start_time,
-                    ExamSchedule.end_time > start_time
-                ),
-                # New exam ends during existing exam
-                db.and_(
-                    ExamSchedule.start_time < end_time,
-                    ExamSchedule.end_time >= end_time
-                ),
-                # New exam completely contains existing exam
-                db.and_(
-                    ExamSchedule.start_time >= start_time,
-                    ExamSchedule.end_time <= end_time
-                )
-            )
-        ).first()
+        if not self.room_occupancy.covers(target_date):
+            self.room_occupancy.load(target_date, target_date)
 
-        if overlapping:
-            return False
+        return self.room_occupancy.is_available(room_id, target_date, start_time, end_time)
 
-        # Also check if this room is used as an additional room in any schedule
-        overlapping_additional = ExamSchedule.query.filter(
-            ExamSchedule.scheduled_date == target_date,
-            ExamSchedule.additional_rooms.isnot(None),
-            func.json_contains(ExamSchedule.additional_rooms, str(room_id)),
-            db.or_(
-                # New exam starts during existing exam
-                db.and_(
-                    ExamSchedule.start_time <= start_time,
-                    ExamSchedule.end_time > start_time
-                ),
-                # New exam ends during existing exam
-                db.and_(
-                    ExamSchedule.start_time < end_time,
-                    ExamSchedule.end_time >= end_time
-                ),
-                # New exam completely contains existing exam
-                db.and_(
-                    ExamSchedule.start_time >= start_time,
-                    ExamSchedule.end_time <= end_time
-                )
-            )
-        ).first()
+    def _schedule_ids_of(self, exam_ids):
+        """IDs of the saved schedules of the given exams"""
+        if not exam_ids:
+            return []
+        return [schedule_id for (schedule_id,) in db.session.query(ExamSchedule.id).filter(
+            ExamSchedule.exam_id.in_(list(exam_ids))
+        ).all()]
+
+    def _load_room_occupancy(self, start_date, end_date, exclude_schedule_ids=None):
+        """Load existing room usage for the exam week into memory"""
+        schedule_count = self.room_occupancy.load(start_date, end_date, exclude_schedule_ids)
+        logger.debug("Loaded %s existing schedules into room occupancy index", schedule_count)
 
-        return overlapping_additional is None
-    
     def _create_exam_schedule(self, exam, rooms, target_date, start_time, end_time, daily_schedules):
         """Create exam schedule with room assignments"""
+        if self.dry_run:
+            self._record_placement(exam, rooms, target_date, start_time, end_time, daily_schedules)
+            return True
+
         try:
             # Primary room is the first (largest capacity)
             primary_room = rooms[0]
 
-            # Prepare additional rooms list (exclude primary room)
-            additional_room_ids = [room.id for room in rooms[1:]] if len(rooms) > 1 else None
-
             # Calculate total capacity
             total_capacity = sum(room.capacity for room in rooms)
 
             schedule = ExamSchedule(
                 exam_id=exam.id,
-                room_id=primary_room.id,
-                additional_rooms=additional_room_ids,
                 scheduled_date=target_date,
                 start_time=start_time,
                 end_time=end_time
             )
+            # Primary and additional rooms, seats filled in order
+            schedule.assign_rooms(rooms, exam.student_count)
 
             db.session.add(schedule)
-            exam.status = 'planned'
+            self.exam_rows[exam.id].status = 'planned'
+            self.created_schedules[exam.id] = schedule
 
-            # Update daily schedules tracking
-            date_key = target_date.strftime('%Y-%m-%d')
-            if date_key not in daily_schedules:
-                daily_schedules[date_key] = []
-            daily_schedules[date_key].append(exam)
+            # Block rooms and update daily schedules tracking
+            self._record_placement(exam, rooms, target_date, start_time, end_time, daily_schedules)
+            self._report_placement(exam, rooms, target_date, start_time, end_time)
 
             # Log multi-room assignment
             if len(rooms) > 1:
                 room_names = [room.name for room in rooms]
-                print(f"DEBUG: Multi-room assignment for {exam.course.code}: {', '.join(room_names)} (Total capacity: {total_capacity}, Students: {exam.student_count})")
+                logger.debug("Multi-room assignment for %s: %s (Total capacity: %s, Students: %s)",
+                             exam.course_code, ', '.join(room_names), total_capacity, exam.student_count)
             else:
-                print(f"DEBUG: Single room assignment for {exam.course.code}: {primary_room.name} (Capacity: {primary_room.capacity}, Students: {exam.student_count})")
+                logger.debug("Single room assignment for %s: %s (Capacity: %s, Students: %s)",
+                             exam.course_code, primary_room.name, primary_room.capacity, exam.student_count)
 
             return True
             
         except Exception as e:
-            print(f"Error creating exam schedule: {str(e)}")
+            logger.exception("Error creating exam schedule: %s", e)
             return False
 
-    def schedule_exams(self, exam_data_list):
-        """Schedule multiple exams with advanced constraints"""
+    def _record_placement(self, exam, rooms, target_date, start_time, end_time, daily_schedules):
+        """Track a placement in the room occupancy index and daily schedules"""
+        room_ids = tuple(room.id for room in rooms)
+        self.placements[exam.id] = (target_date, start_time, end_time, room_ids)
+
+        # Block primary and additional rooms for later availability checks
+        self.room_occupancy.add(room_ids, target_date, start_time, end_time, owner=exam.id)
+
+        date_key = target_date.strftime('%Y-%m-%d')
+        if date_key not in daily_schedules:
+            daily_schedules[date_key] = DayGrid()
+        daily_schedules[date_key].add(exam, exam.class_name, time_interval_mask(start_time, end_time))
+
+    def schedule_exams(self, exam_data_list, solver='greedy', solver_time_limit=30, time_budget_ms=0, restarts=None,
+                       dry_run=False):
+        """Schedule multiple exams with advanced constraints
+
+        solver='greedy' places exams one at a time; solver='cpsat' solves the
+        whole week at once with ExactSolverService under solver_time_limit seconds;
+        solver='multistart' keeps the best of `restarts` randomized greedy orderings;
+        solver='partitioned' runs the greedy pass concurrently per room-sharing component.
+        A positive time_budget_ms runs a local-search improvement phase after
+        the greedy pass. dry_run=True saves nothing and returns the candidate
+        schedule as a diff against the persisted one; saved schedules of the
+        given exams are planned as replaced.
+        """
+        self.dry_run = dry_run
         try:
             # Get exam week settings
             exam_week_start_setting = Settings.query.filter_by(key='exam_week_start').first()
@@ -386,6 +376,10 @@ class AdvancedSchedulerService:
                     'details': []
                 }
 
+            # Load room usage once; every availability check hits the index
+            replaced_schedule_ids = self._schedule_ids_of([exam_data['id'] for exam_data in exam_data_list]) if dry_run else None
+            self._load_room_occupancy(exam_dates[0], exam_dates[-1], replaced_schedule_ids)
+
             # Track daily schedules for constraint checking
             daily_schedules = {}
             scheduled_count = 0
@@ -393,66 +387,96 @@ class AdvancedSchedulerService:
             details = []
 
             # Get exam objects from database
+            exam_ids = [exam_data['id'] for exam_data in exam_data_list]
+            found = {exam.id: exam for exam in Exam.query.filter(Exam.id.in_(exam_ids)).all()} if exam_ids else {}
             exams_to_schedule = []
-            for exam_data in exam_data_list:
-                exam = Exam.query.get(exam_data['id'])
-                if exam:
-                    exams_to_schedule.append(exam)
+            for exam_id in exam_ids:
+                if exam_id in found:
+                    exams_to_schedule.append(found[exam_id])
                 else:
                     failed_count += 1
-                    details.append(f"Exam ID {exam_data['id']} not found")
-
-            # Sort exams by priority (difficulty, student count, duration)
-            exams_to_schedule.sort(key=lambda e: (
-                {'very_hard': 4, 'hard': 3, 'normal': 2, 'easy': 1}.get(e.difficulty_level, 2),
-                -e.student_count,  # Larger classes first
-                -e.duration        # Longer exams first
-            ), reverse=True)
-
-            # Schedule each exam
-            for exam in exams_to_schedule:
-                scheduled = False
-
-                # Try each preferred date first
-                preferred_dates = getattr(exam, 'preferred_dates', [])
-                if preferred_dates:
-                    for pref_date in preferred_dates:
-                        if isinstance(pref_date, str):
-                            try:
-                                pref_date = datetime.strptime(pref_date, '%Y-%m-%d').date()
-                            except:
-                                continue
-
-                        if pref_date in exam_dates:
-                            if self._try_schedule_exam_on_date(exam, pref_date, daily_schedules):
-                                scheduled = True
-                                scheduled_count += 1
-                                details.append(f"Scheduled {exam.course.code} on preferred date {pref_date}")
-                                break
-
-                # If not scheduled on preferred dates, try all available dates
-                if not scheduled:
-                    for exam_date in exam_dates:
-                        if self._try_schedule_exam_on_date(exam, exam_date, daily_schedules):
-                            scheduled = True
-                            scheduled_count += 1
-                            details.append(f"Scheduled {exam.course.code} on {exam_date}")
-                            break
-
-                if not scheduled:
+                    details.append(f"Exam ID {exam_id} not found")
+
+            # Snapshot the exams, sorted by priority (difficulty, student count, duration)
+            exams_to_schedule = self._load_snapshot(exams_to_schedule, exam_dates)
+
+            if solver in ('cpsat', 'multistart', 'partitioned'):
+                self._report_progress('solving', total=len(exams_to_schedule), placed=0, failed=failed_count)
+                if solver == 'cpsat':
+                    # Solve the whole week at once
+                    solver_result = self._schedule_with_solver(exams_to_schedule, exam_dates, daily_schedules, solver_time_limit)
+                elif solver == 'partitioned':
+                    # Independent room-sharing components are solved concurrently
+                    solver_result = self._schedule_partitioned(exams_to_schedule, exam_dates, daily_schedules)
+                else:
+                    # Keep the best of several randomized greedy orderings
+                    solver_result = self._schedule_with_multi_start(exams_to_schedule, exam_dates, daily_schedules, restarts)
+
+                if not solver_result['success']:
+                    db.session.rollback()
+                    return {
+                        'success': False,
+                        'message': solver_result['message'],
+                        'scheduled_count': 0,
+                        'failed_count': len(exam_data_list),
+                        'details': []
+                    }
+
+                for exam, exam_date in solver_result['scheduled']:
+                    scheduled_count += 1
+                    details.append(f"Scheduled {exam.course_code} on {exam_date}")
+                for exam, reason in solver_result['failed']:
                     failed_count += 1
-                    details.append(f"Failed to schedule {exam.course.code} - no suitable time slot found")
-
-            # Commit all changes
-            db.session.commit()
+                    details.append(f"Failed to schedule {exam.course_code} - {reason}")
+            else:
+                # Schedule each exam
+                self._report_progress('placing', total=len(exams_to_schedule), placed=0, failed=failed_count)
+                for exam in exams_to_schedule:
+                    scheduled_date, on_preferred_date, reason = self._place_exam_greedy(exam, exam_dates, daily_schedules)
+                    if scheduled_date is None:
+                        failed_count += 1
+                        details.append(f"Failed to schedule {exam.course_code} - {reason}")
+                    elif on_preferred_date:
+                        scheduled_count += 1
+                        details.append(f"Scheduled {exam.course_code} on preferred date {scheduled_date}")
+                    else:
+                        scheduled_count += 1
+                        details.append(f"Scheduled {exam.course_code} on {scheduled_date}")
+                    self._report_progress('placing', placed=scheduled_count, failed=failed_count)
+
+            improvement = None
+            if solver == 'greedy' and time_budget_ms and time_budget_ms > 0:
+                self._report_progress('improving', placed=scheduled_count, failed=failed_count)
+                improvement = self._run_improvement_phase(exams_to_schedule, exam_dates, daily_schedules, time_budget_ms)
+                placed_before = scheduled_count
+                scheduled_count = sum(1 for exam in exams_to_schedule if exam.id in self.placements)
+                failed_count += placed_before - scheduled_count
+                details.append(f"Improvement phase changed {improvement['changed_exams']} exams "
+                               f"(cost {improvement['initial_cost']} -> {improvement['final_cost']})")
+
+            if dry_run:
+                # Nothing was added to the session; compare with what is saved instead
+                diff = build_schedule_diff(self, exams_to_schedule, exam_dates, replace_existing=True)
+            else:
+                # Commit all changes
+                self._report_progress('committing', placed=scheduled_count, failed=failed_count)
+                self._queue_created_schedule_events()
+                bump_schedule_version({exam.department_id for exam in exams_to_schedule})
+                db.session.commit()
 
-            return {
+            result = {
                 'success': True,
                 'message': f'Scheduled {scheduled_count} out of {len(exams_to_schedule)} exams',
                 'scheduled_count': scheduled_count,
                 'failed_count': failed_count,
                 'details': details
             }
+            if improvement:
+                result['score_trajectory'] = improvement['score_trajectory']
+            if dry_run:
+                result['message'] += ' (dry run, nothing saved)'
+                result['diff'] = diff
+            return result
 
         except Exception as e:
             db.session.rollback()
@@ -464,18 +488,186 @@ class AdvancedSchedulerService:
                 'details': [str(e)]
             }
 
-    def _try_schedule_exam_on_date(self, exam, target_date, daily_schedules):
-        """Try to schedule an exam on a specific date with flexible timing"""
-        # Generate all possible start times for this exam duration
-        possible_start_times = self._generate_possible_start_times(target_date, exam.duration)
+    def _order_exams(self, exams):
+        """Sort exams by priority (difficulty, student count, duration)"""
+        return sorted(exams, key=lambda e: (
+            {'very_hard': 4, 'hard': 3, 'normal': 2, 'easy': 1}.get(e.difficulty_level, 2),
+            -e.student_count,  # Larger classes first
+            -e.duration        # Longer exams first
+        ), reverse=True)
+
+    def _place_exam_greedy(self, exam, exam_dates, daily_schedules):
+        """Place one exam on its preferred dates first, then on any exam date
+
+        Returns (scheduled_date, on_preferred_date, failure_reason).
+        """
+        # Try each preferred date first
+        preferred_dates = getattr(exam, 'preferred_dates', [])
+        if preferred_dates:
+            for pref_date in preferred_dates:
+                if isinstance(pref_date, str):
+                    try:
+                        pref_date = datetime.strptime(pref_date, '%Y-%m-%d').date()
+                    except:
+                        continue
+
+                if pref_date in exam_dates:
+                    if self._try_schedule_exam_on_date(exam, pref_date, daily_schedules):
+                        return pref_date, True, None
+
+        # If not scheduled on preferred dates, try all available dates
+        for exam_date in exam_dates:
+            if self._try_schedule_exam_on_date(exam, exam_date, daily_schedules):
+                return exam_date, False, None
+
+        return None, False, 'no suitable time slot found'
+
+    def _schedule_with_multi_start(self, exams, exam_dates, daily_schedules, restarts=None):
+        """Run randomized greedy orderings in a process pool and create the best schedule"""
+        best = run_multi_start(self.problem, self.snapshot_kind, restarts)
+        logger.debug("Multi-start kept ordering %s of %s (%s failed, %s preferred dates)",
+                     best['seed'], best['runs'], best['failed_count'], best['preferred_hits'])
+
+        rooms_by_id = self.problem.rooms_by_id
+        scheduled = []
+        failed = []
+        for exam in exams:
+            placement = best['placements'].get(exam.id)
+            if placement is None:
+                failed.append((exam, 'no suitable time slot found'))
+                continue
+
+            target_date, start_time, end_time, room_ids = placement
+            rooms = [rooms_by_id[room_id] for room_id in room_ids]
+            if self._create_exam_schedule(exam, rooms, target_date, start_time, end_time, daily_schedules):
+                scheduled.append((exam, target_date))
+            else:
+                failed.append((exam, 'Could not create schedule'))
+
+        return {
+            'success': True,
+            'message': f"Best of {best['runs']} orderings",
+            'scheduled': scheduled,
+            'failed': failed
+        }
+
+    def _schedule_partitioned(self, exams, exam_dates, daily_schedules):
+        """Solve room-sharing components concurrently, then merge them in priority order
+
+        Components never compete for rooms, but day-level rules (hard exam
+        isolation, gaps) span departments. Each component placement is
+        re-checked against the merged days and re-placed greedily on a clash.
+        """
+        partitioned = run_partitioned(self.problem, self.snapshot_kind)
+        placements = partitioned['placements']
+        logger.debug("Partitioned scheduling: %s components, largest has %s exams",
+                     partitioned['components'], partitioned['largest_component'])
+
+        rooms_by_id = self.problem.rooms_by_id
+        scheduled = []
+        failed = []
+        replaced = 0
+        for exam in exams:
+            placement = placements.get(exam.id)
+            if placement is not None:
+                target_date, start_time, end_time, room_ids = placement
+                if self._placement_fits(exam, placement, daily_schedules):
+                    rooms = [rooms_by_id[room_id] for room_id in room_ids]
+                    if self._create_exam_schedule(exam, rooms, target_date, start_time, end_time, daily_schedules):
+                        scheduled.append((exam, target_date))
+                        continue
+                replaced += 1
+
+            # Clashes with another component, or unplaceable in its own component
+            scheduled_date, _, reason = self._place_exam_greedy(exam, exam_dates, daily_schedules)
+            if scheduled_date is None:
+                failed.append((exam, reason))
+            else:
+                scheduled.append((exam, scheduled_date))
+
+        return {
+            'success': True,
+            'message': f"Merged {partitioned['components']} components ({replaced} exams re-placed)",
+            'scheduled': scheduled,
+            'failed': failed
+        }
 
-        # Try each possible start time
-        for start_time in possible_start_times:
-            # Calculate end time based on exam duration
-            duration_minutes = exam.duration
-            end_time = (datetime.combine(target_date, start_time) +
-                       timedelta(minutes=duration_minutes)).time()
+    def _placement_fits(self, exam, placement, daily_schedules):
+        """Check a placement made elsewhere against the current daily schedules and rooms"""
+        target_date, start_time, end_time, room_ids = placement
+        if not self._check_difficulty_level_rules(exam, target_date, daily_schedules):
+            return False
+        if not self._check_class_level_conflicts(exam, target_date, start_time, end_time, daily_schedules):
+            return False
+        if not self._check_time_gap_requirement(target_date, start_time, end_time, daily_schedules):
+            return False
+        return all(self._is_room_available(room_id, target_date, start_time, end_time) for room_id in room_ids)
+
+    def _run_improvement_phase(self, exams, exam_dates, daily_schedules, time_budget_ms, allowed_dates=None):
+        """Improve greedy placements with local search for a bounded time"""
+        improver = LocalSearchImprover(self, exams, exam_dates, daily_schedules, time_budget_ms,
+                                       allowed_dates=allowed_dates)
+        improvement = improver.run()
+        logger.debug("Improvement phase: %s iterations, cost %s -> %s",
+                     improvement['iterations'], improvement['initial_cost'], improvement['final_cost'])
+        return improvement
+
+    def _get_candidate_rooms(self, exam):
+        """Get active rooms the exam may use, ignoring time availability"""
+        rooms = []
+        for room_name in getattr(exam, 'available_rooms', None) or []:
+            room = self._get_room_by_name(room_name)
+            if room and (room.has_computer or not exam.needs_computer):
+                rooms.append(room)
+        return rooms
+
+    def _schedule_with_solver(self, exams, exam_dates, daily_schedules, time_limit_seconds):
+        """Place exams with the exact solver and create their schedules"""
+        solver_result = ExactSolverService(self, time_limit_seconds).solve(exams, exam_dates)
+        if not solver_result['success']:
+            if not ExactSolverService.is_available():
+                return solver_result
+            # No solution in time: keep the request useful with the greedy schedule
+            logger.debug("%s; falling back to the greedy pass", solver_result['message'])
+            return self._schedule_greedy_fallback(exams, exam_dates, daily_schedules, solver_result['message'])
+
+        scheduled = []
+        failed = list(solver_result['failed'])
+        for exam, exam_date, start_time, end_time, rooms in solver_result['placements']:
+            if self._create_exam_schedule(exam, rooms, exam_date, start_time, end_time, daily_schedules):
+                scheduled.append((exam, exam_date))
+            else:
+                failed.append((exam, 'Could not create schedule'))
+
+        return {
+            'success': True,
+            'message': solver_result['message'],
+            'scheduled': scheduled,
+            'failed': failed
+        }
 
+    def _schedule_greedy_fallback(self, exams, exam_dates, daily_schedules, solver_message):
+        """Place exams one at a time after the exact solver gave up"""
+        scheduled = []
+        failed = []
+        for exam in exams:
+            scheduled_date, _, reason = self._place_exam_greedy(exam, exam_dates, daily_schedules)
+            if scheduled_date is None:
+                failed.append((exam, reason))
+            else:
+                scheduled.append((exam, scheduled_date))
+
+        return {
+            'success': True,
+            'message': f'{solver_message}; used the greedy schedule instead',
+            'scheduled': scheduled,
+            'failed': failed
+        }
+
+    def _try_schedule_exam_on_date(self, exam, target_date, daily_schedules):
+        """Try to schedule an exam on a specific date with flexible timing"""
+        # Try each rule-compliant start time; end times are precomputed by the grid
+        for start_time, end_time, _ in self.time_grid.candidates(target_date, exam.duration):
             # Check all constraints
             if not self._check_difficulty_level_rules(exam, target_date, daily_schedules):
                 continue
@@ -0,0 +1,138 @@
+import json
+import queue
+import time
+from collections import deque
+from threading import Lock
+
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from database import db
+
+
+class EventBroker:
+    """In-process publish/subscribe for the schedule event stream
+
+    Each subscriber gets a bounded queue; a subscriber that stops reading
+    is dropped instead of blocking publishers. The last events are kept so
+    a reconnecting client can resume from Last-Event-ID.
+    """
+
+    def __init__(self, history_size=256, queue_size=1000):
+        self.queue_size = queue_size
+        self._subscribers = []
+        self._history = deque(maxlen=history_size)
+        self._next_id = 1
+        self._lock = Lock()
+
+    def publish(self, event_type, data, replayable=True):
+        with self._lock:
+            message = (self._next_id, event_type, data)
+            self._next_id += 1
+            if replayable:
+                self._history.append(message)
+            for subscriber in list(self._subscribers):
+                try:
+                    subscriber.put_nowait(message)
+                except queue.Full:
+                    self._subscribers.remove(subscriber)
+
+    def subscribe(self, last_event_id=None):
+        """New subscriber queue, pre-filled with the events after last_event_id"""
+        subscriber = queue.Queue(maxsize=self.queue_size)
+        with self._lock:
+            if last_event_id is not None:
+                for message in self._history:
+                    if message[0] > last_event_id:
+                        subscriber.put_nowait(message)
+            self._subscribers.append(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            if subscriber in self._subscribers:
+                self._subscribers.remove(subscriber)
+
+    def has_subscribers(self):
+        return bool(self._subscribers)
+
+
+def get_event_broker():
+    """Event broker of the current app, created on first use"""
+    if 'event_broker' not in current_app.extensions:
+        current_app.extensions['event_broker'] = EventBroker()
+    return current_app.extensions['event_broker']
+
+def publish_event(event_type, data):
+    """Publish a progress event of a running scheduler right away
+
+    Progress events are not replayed on reconnect and are skipped when
+    nobody listens.
+    """
+    if has_app_context():
+        broker = get_event_broker()
+        if broker.has_subscribers():
+            broker.publish(event_type, data, replayable=False)
+
+def queue_schedule_event(event_type, data):
+    """Publish once the current transaction commits (schedule deltas)"""
+    db.session.info.setdefault('pending_schedule_events', []).append((event_type, data))
+
+def format_sse(message):
+    event_id, event_type, data = message
+    return f"id: {event_id}\nevent: {event_type}\ndata: {json.dumps(data)}\n\n"
+
+def event_stream(broker, subscriber, department_id=None, keepalive_seconds=15):
+    """SSE body for one subscriber, optionally limited to one department's events"""
+    try:
+        yield 'retry: 3000\n\n'
+        while True:
+            try:
+                message = subscriber.get(timeout=keepalive_seconds)
+            except queue.Empty:
+                # Comment lines keep proxies from closing an idle stream
+                yield f': keepalive {int(time.time())}\n\n'
+                continue
+            event_department_id = message[2].get('department_id')
+            if department_id is not None and event_department_id is not None and event_department_id != department_id:
+                continue
+            yield format_sse(message)
+    finally:
+        broker.unsubscribe(subscriber)
+
+def deleted_schedule_delta(schedule, department_id):
+    """Compact payload of a deleted schedule"""
+    return {
+        'id': schedule.id,
+        'exam_id': schedule.exam_id,
+        'department_id': department_id,
+        'date': schedule.scheduled_date.strftime('%d/%m/%Y')
+    }
+
+def schedule_delta(schedule, department_id):
+    """Compact payload of a created or moved schedule, grouped like /api/schedule"""
+    return {
+        'id': schedule.id,
+        'exam_id': schedule.exam_id,
+        'department_id': department_id,
+        'date': schedule.scheduled_date.strftime('%d/%m/%Y'),
+        'scheduled_date': schedule.scheduled_date.isoformat(),
+        'start_time': schedule.start_time.isoformat(),
+        'end_time': schedule.end_time.isoformat(),
+        'room_id': schedule.room_id,
+        'additional_rooms': schedule.additional_rooms
+    }
+
+
+@event.listens_for(Session, 'after_commit')
+def _publish_committed_events(session):
+    events = session.info.pop('pending_schedule_events', None)
+    if events and has_app_context():
+        broker = get_event_broker()
+        for event_type, data in events:
+            broker.publish(event_type, data)
+
+@event.listens_for(Session, 'after_rollback')
+def _drop_rolled_back_events(session):
+    session.info.pop('pending_schedule_events', None)
@@ -0,0 +1,215 @@
+from datetime import date, datetime
+
+from utils.time_grid import minutes_to_time, time_to_minutes
+
+try:
+    from ortools.sat.python import cp_model
+except ImportError:  # Optional dependency, only needed for solver='cpsat'
+    cp_model = None
+
+
+class ExactSolverService:
+    """Full-week exam timetabling with the OR-Tools CP-SAT solver
+
+    Hard rules (see SCHEDULING_RULES.md), as the calling scheduler applies them:
+    - dates and start times from the scheduler's _candidate_dates/_candidate_slots
+      (working hours, lunch break, Friday prayer)
+    - 15-minute gap between exams on the same day (enforces_time_gap)
+    - same class level exams never overlap (enforces_class_level_conflicts)
+    - a hard exam is the only exam on its day
+    - enough seats across at most max_rooms_per_exam rooms, computer rooms when required
+    - rooms already used by existing schedules stay blocked
+
+    The objective places as many exams as possible, then prefers preferred
+    dates, then fewer rooms per exam.
+    """
+
+    SCHEDULED_WEIGHT = 1000
+    PREFERRED_DATE_WEIGHT = 10
+    ROOM_WEIGHT = 1
+
+    def __init__(self, scheduler, time_limit_seconds=30):
+        # The calling scheduler provides the time grid, room occupancy and room lookup
+        self.scheduler = scheduler
+        self.time_limit_seconds = time_limit_seconds
+
+    @staticmethod
+    def is_available():
+        """Check if the solver library is installed"""
+        return cp_model is not None
+
+    def solve(self, exams, exam_dates):
+        """Solve the week and return placements for the given exams"""
+        if not self.is_available():
+            return {
+                'success': False,
+                'message': 'CP-SAT solver is not installed. Install it with: pip install ortools',
+                'placements': [],
+                'failed': [(exam, 'Solver not available') for exam in exams]
+            }
+
+        model = cp_model.CpModel()
+        scheduler = self.scheduler
+        gap = scheduler.time_grid.gap_minutes
+        max_rooms = scheduler.max_rooms_per_exam
+
+        placed = {}          # exam.id -> BoolVar
+        day_vars = {}        # (exam.id, date) -> (BoolVar, start IntVar)
+        room_vars = {}       # (exam.id, room.id) -> BoolVar
+        rooms_by_id = {}
+        day_intervals = {}   # date -> intervals widened by the gap
+        level_intervals = {}  # (date, class level) -> intervals
+        room_intervals = {}  # (room.id, date) -> intervals
+        objective = []
+        failed = []
+
+        for exam in exams:
+            rooms = scheduler._get_candidate_rooms(exam)
+            if not rooms:
+                failed.append((exam, 'No suitable rooms available'))
+                continue
+            capacities = sorted((room.capacity for room in rooms), reverse=True)
+            if sum(capacities[:max_rooms]) < exam.student_count:
+                failed.append((exam, 'Not enough capacity in available rooms'))
+                continue
+
+            preferred = self._parse_preferred_dates(exam)
+            is_placed = model.NewBoolVar(f'placed_{exam.id}')
+            placed[exam.id] = is_placed
+            objective.append(self.SCHEDULED_WEIGHT * is_placed)
+
+            on_days = []
+            for exam_date in scheduler._candidate_dates(exam, exam_dates):
+                starts = [time_to_minutes(start) for start, _ in scheduler._candidate_slots(exam, exam_date)]
+                if not starts:
+                    continue
+
+                on_day = model.NewBoolVar(f'day_{exam.id}_{exam_date}')
+                start = model.NewIntVarFromDomain(cp_model.Domain.FromValues(starts), f'start_{exam.id}_{exam_date}')
+                day_vars[(exam.id, exam_date)] = (on_day, start)
+                on_days.append(on_day)
+
+                if scheduler.enforces_time_gap:
+                    # Exam widened by the gap must not overlap any other exam that day
+                    padded_end = model.NewIntVar(0, 2 * 24 * 60, '')
+                    day_intervals.setdefault(exam_date, []).append(
+                        model.NewOptionalIntervalVar(start, exam.duration + gap, padded_end, on_day, ''))
+
+                if scheduler.enforces_class_level_conflicts:
+                    end = model.NewIntVar(0, 2 * 24 * 60, '')
+                    level_intervals.setdefault((exam_date, exam.class_name), []).append(
+                        model.NewOptionalIntervalVar(start, exam.duration, end, on_day, ''))
+
+                if exam_date in preferred:
+                    objective.append(self.PREFERRED_DATE_WEIGHT * on_day)
+
+            model.Add(sum(on_days) == is_placed)
+
+            # Room set must seat every student
+            uses = []
+            for room in rooms:
+                rooms_by_id[room.id] = room
+                uses_room = model.NewBoolVar(f'room_{exam.id}_{room.id}')
+                room_vars[(exam.id, room.id)] = uses_room
+                uses.append((room, uses_room))
+                model.AddImplication(uses_room, is_placed)
+                objective.append(-self.ROOM_WEIGHT * uses_room)
+            model.Add(sum(room.capacity * uses_room for room, uses_room in uses) >=
+                      exam.student_count * is_placed)
+            if max_rooms:
+                model.Add(sum(uses_room for _, uses_room in uses) <= max_rooms)
+
+            # Room is occupied on a date only if both the date and the room are chosen
+            for exam_date in exam_dates:
+                if (exam.id, exam_date) not in day_vars:
+                    continue
+                on_day, start = day_vars[(exam.id, exam_date)]
+                for room, uses_room in uses:
+                    in_room = model.NewBoolVar('')
+                    model.AddBoolAnd([on_day, uses_room]).OnlyEnforceIf(in_room)
+                    model.AddBoolOr([on_day.Not(), uses_room.Not()]).OnlyEnforceIf(in_room.Not())
+                    end = model.NewIntVar(0, 2 * 24 * 60, '')
+                    room_intervals.setdefault((room.id, exam_date), []).append(
+                        model.NewOptionalIntervalVar(start, exam.duration, end, in_room, ''))
+
+        # Existing schedules keep their rooms
+        for (room_id, exam_date), intervals in room_intervals.items():
+            for busy_start, busy_end in scheduler.room_occupancy.busy_intervals(room_id, exam_date):
+                intervals.append(model.NewIntervalVar(busy_start, busy_end - busy_start, busy_end, ''))
+            model.AddNoOverlap(intervals)
+
+        for intervals in day_intervals.values():
+            model.AddNoOverlap(intervals)
+        for intervals in level_intervals.values():
+            model.AddNoOverlap(intervals)
+
+        # A hard exam is the only exam on its day
+        for exam_date in exam_dates:
+            exams_on_day = [(exam, day_vars[(exam.id, exam_date)][0])
+                            for exam in exams if (exam.id, exam_date) in day_vars]
+            for exam, on_day in exams_on_day:
+                if self._normalize_difficulty(exam) != 'hard':
+                    continue
+                others = [other_day for other, other_day in exams_on_day if other.id != exam.id]
+                if others:
+                    model.Add(sum(others) == 0).OnlyEnforceIf(on_day)
+
+        model.Maximize(sum(objective))
+
+        solver = cp_model.CpSolver()
+        solver.parameters.max_time_in_seconds = self.time_limit_seconds
+        status = solver.Solve(model)
+
+        if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            return {
+                'success': False,
+                'message': f'Solver found no schedule within {self.time_limit_seconds}s ({solver.StatusName(status)})',
+                'placements': [],
+                'failed': [(exam, 'Solver found no schedule') for exam in exams]
+            }
+
+        placements = []
+        for exam in exams:
+            if exam.id not in placed:
+                continue
+            if not solver.Value(placed[exam.id]):
+                failed.append((exam, 'No suitable time slot found that satisfies all constraints'))
+                continue
+
+            for exam_date in exam_dates:
+                if (exam.id, exam_date) in day_vars and solver.Value(day_vars[(exam.id, exam_date)][0]):
+                    start_minutes = solver.Value(day_vars[(exam.id, exam_date)][1])
+                    break
+
+            rooms = [rooms_by_id[room_id] for (exam_id, room_id), uses_room in room_vars.items()
+                     if exam_id == exam.id and solver.Value(uses_room)]
+            # Primary room is the largest one, as in the greedy scheduler
+            rooms.sort(key=lambda r: r.capacity, reverse=True)
+
+            placements.append((exam, exam_date, minutes_to_time(start_minutes),
+                               minutes_to_time(start_minutes + exam.duration), rooms))
+
+        return {
+            'success': True,
+            'message': f'Solver status: {solver.StatusName(status)}',
+            'placements': placements,
+            'failed': failed
+        }
+
+    def _parse_preferred_dates(self, exam):
+        """Get preferred dates as date objects"""
+        preferred = set()
+        for pref_date in getattr(exam, 'preferred_dates', None) or []:
+            if isinstance(pref_date, date):
+                preferred.add(pref_date)
+                continue
+            try:
+                preferred.add(datetime.strptime(pref_date, '%Y-%m-%d').date())
+            except (ValueError, TypeError):
+                continue
+        return preferred
+
+    def _normalize_difficulty(self, exam):
+        """Map old difficulty levels to the new system"""
+        difficulty = getattr(exam, 'difficulty_level', 'normal') or 'normal'
+        return 'hard' if difficulty == 'very_hard' else difficulty
@@ -1,11 +1,34 @@
+import hashlib
+import itertools
+import json
+import logging
 import re
+import uuid
+import zipfile
 from datetime import date, datetime
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, Iterator, List, Set, Tuple
 
+import numpy as np
 import pandas as pd
 from database import db
 from flask import current_app
-from models import Course, Department, Exam, Room
+from models import Course, Department, Exam, ExcelImport, Room
+from openpyxl import load_workbook
+from openpyxl.utils.exceptions import InvalidFileException
+from services.room_registry import get_room_registry
+from sqlalchemy import insert, update
+
+logger = logging.getLogger(__name__)
+
+# Cell texts pd.read_excel reads as missing by default
+EXCEL_NA_VALUES = {
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+    '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null'
+}
+
+
+class ExcelReadError(ValueError):
+    """The upload is not a readable Excel workbook"""
 
 
 class ExcelService:
@@ -26,55 +49,60 @@ class ExcelService:
             'Bilgisayar Gerekli mi?',
             'Kullanılabilir Derslikler'
         ]
+        self.valid_difficulties = ['kolay', 'orta', 'zor', 'easy', 'normal', 'hard', 'medium']
 
     
-    def process_excel_file(self, file_path: str, department_id: int, session_id: str = None) -> Dict[str, Any]:
-        """Process Excel file and create exams"""
+    def process_excel_file(self, source: Any, department_id: int, session_id: str = None,
+                           chunk_size: int = None, rows: Set[int] = None) -> Dict[str, Any]:
+        """Process Excel file and create exams
+
+        source is a path or a binary file object. The first sheet is streamed in
+        chunks; each chunk is validated, parsed and written with a fixed number of
+        set-based statements. After the first invalid row nothing more is written
+        (the caller rolls back), but the rest is still validated to count errors.
+        With rows (0-based row positions), only those rows are imported.
+        """
         try:
-            # Read Excel file
-            df = pd.read_excel(file_path)
-            
+            chunks = self.read_excel_chunks(source, chunk_size)
+            first_chunk = next(chunks)
+
             # Validate columns
-            validation_result = self._validate_columns(df)
+            validation_result = self._validate_header(first_chunk.columns)
             if not validation_result['valid']:
                 return validation_result
-            
+            warnings = validation_result['warnings']
+
             # Process each row
             results = {
                 'success': True,
-                'total_rows': len(df),
+                'total_rows': 0,
                 'processed': 0,
                 'failed': 0,
                 'errors': [],
                 'created_exams': []
             }
-            
-            for index, row in df.iterrows():
-                try:
-                    print(f"DEBUG: Processing row {index + 1}: {dict(row)}")
-                    exam_data = self._process_row(row, department_id, index + 1, session_id)
-                    if exam_data:
-                        print(f"DEBUG: Creating exam for {exam_data['_course_code']}")
-                        exam = self._create_exam(exam_data)
-                        results['created_exams'].append({
-                            'id': exam.id,
-                            'course_code': exam_data['_course_code'],
-                            'instructor': exam_data['instructor'],
-                            'difficulty': exam_data['difficulty_level']
-                        })
-                        results['processed'] += 1
-                        print(f"DEBUG: Successfully processed exam {exam.id}")
-                    else:
-                        results['failed'] += 1
-                        print(f"DEBUG: No exam data returned for row {index + 1}")
-
-                except Exception as e:
-                    results['failed'] += 1
-                    results['errors'].append(f"Row {index + 1}: {str(e)}")
-                    print(f"DEBUG: Error processing row {index + 1}: {str(e)}")
-                    import traceback
-                    print(f"DEBUG: Traceback: {traceback.format_exc()}")
-            
+
+            # Exams of this upload are found again by their session ID after the bulk insert
+            session_id = session_id or str(uuid.uuid4())
+
+            error_count = 0
+            errors = []
+            for chunk in itertools.chain([first_chunk], chunks):
+                results['total_rows'] += len(chunk)
+                chunk_error_count, chunk_errors = self._row_errors(chunk, limit=10 - len(errors))
+                error_count += chunk_error_count
+                errors.extend(chunk_errors)
+                if not error_count:
+                    if rows is not None:
+                        chunk = chunk[chunk.index.isin(rows)]
+                    self._import_chunk(chunk, department_id, session_id, results)
+
+            if results['total_rows'] == 0:
+                return self._empty_file_result()
+            if error_count:
+                return self._data_error_result(error_count, errors, warnings)
+
+            logger.debug("Created %s exams, %s rows failed", results['processed'], results['failed'])
             return results
             
         except Exception as e:
@@ -82,13 +110,232 @@ class ExcelService:
                 'success': False,
                 'message': f'Excel processing error: {str(e)}'
             }
-    
+
+    def _import_chunk(self, chunk: pd.DataFrame, department_id: int, session_id: str, results: Dict[str, Any]):
+        """Parse the rows of a valid chunk and write its rooms, courses and exams in bulk"""
+        exam_rows = []
+        for index, row in zip(chunk.index, chunk.to_dict('records')):
+            try:
+                exam_data = self._process_row(row, department_id, index + 1, session_id)
+                exam_data['_row'] = index + 1
+                exam_rows.append(exam_data)
+            except Exception as e:
+                results['failed'] += 1
+                results['errors'].append(f"Row {index + 1}: {str(e)}")
+                logger.debug("Error processing row %s: %s", index + 1, e)
+
+        if not exam_rows:
+            return
+
+        self._ensure_rooms_exist([room for exam_data in exam_rows for room in exam_data['available_rooms']], department_id)
+        course_ids = self._find_or_create_courses(exam_rows, department_id)
+        for exam_data in exam_rows:
+            exam_data['course_id'] = course_ids[(exam_data['_course_code'], exam_data['_class_level'])]
+
+        exam_ids = self._create_exams(exam_rows, session_id)
+        for exam_id, exam_data in zip(exam_ids, exam_rows):
+            results['created_exams'].append({
+                'id': exam_id,
+                'row': exam_data['_row'],
+                'course_code': exam_data['_course_code'],
+                'instructor': exam_data['instructor'],
+                'difficulty': exam_data['difficulty_level']
+            })
+        results['processed'] += len(exam_ids)
+
+    def validate_excel_file(self, source: Any, fail_fast: bool = False, chunk_size: int = None,
+                            fingerprint: bool = False) -> Dict[str, Any]:
+        """Validate an Excel file without processing
+
+        With fail_fast, reading stops after the chunk holding the first invalid
+        row, and the error count covers the rows read so far. With fingerprint,
+        a valid result also carries row_hashes (one per row, in order) and
+        content_hash, which ignores row order.
+        """
+        chunks = self.read_excel_chunks(source, chunk_size)
+        try:
+            first_chunk = next(chunks)
+        except ExcelReadError as e:
+            return self._unreadable_file_result(e)
+
+        validation_result = self._validate_header(first_chunk.columns)
+        if not validation_result['valid']:
+            return validation_result
+
+        total_rows = 0
+        error_count = 0
+        errors = []
+        stopped_early = False
+        row_hashes = []
+        for chunk in itertools.chain([first_chunk], chunks):
+            total_rows += len(chunk)
+            chunk_error_count, chunk_errors = self._row_errors(chunk, limit=10 - len(errors))
+            error_count += chunk_error_count
+            errors.extend(chunk_errors)
+            if fingerprint and not error_count:
+                row_hashes.extend(self._row_hashes(chunk))
+            if error_count and fail_fast:
+                stopped_early = True
+                break
+
+        if total_rows == 0:
+            return self._empty_file_result()
+        if error_count:
+            result = self._data_error_result(error_count, errors, validation_result['warnings'])
+            if stopped_early:
+                result['rows_checked'] = total_rows
+            return result
+
+        validation_result.update({
+            'total_rows': total_rows,
+            'columns_found': list(first_chunk.columns),
+            'sample_data': first_chunk.head(3).to_dict('records')
+        })
+        if fingerprint:
+            validation_result['row_hashes'] = row_hashes
+            validation_result['content_hash'] = hashlib.sha256('\n'.join(sorted(row_hashes)).encode()).hexdigest()
+        return validation_result
+
+    def _row_hashes(self, chunk: pd.DataFrame) -> List[str]:
+        """SHA-256 of each row's required cells, normalized so cosmetic differences do not count"""
+        hashes = []
+        for row in chunk[self.required_columns].to_dict('records'):
+            values = [self._normalized_cell(row[column]) for column in self.required_columns]
+            hashes.append(hashlib.sha256(json.dumps(values, default=str).encode()).hexdigest())
+        return hashes
+
+    def _normalized_cell(self, value: Any) -> Any:
+        """Cell value with blanks as None, text trimmed and numbers in one canonical form
+
+        Each chunk infers its own dtypes, so the same cell may arrive as '101',
+        101 or 101.0 (and a boolean as 1); all of them must hash alike.
+        """
+        if isinstance(value, str):
+            text = value.strip()
+            try:
+                return int(text)
+            except ValueError:
+                pass
+            try:
+                value = float(text)
+            except ValueError:
+                return text
+            if not np.isfinite(value):
+                return text
+        if pd.isna(value):
+            return None
+        if isinstance(value, (datetime, date)):
+            return value.isoformat()
+        if isinstance(value, (bool, np.bool_, int, np.integer)):
+            return int(value)
+        if isinstance(value, (float, np.floating)):
+            return int(value) if float(value).is_integer() else float(value)
+        return value
+
+    def read_excel_chunks(self, source: Any, chunk_size: int = None) -> Iterator[pd.DataFrame]:
+        """Stream the first sheet as DataFrames of at most chunk_size rows
+
+        Uses openpyxl in read-only mode, so the workbook is never held in memory
+        as a whole. The header row names the columns and the index runs on across
+        chunks, as in a single pd.read_excel frame. Cells keep openpyxl's types;
+        empty cells and pandas' default NA strings become NaN, and trailing empty
+        rows are dropped. At least one (possibly empty) chunk is yielded.
+        """
+        chunk_size = chunk_size or current_app.config.get('EXCEL_CHUNK_ROWS', 1000)
+        try:
+            workbook = load_workbook(source, read_only=True, data_only=True)
+        except (InvalidFileException, zipfile.BadZipFile):
+            # Not an .xlsx workbook (e.g. legacy .xls); let pandas pick an engine
+            if hasattr(source, 'seek'):
+                source.seek(0)
+            try:
+                frame = pd.read_excel(source)
+            except (ValueError, ImportError, OSError, zipfile.BadZipFile) as e:
+                raise ExcelReadError(str(e)) from e
+            yield frame
+            return
+        except (KeyError, ValueError, OSError) as e:
+            # A zip file that is not a complete workbook
+            raise ExcelReadError(str(e)) from e
+
+        try:
+            rows = workbook.worksheets[0].iter_rows(values_only=True)
+            header = list(next(rows, None) or [])
+            while header and header[-1] is None:
+                header.pop()
+            columns = []
+            for i, name in enumerate(header):
+                name = name if name is not None else f'Unnamed: {i}'
+                # Repeated names get a .1, .2 ... suffix
+                base, count = name, 0
+                while name in columns:
+                    count += 1
+                    name = f'{base}.{count}'
+                columns.append(name)
+
+            offset = 0
+            chunk = []
+            empty_rows = []
+            for row in rows:
+                values = [self._cell_value(value) for value in row[:len(columns)]]
+                values.extend([np.nan] * (len(columns) - len(values)))
+                if all(value is np.nan for value in values):
+                    # Kept only if a non-empty row follows
+                    empty_rows.append(values)
+                    continue
+                chunk.extend(empty_rows)
+                empty_rows = []
+                chunk.append(values)
+                if len(chunk) >= chunk_size:
+                    yield self._chunk_frame(chunk, columns, offset)
+                    offset += len(chunk)
+                    chunk = []
+
+            if chunk or offset == 0:
+                yield self._chunk_frame(chunk, columns, offset)
+        finally:
+            workbook.close()
+
+    def _chunk_frame(self, rows: List[List[Any]], columns: List[Any], offset: int) -> pd.DataFrame:
+        """DataFrame of a chunk, with text columns that are all numbers converted as pandas does"""
+        df = pd.DataFrame(rows, columns=columns, index=pd.RangeIndex(offset, offset + len(rows)))
+        for position, dtype in enumerate(df.dtypes):
+            if pd.api.types.is_string_dtype(dtype):
+                try:
+                    df.isetitem(position, pd.to_numeric(df.iloc[:, position]))
+                except (ValueError, TypeError):
+                    pass
+        return df
+
+    def _cell_value(self, value: Any) -> Any:
+        """A cell value as pd.read_excel would give it"""
+        if value is None or (isinstance(value, str) and value in EXCEL_NA_VALUES):
+            return np.nan
+        if isinstance(value, float) and value.is_integer():
+            return int(value)
+        return value
+
     def _validate_columns(self, df: pd.DataFrame) -> Dict[str, Any]:
         """Validate Excel columns and data"""
-        # Check for missing columns
+        validation_result = self._validate_header(df.columns)
+        if not validation_result['valid']:
+            return validation_result
+
+        # Check if file is empty
+        if len(df) == 0:
+            return self._empty_file_result()
+
+        error_count, errors = self._row_errors(df)
+        if error_count:
+            return self._data_error_result(error_count, errors, validation_result['warnings'])
+
+        return validation_result
+
+    def _validate_header(self, columns: List[Any]) -> Dict[str, Any]:
+        """Check for missing columns and warn about extra ones"""
         missing_columns = []
         for col in self.required_columns:
-            if col not in df.columns:
+            if col not in columns:
                 missing_columns.append(col)
 
         if missing_columns:
@@ -99,80 +346,102 @@ class ExcelService:
                 'details': f'Excel dosyanızda şu sütunlar eksik: {", ".join(missing_columns)}. Lütfen template dosyasını indirip doğru formatı kullanın.'
             }
 
-        # Check if file is empty
-        if len(df) == 0:
-            return {
-                'success': False,
-                'valid': False,
-                'message': '❌ Excel dosyası boş!',
-                'details': 'Excel dosyanızda hiç veri yok. Lütfen sınav verilerini ekleyip tekrar deneyin.'
-            }
-
         # Check for extra columns (warning)
-        extra_columns = [col for col in df.columns if col not in self.required_columns]
+        extra_columns = [col for col in columns if col not in self.required_columns]
         warnings = []
         if extra_columns:
-            warnings.append(f'⚠️ Fazla sütunlar göz ardı edilecek: {", ".join(extra_columns)}')
-
-        # Basic data validation
-        errors = []
-        for index, row in df.iterrows():
-            row_num = index + 1
+            warnings.append(f'⚠️ Fazla sütunlar göz ardı edilecek: {", ".join(str(col) for col in extra_columns)}')
 
-            # Check for empty critical fields
-            if pd.isna(row.get('Ders Kodu', '')) or str(row.get('Ders Kodu', '')).strip() == '':
-                errors.append(f'Satır {row_num}: Ders Kodu boş olamaz')
-
-            if pd.isna(row.get('Ders Adı', '')) or str(row.get('Ders Adı', '')).strip() == '':
-                errors.append(f'Satır {row_num}: Ders Adı boş olamaz')
-
-            if pd.isna(row.get('Öğretim Üyesi', '')) or str(row.get('Öğretim Üyesi', '')).strip() == '':
-                errors.append(f'Satır {row_num}: Öğretim Üyesi boş olamaz')
-
-            # Check difficulty level
-            difficulty_input = str(row.get('Sınav Zorluğu', '')).strip().lower()
-            valid_difficulties = ['kolay', 'orta', 'zor', 'easy', 'normal', 'hard', 'medium']
-            if not difficulty_input or difficulty_input not in valid_difficulties:
-                errors.append(f'Satır {row_num}: Sınav Zorluğu "Kolay", "Orta" veya "Zor" olmalı')
-
-            # Check numeric fields
-            try:
-                class_level = int(row.get('Sınıf Seviyesi', 0))
-                if class_level < 1 or class_level > 4:
-                    errors.append(f'Satır {row_num}: Sınıf Seviyesi 1-4 arasında olmalı')
-            except (ValueError, TypeError):
-                errors.append(f'Satır {row_num}: Sınıf Seviyesi sayı olmalı')
-
-            try:
-                student_count = int(row.get('Öğrenci Sayısı', 0))
-                if student_count <= 0:
-                    errors.append(f'Satır {row_num}: Öğrenci Sayısı 0\'dan büyük olmalı')
-            except (ValueError, TypeError):
-                errors.append(f'Satır {row_num}: Öğrenci Sayısı sayı olmalı')
+        return {
+            'valid': True,
+            'warnings': warnings
+        }
 
-            try:
-                duration = int(row.get('Sınav Süresi (dakika)', 0))
-                if duration <= 0:
-                    errors.append(f'Satır {row_num}: Sınav Süresi 0\'dan büyük olmalı')
-            except (ValueError, TypeError):
-                errors.append(f'Satır {row_num}: Sınav Süresi sayı olmalı')
+    def _unreadable_file_result(self, error: Exception) -> Dict[str, Any]:
+        return {
+            'success': False,
+            'valid': False,
+            'message': '❌ Excel dosyası okunamadı!',
+            'details': f'Dosya geçerli bir Excel dosyası değil ({error}). Lütfen .xlsx veya .xls dosyası yükleyin.'
+        }
 
-        if errors:
-            return {
-                'success': False,
-                'valid': False,
-                'message': f'❌ {len(errors)} veri hatası bulundu',
-                'details': '\n'.join(errors[:10]) + ('\n... ve daha fazlası' if len(errors) > 10 else ''),
-                'warnings': warnings
-            }
+    def _empty_file_result(self) -> Dict[str, Any]:
+        return {
+            'success': False,
+            'valid': False,
+            'message': '❌ Excel dosyası boş!',
+            'details': 'Excel dosyanızda hiç veri yok. Lütfen sınav verilerini ekleyip tekrar deneyin.'
+        }
 
+    def _data_error_result(self, error_count: int, errors: List[str], warnings: List[str]) -> Dict[str, Any]:
         return {
-            'valid': True,
+            'success': False,
+            'valid': False,
+            'message': f'❌ {error_count} veri hatası bulundu',
+            'details': '\n'.join(errors[:10]) + ('\n... ve daha fazlası' if error_count > 10 else ''),
             'warnings': warnings
         }
-    
-    def _process_row(self, row: pd.Series, department_id: int, row_number: int, session_id: str = None) -> Dict[str, Any]:
-        """Process a single Excel row"""
+
+    def _row_errors(self, df: pd.DataFrame, limit: int = 10) -> Tuple[int, List[str]]:
+        """Number of data errors in the rows and the first `limit` messages, in row order"""
+        if len(df) == 0:
+            return 0, []
+
+        # Column-wise data validation; each check is a mask over the rows it rejects
+        checks = []
+        for column in ['Ders Kodu', 'Ders Adı', 'Öğretim Üyesi']:
+            checks.append([(self._blank_mask(df[column]), f'{column} boş olamaz')])
+
+        difficulty_input = df['Sınav Zorluğu'].astype(str).str.strip().str.lower()
+        checks.append([(~difficulty_input.isin(self.valid_difficulties), 'Sınav Zorluğu "Kolay", "Orta" veya "Zor" olmalı')])
+
+        for column, label, minimum, maximum, range_message in [
+            ('Sınıf Seviyesi', 'Sınıf Seviyesi', 1, 4, 'Sınıf Seviyesi 1-4 arasında olmalı'),
+            ('Öğrenci Sayısı', 'Öğrenci Sayısı', 1, None, 'Öğrenci Sayısı 0\'dan büyük olmalı'),
+            ('Sınav Süresi (dakika)', 'Sınav Süresi', 1, None, 'Sınav Süresi 0\'dan büyük olmalı')
+        ]:
+            values, not_integer = self._integer_values(df[column])
+            out_of_range = values < minimum
+            if maximum is not None:
+                out_of_range |= values > maximum
+            checks.append([(not_integer, f'{label} sayı olmalı'), (~not_integer & out_of_range, range_message)])
+
+        # Row-major order, checks in the order above, as a row-by-row walk would report them
+        positions = []
+        messages = []
+        for check_index, check in enumerate(checks):
+            for mask, message in check:
+                rows = np.flatnonzero(mask.to_numpy(dtype=bool))
+                positions.append(rows * len(checks) + check_index)
+                messages.extend([message] * len(rows))
+        positions = np.concatenate(positions)
+        order = np.argsort(positions, kind='stable')
+
+        row_numbers = df.index + 1
+        errors = [f'Satır {row_numbers[positions[i] // len(checks)]}: {messages[i]}' for i in order[:max(limit, 0)]]
+        return len(order), errors
+
+    def _blank_mask(self, column: pd.Series) -> pd.Series:
+        """Cells that are missing or only whitespace"""
+        return column.isna() | column.astype(str).str.strip().eq('')
+
+    def _integer_values(self, column: pd.Series) -> Tuple[pd.Series, pd.Series]:
+        """Vectorized int(): truncated values and a mask of the cells int() would reject"""
+        numeric = pd.to_numeric(column, errors='coerce')
+        not_integer = numeric.isna() | np.isinf(numeric)
+
+        # int() takes integer literals only, so text like "3.0" is rejected too
+        try:
+            literal = column.str.fullmatch(r'\s*[+-]?\d+\s*')
+        except AttributeError:
+            literal = None  # no text cells
+        if literal is not None:
+            not_integer |= literal.notna() & ~literal.astype('boolean').fillna(False).astype(bool)
+
+        return np.trunc(numeric.where(~not_integer, 0)), not_integer
+
+    def _process_row(self, row: Dict[str, Any], department_id: int, row_number: int, session_id: str = None) -> Dict[str, Any]:
+        """Parse a single Excel row into exam data, without touching the database"""
         try:
             # Extract basic data
             class_level = int(row['Sınıf Seviyesi'])
@@ -203,14 +472,7 @@ class ExcelService:
             # Process available rooms
             available_rooms = self._parse_rooms(row['Kullanılabilir Derslikler'])
 
-            # Ensure rooms exist in database
-            self._ensure_rooms_exist(available_rooms, department_id)
-
-            # Find or create course
-            course = self._find_or_create_course(course_code, course_name, class_level, department_id)
-            
             return {
-                'course_id': course.id,
                 'instructor': instructor,
                 'student_count': student_count,
                 'duration': duration,
@@ -221,8 +483,10 @@ class ExcelService:
                 'difficulty_level': difficulty_level,
                 'status': 'pending',
                 'exam_session_id': session_id,
-                # Store course_code for later use (not in Exam model)
-                '_course_code': course_code
+                # Course fields, resolved to course_id in bulk (not in Exam model)
+                '_course_code': course_code,
+                '_course_name': course_name,
+                '_class_level': class_level
             }
             
         except Exception as e:
@@ -277,97 +541,201 @@ class ExcelService:
         return [room.strip() for room in rooms if room.strip()]
 
     def _ensure_rooms_exist(self, room_names: List[str], department_id: int):
-        """Ensure rooms exist in database, create if missing"""
-        for room_name in room_names:
-            if not room_name:
-                continue
-
-            # Check if room already exists
-            existing_room = Room.query.filter_by(
-                name=room_name,
-                department_id=department_id
-            ).first()
-
-            if not existing_room:
-                # Determine room properties based on name patterns
-                has_computer = any(pattern in room_name.upper() for pattern in ['LAB', 'Z09', 'D108'])
-
-                # Estimate capacity based on room name patterns
-                capacity = 30  # Default
-                if 'D112' in room_name:
-                    capacity = 42
-                elif 'D114' in room_name:
-                    capacity = 29
-                elif 'D115' in room_name:
-                    capacity = 29
-                elif 'D117' in room_name:
-                    capacity = 40
-                elif 'D113' in room_name:
-                    capacity = 23
-                elif 'A401' in room_name:
-                    capacity = 52
-                elif 'D111' in room_name:
-                    capacity = 42
-                elif 'D108' in room_name:
-                    capacity = 30
-                elif 'D109' in room_name:
-                    capacity = 30
-                elif 'Z09' in room_name:
-                    capacity = 54
-
-                # Create room
-                room = Room(
-                    name=room_name,
-                    capacity=capacity,
-                    has_computer=has_computer,
-                    department_id=department_id,
-                    is_active=True
-                )
-                db.session.add(room)
-                print(f"DEBUG: Created room {room_name} (capacity: {capacity}, computer: {has_computer})")
-
-        db.session.flush()  # Ensure rooms are created before continuing
-    
-    def _find_or_create_course(self, course_code: str, course_name: str, class_level: int, department_id: int) -> Course:
-        """Find existing course or create new one"""
-        course = Course.query.filter_by(
-            code=course_code,
-            class_level=class_level,
-            department_id=department_id
-        ).first()
-
-        if not course:
-            # Create new course with provided name
-            course = Course(
-                name=course_name,
-                code=course_code,
-                credits=3,  # Default credits
-                class_level=class_level,
-                department_id=department_id,
-                is_active=True
-            )
-            db.session.add(course)
-            db.session.flush()  # Get ID without committing
-        else:
-            # Update course name if it's different
-            if course.name != course_name:
-                course.name = course_name
-
-        return course
+        """Ensure rooms exist in database, creating the missing ones with one bulk insert"""
+        registry = get_room_registry()
+        missing = [room_name for room_name in dict.fromkeys(room_names)
+                   if room_name and not registry.find(room_name, department_id)]
+        if not missing:
+            return
+
+        new_rooms = []
+        for room_name in missing:
+            capacity, has_computer = self._estimate_room(room_name)
+            new_rooms.append({
+                'name': room_name,
+                'capacity': capacity,
+                'has_computer': has_computer,
+                'department_id': department_id,
+                'is_active': True
+            })
+        db.session.execute(insert(Room), new_rooms)
+        logger.debug("Created %s rooms: %s", len(new_rooms), ', '.join(missing))
+
+        # Later lookups and the scheduler see the new rooms without reloading
+        for room in Room.query.filter(Room.department_id == department_id, Room.name.in_(missing)).order_by(Room.id):
+            if not registry.find(room.name, department_id):
+                registry.register(room)
+
+    def _estimate_room(self, room_name: str) -> Tuple[int, bool]:
+        """Capacity and computer availability of a new room, guessed from its name"""
+        has_computer = any(pattern in room_name.upper() for pattern in ['LAB', 'Z09', 'D108'])
+
+        # Estimate capacity based on room name patterns
+        capacity = 30  # Default
+        if 'D112' in room_name:
+            capacity = 42
+        elif 'D114' in room_name:
+            capacity = 29
+        elif 'D115' in room_name:
+            capacity = 29
+        elif 'D117' in room_name:
+            capacity = 40
+        elif 'D113' in room_name:
+            capacity = 23
+        elif 'A401' in room_name:
+            capacity = 52
+        elif 'D111' in room_name:
+            capacity = 42
+        elif 'D108' in room_name:
+            capacity = 30
+        elif 'D109' in room_name:
+            capacity = 30
+        elif 'Z09' in room_name:
+            capacity = 54
+
+        return capacity, has_computer
+
+    def _find_or_create_courses(self, exam_rows: List[Dict[str, Any]], department_id: int) -> Dict[Tuple[str, int], int]:
+        """Course ID for every (code, class level) of the rows, creating missing courses in bulk
+
+        As with row-by-row processing, a course takes the name of the last row that mentions it.
+        """
+        names = {}
+        for exam_data in exam_rows:
+            names[(exam_data['_course_code'], exam_data['_class_level'])] = exam_data['_course_name']
+        codes = list({code for code, _ in names})
+
+        def existing_courses():
+            rows = db.session.query(Course.id, Course.code, Course.class_level, Course.name).filter(
+                Course.department_id == department_id,
+                Course.code.in_(codes)
+            ).order_by(Course.id).all()
+            courses = {}
+            for course_id, code, class_level, name in rows:
+                # The lowest ID wins, as with an ordered .first()
+                courses.setdefault((code, class_level), (course_id, name))
+            return courses
+
+        courses = existing_courses()
+
+        # Update course names if they're different
+        renamed = [{'id': courses[key][0], 'name': name} for key, name in names.items()
+                   if key in courses and courses[key][1] != name]
+        if renamed:
+            db.session.execute(update(Course), renamed)
+
+        new_courses = [{
+            'name': name,
+            'code': code,
+            'credits': 3,  # Default credits
+            'class_level': class_level,
+            'department_id': department_id,
+            'is_active': True
+        } for (code, class_level), name in names.items() if (code, class_level) not in courses]
+        if new_courses:
+            db.session.execute(insert(Course), new_courses)
+            courses = existing_courses()
+
+        return {key: courses[key][0] for key in names}
+
+    def _create_exams(self, exam_rows: List[Dict[str, Any]], session_id: str) -> List[int]:
+        """Insert the exams with one executemany and return their IDs in row order"""
+        # Remove non-model fields before creating exams
+        clean_rows = [{k: v for k, v in exam_data.items() if not k.startswith('_')} for exam_data in exam_rows]
+        db.session.execute(insert(Exam), clean_rows)
+
+        # Auto-increment IDs follow insertion order within the batch
+        exam_ids = [exam_id for (exam_id,) in db.session.query(Exam.id).filter(
+            Exam.exam_session_id == session_id
+        ).order_by(Exam.id.desc()).limit(len(clean_rows)).all()]
+        return exam_ids[::-1]
     
+    def find_previous_import(self, department_id: int) -> Any:
+        """The department's latest import, if its exams are still exactly the department's exams
+
+        Exams added or deleted outside the import since then make it unusable
+        for deduplication, and the next upload is imported in full.
+        """
+        previous = ExcelImport.query.filter_by(department_id=department_id).first()
+        if not previous:
+            return None
+
+        department_exams = db.session.query(Exam.id, Exam.exam_session_id).filter(
+            Exam.department_id == department_id
+        ).order_by(Exam.id).all()
+        if not department_exams or department_exams[-1][1] != previous.exam_session_id:
+            return None
+
+        imported_ids = {exam_id for _, exam_id in previous.rows or [] if exam_id is not None}
+        if {exam_id for exam_id, _ in department_exams} != imported_ids:
+            return None
+        return previous
+
+    def invalidate_imports(self, department_ids: List[int]):
+        """Forget the latest import of departments whose exams or schedules were edited by hand
+
+        An identical re-upload is then imported again instead of being answered
+        with the stored response. Does not commit.
+        """
+        department_ids = {department_id for department_id in department_ids if department_id is not None}
+        if department_ids:
+            ExcelImport.query.filter(ExcelImport.department_id.in_(department_ids)).delete(synchronize_session=False)
+
+    def diff_rows(self, previous_rows: List[List[Any]], row_hashes: List[str]) -> Dict[str, Any]:
+        """Match new rows to the previous import's rows by content
+
+        Returns the exam ID carried over for each new row (None for added rows
+        and rows that failed before), the positions of the added rows and the
+        exams of the rows that are gone. Repeated identical rows match one to one.
+        """
+        previous_by_hash = {}
+        for row_hash, exam_id in previous_rows or []:
+            previous_by_hash.setdefault(row_hash, []).append(exam_id)
+
+        rows = []
+        added_rows = []
+        for position, row_hash in enumerate(row_hashes):
+            matches = previous_by_hash.get(row_hash)
+            if matches:
+                rows.append(matches.pop(0))
+            else:
+                rows.append(None)
+                added_rows.append(position)
+
+        removed = [exam_id for exam_ids in previous_by_hash.values() for exam_id in exam_ids]
+        return {
+            'rows': rows,
+            'added_rows': added_rows,
+            'removed_exam_ids': [exam_id for exam_id in removed if exam_id is not None],
+            'added': len(added_rows),
+            'removed': len(removed),
+            'unchanged': len(row_hashes) - len(added_rows)
+        }
+
+    def save_import(self, department_id: int, session_id: str, content_hash: str,
+                    rows: List[Any], result: Dict[str, Any]):
+        """Record the department's latest import and its response, then commit"""
+        excel_import = ExcelImport.query.filter_by(department_id=department_id).first()
+        if not excel_import:
+            excel_import = ExcelImport(department_id=department_id)
+            db.session.add(excel_import)
+        excel_import.exam_session_id = session_id
+        excel_import.content_hash = content_hash
+        excel_import.rows = rows
+        excel_import.result = result
+        db.session.commit()
+
+    def save_import_scheduling(self, department_id: int, session_id: str, scheduling: Dict[str, Any]):
+        """Store the outcome of a background scheduling job with the import that started it"""
+        excel_import = ExcelImport.query.filter_by(department_id=department_id, exam_session_id=session_id).first()
+        if not excel_import or not excel_import.result:
+            return
+        result = dict(excel_import.result)
+        result.pop('scheduling_job', None)
+        result['scheduling'] = scheduling
+        excel_import.result = result
+        db.session.commit()
 
-    
-    def _create_exam(self, exam_data: Dict[str, Any]) -> Exam:
-        """Create exam in database"""
-        # Remove non-model fields before creating exam
-        clean_data = {k: v for k, v in exam_data.items() if not k.startswith('_')}
-        print(f"DEBUG: Original exam_data keys: {list(exam_data.keys())}")
-        print(f"DEBUG: Clean data keys: {list(clean_data.keys())}")
-        exam = Exam(**clean_data)
-        db.session.add(exam)
-        db.session.flush()  # Get ID without committing
-        return exam
-    
     def commit_changes(self):
         """Commit all changes to database"""
         db.session.commit()
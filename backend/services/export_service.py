@@ -125,12 +125,9 @@ class ExportService:
                 total_capacity = schedule.room.capacity
 
                 # Add additional rooms if any
-                if schedule.additional_rooms:
-                    for room_id in schedule.additional_rooms:
-                        additional_room = Room.query.get(room_id)
-                        if additional_room:
-                            rooms.append(additional_room.name)
-                            total_capacity += additional_room.capacity
+                for additional_room in schedule.additional_room_objects:
+                    rooms.append(additional_room.name)
+                    total_capacity += additional_room.capacity
 
                 # Format room information
                 if len(rooms) > 1:
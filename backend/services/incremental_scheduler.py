@@ -0,0 +1,241 @@
+import itertools
+from datetime import datetime, timedelta
+
+from database import db
+from models import Exam, ExamSchedule, Settings
+from services.advanced_scheduler import AdvancedSchedulerService
+from services.event_broker import queue_schedule_event, schedule_delta
+from services.schedule_version import bump_schedule_version
+from services.snapshot import build_schedule_problem
+from utils.time_grid import DayGrid, time_interval_mask
+
+
+class IncrementalSchedulerService(AdvancedSchedulerService):
+    """Place a single exam into the persisted schedule without re-planning the rest
+
+    The exam week's room usage and the department's placed exams are loaded
+    once. If the exam fits nowhere, a bounded repair moves at most max_moves
+    placed exams of the department, trying smaller sets first. Only the
+    changed schedules are written.
+    """
+
+    # Blocker combinations tried per date and repair size
+    MAX_REPAIR_ATTEMPTS = 200
+
+    def _create_exam_schedule(self, exam, rooms, target_date, start_time, end_time, daily_schedules):
+        """Keep placements in memory until the repair settles"""
+        self._record_placement(exam, rooms, target_date, start_time, end_time, daily_schedules)
+        return True
+
+    def _apply(self, exam, placement, daily_schedules):
+        """Record a (date, start_time, end_time, room IDs) placement"""
+        target_date, start_time, end_time, room_ids = placement
+        self.placements[exam.id] = placement
+        self.room_occupancy.add(room_ids, target_date, start_time, end_time, owner=exam.id)
+
+        date_key = target_date.strftime('%Y-%m-%d')
+        if date_key not in daily_schedules:
+            daily_schedules[date_key] = DayGrid()
+        daily_schedules[date_key].add(exam, exam.class_name, time_interval_mask(start_time, end_time))
+
+    def _unplace(self, exam, daily_schedules):
+        """Release the day grid and rooms held by an exam"""
+        target_date, _, _, room_ids = self.placements.pop(exam.id)
+        daily_schedules[target_date.strftime('%Y-%m-%d')].remove(exam)
+        self.room_occupancy.remove(room_ids, target_date, exam.id)
+
+    def _get_exam_dates(self):
+        """Weekdays of the configured exam week"""
+        settings = dict(db.session.query(Settings.key, Settings.value).filter(
+            Settings.key.in_(['exam_week_start', 'exam_week_end'])
+        ).all())
+        if 'exam_week_start' not in settings or 'exam_week_end' not in settings:
+            return []
+
+        start_date = datetime.strptime(settings['exam_week_start'], '%Y-%m-%d').date()
+        end_date = datetime.strptime(settings['exam_week_end'], '%Y-%m-%d').date()
+        exam_dates = []
+        current_date = start_date
+        while current_date <= end_date:
+            if current_date.weekday() < 5:
+                exam_dates.append(current_date)
+            current_date += timedelta(days=1)
+        return exam_dates
+
+    def place_exam(self, exam_id, max_moves=2):
+        """Place one exam, moving at most max_moves placed exams of its department
+
+        An existing schedule of the exam is replaced. Returns the new schedule
+        and the moved ones; nothing is written when the exam cannot be placed.
+        """
+        try:
+            exam_row = db.session.get(Exam, exam_id)
+            if not exam_row:
+                return {'success': False, 'message': 'Exam not found', 'schedule': None, 'moved': []}
+
+            exam_dates = self._get_exam_dates()
+            if not exam_dates:
+                return {'success': False, 'message': 'No valid exam dates found', 'schedule': None, 'moved': []}
+
+            # Placed exams of the department are the ones the day rules apply to and the only ones we may move
+            movable = {schedule.exam_id: schedule for schedule in ExamSchedule.query.join(Exam).filter(
+                Exam.department_id == exam_row.department_id,
+                ExamSchedule.exam_id != exam_id,
+                ExamSchedule.scheduled_date >= exam_dates[0],
+                ExamSchedule.scheduled_date <= exam_dates[-1]
+            ).all()}
+            own_schedules = ExamSchedule.query.filter_by(exam_id=exam_id).all()
+
+            # Everything else in the week is fixed room usage
+            excluded = [schedule.id for schedule in list(movable.values()) + own_schedules]
+            self.room_occupancy.load(exam_dates[0], exam_dates[-1], exclude_schedule_ids=excluded)
+            self.exam_rows = {exam_id: exam_row}
+
+            problem = build_schedule_problem([exam_id] + list(movable), exam_dates, self.room_occupancy)
+            self._use_problem(problem)
+            self.records = {record.id: record for record in problem.exams}
+            exam = self.records[exam_id]
+
+            daily_schedules = {}
+            for movable_id, schedule in movable.items():
+                if movable_id in self.records:
+                    room_ids = tuple(assignment.room_id for assignment in schedule.room_assignments)
+                    self._apply(self.records[movable_id], (schedule.scheduled_date, schedule.start_time,
+                                                           schedule.end_time, room_ids), daily_schedules)
+            original = dict(self.placements)
+
+            moved_ids = self._place_with_repair(exam, exam_dates, daily_schedules, max_moves)
+            if moved_ids is None:
+                return {
+                    'success': False,
+                    'message': f'No suitable time slot found, even after moving up to {max_moves} exams',
+                    'schedule': None,
+                    'moved': []
+                }
+
+            moved_ids = [moved_id for moved_id in moved_ids if self.placements[moved_id] != original[moved_id]]
+            if len(own_schedules) == 1 and not moved_ids and self._is_unchanged(own_schedules[0], exam_id):
+                return {
+                    'success': True,
+                    'message': 'Schedule unchanged',
+                    'schedule': schedule_delta(own_schedules[0], exam_row.department_id),
+                    'moved': []
+                }
+            return self._write_changes(exam_row, own_schedules, movable, moved_ids)
+
+        except Exception as e:
+            db.session.rollback()
+            return {'success': False, 'message': f'Scheduling failed: {str(e)}', 'schedule': None, 'moved': []}
+
+    def _place_with_repair(self, exam, exam_dates, daily_schedules, max_moves):
+        """IDs of the exams moved to fit the exam in, or None if it does not fit"""
+        if self._place_exam_greedy(exam, exam_dates, daily_schedules)[0] is not None:
+            return []
+
+        preferred = self._preferred_dates(exam, exam_dates)
+        repair_dates = preferred + [d for d in exam_dates if d not in preferred]
+
+        # Smallest sets first, so the first repair found moves the fewest exams
+        for size in range(1, max_moves + 1):
+            for target_date in repair_dates:
+                blockers = sorted(
+                    (record for exam_id, record in self.records.items()
+                     if exam_id in self.placements and self.placements[exam_id][0] == target_date),
+                    key=lambda record: (record.student_count, record.duration)
+                )
+                for attempt, combination in enumerate(itertools.combinations(blockers, size)):
+                    if attempt >= self.MAX_REPAIR_ATTEMPTS:
+                        break
+                    if self._try_repair(exam, target_date, combination, exam_dates, daily_schedules):
+                        return [record.id for record in combination]
+        return None
+
+    def _try_repair(self, exam, target_date, blockers, exam_dates, daily_schedules):
+        """Lift blockers off a date, place the exam there and re-place the blockers anywhere"""
+        saved = {blocker.id: self.placements[blocker.id] for blocker in blockers}
+        for blocker in blockers:
+            self._unplace(blocker, daily_schedules)
+
+        if self._try_schedule_exam_on_date(exam, target_date, daily_schedules):
+            if all(self._place_exam_greedy(blocker, exam_dates, daily_schedules)[0] is not None
+                   for blocker in blockers):
+                return True
+            for record in (exam,) + tuple(blockers):
+                if record.id in self.placements:
+                    self._unplace(record, daily_schedules)
+
+        for blocker in blockers:
+            if blocker.id not in self.placements:
+                self._apply(blocker, saved[blocker.id], daily_schedules)
+        return False
+
+    def _preferred_dates(self, exam, exam_dates):
+        """Preferred dates of the exam that fall in the exam week, in order"""
+        preferred = []
+        for pref_date in getattr(exam, 'preferred_dates', None) or []:
+            if isinstance(pref_date, str):
+                try:
+                    pref_date = datetime.strptime(pref_date, '%Y-%m-%d').date()
+                except ValueError:
+                    continue
+            if pref_date in exam_dates and pref_date not in preferred:
+                preferred.append(pref_date)
+        return preferred
+
+    def _is_unchanged(self, schedule, exam_id):
+        """Check if a persisted schedule already matches the placement found"""
+        target_date, start_time, end_time, room_ids = self.placements[exam_id]
+        return ((schedule.scheduled_date, schedule.start_time, schedule.end_time) == (target_date, start_time, end_time)
+                and tuple(assignment.room_id for assignment in schedule.room_assignments) == room_ids)
+
+    def _write_changes(self, exam_row, own_schedules, movable, moved_ids):
+        """Write the exam's schedule and the moved schedules, then commit"""
+        rooms_by_id = self.problem.rooms_by_id
+
+        def write(schedule, exam_id):
+            target_date, start_time, end_time, room_ids = self.placements[exam_id]
+            schedule.scheduled_date = target_date
+            schedule.start_time = start_time
+            schedule.end_time = end_time
+            schedule.assign_rooms([rooms_by_id[room_id] for room_id in room_ids], self.records[exam_id].student_count)
+
+        # Reuse the exam's schedule row if it had one
+        schedule = own_schedules[0] if own_schedules else ExamSchedule(exam_id=exam_row.id)
+        for duplicate in own_schedules[1:]:
+            db.session.delete(duplicate)
+        previous_date = schedule.scheduled_date.strftime('%d/%m/%Y') if own_schedules else None
+        write(schedule, exam_row.id)
+        db.session.add(schedule)
+        exam_row.status = 'planned'
+
+        previous_dates = {}
+        for moved_id in moved_ids:
+            previous_dates[moved_id] = movable[moved_id].scheduled_date.strftime('%d/%m/%Y')
+            write(movable[moved_id], moved_id)
+
+        db.session.flush()
+        department_id = exam_row.department_id
+        schedule_data = schedule_delta(schedule, department_id)
+        if previous_date:
+            schedule_data['previous_date'] = previous_date
+        queue_schedule_event('schedule_moved' if previous_date else 'schedule_created', schedule_data)
+
+        moved = []
+        for moved_id in moved_ids:
+            moved_data = schedule_delta(movable[moved_id], department_id)
+            moved_data['previous_date'] = previous_dates[moved_id]
+            queue_schedule_event('schedule_moved', moved_data)
+            moved.append(moved_data)
+
+        bump_schedule_version([department_id])
+        db.session.commit()
+
+        message = f'Scheduled {self.records[exam_row.id].course_code} on {schedule.scheduled_date}'
+        if moved:
+            message += f' after moving {len(moved)} exams'
+        return {
+            'success': True,
+            'message': message,
+            'schedule': schedule_data,
+            'moved': moved
+        }
@@ -0,0 +1,146 @@
+import logging
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from threading import Lock
+
+from flask import current_app
+
+logger = logging.getLogger(__name__)
+
+
+class Job:
+    """State of one background scheduling run, updated by its worker thread"""
+
+    def __init__(self, kind):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.status = 'queued'
+        self.phase = 'queued'
+        self.message = None
+        self.total = None
+        self.placed = 0
+        self.failed = 0
+        self.result = None
+        self.created_at = datetime.utcnow()
+        self.started_at = None
+        self.finished_at = None
+        self._finished_monotonic = None
+        self._phase_started = None
+        self._lock = Lock()
+
+    def start(self):
+        with self._lock:
+            self.status = 'running'
+            self.phase = 'loading'
+            self.started_at = datetime.utcnow()
+            self._phase_started = time.monotonic()
+
+    def update_progress(self, phase, total=None, placed=None, failed=None):
+        """Scheduler progress callback"""
+        with self._lock:
+            if phase != self.phase:
+                self.phase = phase
+                self._phase_started = time.monotonic()
+            if total is not None:
+                self.total = total
+            if placed is not None:
+                self.placed = placed
+            if failed is not None:
+                self.failed = failed
+
+    def finish(self, success, message, result=None):
+        with self._lock:
+            self.status = 'completed' if success else 'failed'
+            self.phase = 'done'
+            self.message = message
+            self.result = result
+            self.finished_at = datetime.utcnow()
+            self._finished_monotonic = time.monotonic()
+
+    def eta_seconds(self):
+        """Remaining seconds extrapolated from the placement rate, None when unknown"""
+        if self.phase != 'placing' or not self.total:
+            return None
+        processed = self.placed + self.failed
+        if processed == 0:
+            return None
+        elapsed = time.monotonic() - self._phase_started
+        return round(elapsed / processed * max(self.total - processed, 0), 1)
+
+    def expired(self, retention_seconds):
+        return self._finished_monotonic is not None and time.monotonic() - self._finished_monotonic > retention_seconds
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                'id': self.id,
+                'kind': self.kind,
+                'status': self.status,
+                'phase': self.phase,
+                'message': self.message,
+                'total': self.total,
+                'placed': self.placed,
+                'failed': self.failed,
+                'eta_seconds': self.eta_seconds(),
+                'created_at': self.created_at.isoformat(),
+                'started_at': self.started_at.isoformat() if self.started_at else None,
+                'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+                'result': self.result
+            }
+
+
+class JobManager:
+    """Runs scheduling jobs on worker threads of this process
+
+    Jobs live in memory, so /api/jobs/<id> must reach the worker process
+    that accepted the job. Finished jobs are kept for retention_seconds.
+    """
+
+    def __init__(self, app, max_workers=1, retention_seconds=3600):
+        self.app = app
+        self.retention_seconds = retention_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='scheduler-job')
+        self._jobs = {}
+        self._lock = Lock()
+
+    def submit(self, kind, target, *args, **kwargs):
+        """Queue target(job, *args, **kwargs); it returns (success, message, result)"""
+        job = Job(kind)
+        with self._lock:
+            self._purge_expired()
+            self._jobs[job.id] = job
+        self._executor.submit(self._run, job, target, args, kwargs)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            self._purge_expired()
+            return self._jobs.get(job_id)
+
+    def _purge_expired(self):
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.expired(self.retention_seconds)]:
+            del self._jobs[job_id]
+
+    def _run(self, job, target, args, kwargs):
+        # Each job gets its own app context, so its own database session and flask.g
+        with self.app.app_context():
+            job.start()
+            try:
+                success, message, result = target(job, *args, **kwargs)
+                job.finish(success, message, result)
+            except Exception as e:
+                logger.exception("Job %s failed", job.id)
+                job.finish(False, f'Job failed: {str(e)}')
+
+
+def get_job_manager():
+    """Job manager of the current app, created on first use"""
+    if 'job_manager' not in current_app.extensions:
+        current_app.extensions['job_manager'] = JobManager(
+            current_app._get_current_object(),
+            max_workers=current_app.config.get('SCHEDULER_JOB_WORKERS', 1),
+            retention_seconds=current_app.config.get('JOB_RESULT_RETENTION_SECONDS', 3600)
+        )
+    return current_app.extensions['job_manager']
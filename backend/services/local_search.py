@@ -0,0 +1,355 @@
+import math
+import random
+import time as time_module
+from datetime import datetime
+
+from database import db
+from models import ExamSchedule
+from sqlalchemy import inspect
+from utils.time_grid import DayGrid, time_interval_mask
+
+
+class _IdPool:
+    """Set of IDs with O(1) add, discard and random choice"""
+
+    def __init__(self, ids=()):
+        self.items = []
+        self.positions = {}
+        for item in ids:
+            self.add(item)
+
+    def __len__(self):
+        return len(self.items)
+
+    def add(self, item):
+        if item not in self.positions:
+            self.positions[item] = len(self.items)
+            self.items.append(item)
+
+    def discard(self, item):
+        position = self.positions.pop(item, None)
+        if position is None:
+            return
+        # Move the last item into the freed position
+        last = self.items.pop()
+        if position < len(self.items):
+            self.items[position] = last
+            self.positions[last] = position
+
+
+class LocalSearchImprover:
+    """Simulated annealing improvement phase run after greedy placement
+
+    Works on light (date, start, end, room IDs) placements and the scheduler's
+    in-memory day grids and room occupancy index. A move only unplaces and
+    re-places the exams it touches, so feasibility and cost are re-scored for
+    those days and rooms alone. ORM objects are written once at the end.
+
+    allowed_dates ({exam_id: dates}) limits the dates each exam may move to;
+    exams without an entry may use every exam date.
+    """
+
+    # Cost weights: an unscheduled exam outweighs everything else
+    FAILED_WEIGHT = 100
+    NOT_PREFERRED_WEIGHT = 5
+    SPLIT_WEIGHT = 1
+
+    INITIAL_TEMPERATURE = 10.0
+    FINAL_TEMPERATURE = 0.1
+
+    def __init__(self, scheduler, exams, exam_dates, daily_schedules, time_budget_ms, seed=None, allowed_dates=None):
+        self.scheduler = scheduler
+        self.exams = {exam.id: exam for exam in exams}
+        self.exam_dates = exam_dates
+        self.daily_schedules = daily_schedules
+        self.time_budget_ms = time_budget_ms
+        self.random = random.Random(seed)
+
+        # exam_id -> (date, start_time, end_time, room_ids) or None when unscheduled
+        self.placements = {exam_id: scheduler.placements.get(exam_id) for exam_id in self.exams}
+        self.initial_placements = dict(self.placements)
+        self.exam_ids = list(self.exams)
+        # Kept up to date by _apply/_unplace so moves can sample without a scan
+        self.failed = _IdPool(exam_id for exam_id, placement in self.placements.items() if placement is None)
+        self.placed = _IdPool(exam_id for exam_id, placement in self.placements.items() if placement is not None)
+
+        self.preferred_dates = {exam_id: self._parse_preferred_dates(exam) for exam_id, exam in self.exams.items()}
+        allowed_dates = allowed_dates or {}
+        self.allowed_dates = {
+            exam_id: [d for d in exam_dates if exam_id not in allowed_dates or d in allowed_dates[exam_id]]
+            for exam_id in self.exams
+        }
+        self.trajectory = []
+
+    def run(self):
+        """Improve placements within the time budget and return the score trajectory"""
+        cost = sum(self._exam_cost(exam_id) for exam_id in self.exams)
+        best_cost = cost
+        best_placements = dict(self.placements)
+
+        started = time_module.monotonic()
+        budget = self.time_budget_ms / 1000.0
+        self._record(0, cost)
+
+        iterations = 0
+        while self.exams:
+            elapsed = time_module.monotonic() - started
+            if elapsed >= budget:
+                break
+            iterations += 1
+
+            # Geometric cooling over the time budget
+            progress = elapsed / budget
+            temperature = self.INITIAL_TEMPERATURE * (self.FINAL_TEMPERATURE / self.INITIAL_TEMPERATURE) ** progress
+
+            delta = self._random_move(temperature)
+            if delta is None:
+                continue
+
+            cost += delta
+            if cost < best_cost:
+                best_cost = cost
+                best_placements = dict(self.placements)
+                self._record(elapsed * 1000, cost)
+
+        # Restore the best state seen, then write it back
+        self._restore(best_placements)
+        self._record((time_module.monotonic() - started) * 1000, best_cost)
+        changed = self._write_back()
+
+        return {
+            'iterations': iterations,
+            'initial_cost': self.trajectory[0]['cost'],
+            'final_cost': best_cost,
+            'changed_exams': changed,
+            'score_trajectory': self.trajectory
+        }
+
+    def _random_move(self, temperature):
+        """Apply one random move; return its cost delta, or None if it was rejected"""
+        roll = self.random.random()
+
+        if self.failed and roll < 0.4:
+            return self._try_move([self.random.choice(self.failed.items)], temperature)
+        if roll < 0.7:
+            return self._try_move([self.random.choice(self.exam_ids)], temperature)
+        if roll < 0.9:
+            if len(self.placed) < 2:
+                return None
+            return self._try_swap(self.random.sample(self.placed.items, 2), temperature)
+        return self._try_reroom(self.random.choice(self.exam_ids), temperature)
+
+    def _try_move(self, exam_ids, temperature):
+        """Move exams to random dates and start times"""
+        old = {exam_id: self.placements[exam_id] for exam_id in exam_ids}
+        old_cost = sum(self._exam_cost(exam_id) for exam_id in exam_ids)
+
+        for exam_id in exam_ids:
+            self._unplace(exam_id)
+        for exam_id in exam_ids:
+            target_date = self._pick_date(exam_id)
+            if target_date is not None:
+                self._place_anywhere(exam_id, target_date)
+
+        return self._accept_or_revert(old, old_cost, temperature)
+
+    def _try_swap(self, exam_ids, temperature):
+        """Exchange the dates of two placed exams"""
+        first, second = exam_ids
+        first_date, second_date = self.placements[first][0], self.placements[second][0]
+        if first_date == second_date:
+            return None
+        if second_date not in self.allowed_dates[first] or first_date not in self.allowed_dates[second]:
+            return None
+
+        old = {exam_id: self.placements[exam_id] for exam_id in exam_ids}
+        old_cost = sum(self._exam_cost(exam_id) for exam_id in exam_ids)
+
+        self._unplace(first)
+        self._unplace(second)
+        self._place_anywhere(first, second_date)
+        self._place_anywhere(second, first_date)
+
+        return self._accept_or_revert(old, old_cost, temperature)
+
+    def _try_reroom(self, exam_id, temperature):
+        """Recompute rooms for an exam in its current slot"""
+        placement = self.placements[exam_id]
+        if placement is None:
+            return None
+
+        old = {exam_id: placement}
+        old_cost = self._exam_cost(exam_id)
+        target_date, start_time, end_time, _ = placement
+
+        self._unplace(exam_id)
+        self._place_at(exam_id, target_date, start_time, end_time)
+
+        return self._accept_or_revert(old, old_cost, temperature)
+
+    def _accept_or_revert(self, old, old_cost, temperature):
+        """Metropolis acceptance on the cost of the touched exams"""
+        new_cost = sum(self._exam_cost(exam_id) for exam_id in old)
+        delta = new_cost - old_cost
+        if delta <= 0 or self.random.random() < math.exp(-delta / temperature):
+            return delta
+
+        for exam_id in old:
+            self._unplace(exam_id)
+        for exam_id, placement in old.items():
+            if placement is not None:
+                self._apply(exam_id, placement)
+        return None
+
+    def _place_anywhere(self, exam_id, target_date):
+        """Place an exam at the first feasible start time the scheduler allows on a date"""
+        exam = self.exams[exam_id]
+        candidates = list(self.scheduler._candidate_slots(exam, target_date))
+        self.random.shuffle(candidates)
+        for start_time, end_time in candidates:
+            if self._place_at(exam_id, target_date, start_time, end_time):
+                return True
+        return False
+
+    def _place_at(self, exam_id, target_date, start_time, end_time):
+        """Place an exam in a slot if every rule allows it"""
+        exam = self.exams[exam_id]
+        scheduler = self.scheduler
+
+        if not scheduler._check_difficulty_level_rules(exam, target_date, self.daily_schedules):
+            return False
+        if not scheduler._check_class_level_conflicts(exam, target_date, start_time, end_time, self.daily_schedules):
+            return False
+        if not scheduler._check_time_gap_requirement(target_date, start_time, end_time, self.daily_schedules):
+            return False
+
+        rooms = scheduler._find_suitable_rooms(exam, target_date, start_time, end_time)
+        if not rooms:
+            return False
+
+        self._apply(exam_id, (target_date, start_time, end_time, tuple(room.id for room in rooms)))
+        return True
+
+    def _apply(self, exam_id, placement):
+        """Record a placement in the day grid and room occupancy index"""
+        exam = self.exams[exam_id]
+        target_date, start_time, end_time, room_ids = placement
+
+        date_key = target_date.strftime('%Y-%m-%d')
+        if date_key not in self.daily_schedules:
+            self.daily_schedules[date_key] = DayGrid()
+        self.daily_schedules[date_key].add(exam, exam.class_name, time_interval_mask(start_time, end_time))
+        self.scheduler.room_occupancy.add(room_ids, target_date, start_time, end_time, owner=exam_id)
+        self.placements[exam_id] = placement
+        self.placed.add(exam_id)
+        self.failed.discard(exam_id)
+
+    def _unplace(self, exam_id):
+        """Release the day grid and rooms held by an exam"""
+        placement = self.placements[exam_id]
+        if placement is None:
+            return
+
+        target_date, _, _, room_ids = placement
+        self.daily_schedules[target_date.strftime('%Y-%m-%d')].remove(self.exams[exam_id])
+        self.scheduler.room_occupancy.remove(room_ids, target_date, exam_id)
+        self.placements[exam_id] = None
+        self.placed.discard(exam_id)
+        self.failed.add(exam_id)
+
+    def _restore(self, placements):
+        """Reset the in-memory state to a saved set of placements"""
+        for exam_id in self.exams:
+            self._unplace(exam_id)
+        for exam_id, placement in placements.items():
+            if placement is not None:
+                self._apply(exam_id, placement)
+
+    def _exam_cost(self, exam_id):
+        """Cost contribution of a single exam"""
+        placement = self.placements[exam_id]
+        if placement is None:
+            return self.FAILED_WEIGHT
+
+        cost = self.SPLIT_WEIGHT * (len(placement[3]) - 1)
+        preferred = self.preferred_dates[exam_id]
+        if preferred and placement[0] not in preferred:
+            cost += self.NOT_PREFERRED_WEIGHT
+        return cost
+
+    def _pick_date(self, exam_id):
+        """Pick one of the exam's allowed dates, favouring its preferred dates"""
+        allowed = self.allowed_dates[exam_id]
+        if not allowed:
+            return None
+        preferred = [d for d in allowed if d in self.preferred_dates[exam_id]]
+        if preferred and self.random.random() < 0.7:
+            return self.random.choice(preferred)
+        return self.random.choice(allowed)
+
+    def _parse_preferred_dates(self, exam):
+        """Get preferred dates as date objects"""
+        preferred = set()
+        for pref_date in getattr(exam, 'preferred_dates', None) or []:
+            if isinstance(pref_date, str):
+                try:
+                    pref_date = datetime.strptime(pref_date, '%Y-%m-%d').date()
+                except ValueError:
+                    continue
+            preferred.add(pref_date)
+        return preferred
+
+    def _record(self, elapsed_ms, cost):
+        """Append a point to the score trajectory"""
+        self.trajectory.append({
+            'elapsed_ms': round(elapsed_ms, 1),
+            'cost': cost,
+            'failed_count': len(self.failed)
+        })
+
+    def _write_back(self):
+        """Apply changed placements to the ExamSchedule objects of this run"""
+        changed = 0
+        for exam_id, placement in self.placements.items():
+            if placement == self.initial_placements[exam_id]:
+                continue
+            changed += 1
+
+            # Dry runs have no ExamSchedule objects to update
+            if self.scheduler.dry_run:
+                if placement is None:
+                    self.scheduler.placements.pop(exam_id, None)
+                else:
+                    self.scheduler.placements[exam_id] = placement
+                continue
+
+            schedule = self.scheduler.created_schedules.get(exam_id)
+
+            if placement is None:
+                if schedule is not None:
+                    # A schedule created in this run may not be flushed yet
+                    if inspect(schedule).pending:
+                        db.session.expunge(schedule)
+                    else:
+                        db.session.delete(schedule)
+                    del self.scheduler.created_schedules[exam_id]
+                self.scheduler.placements.pop(exam_id, None)
+                self.scheduler.exam_rows[exam_id].status = 'pending'
+                continue
+
+            self.scheduler.placements[exam_id] = placement
+
+            target_date, start_time, end_time, room_ids = placement
+            if schedule is None:
+                schedule = ExamSchedule(exam_id=exam_id)
+                db.session.add(schedule)
+                self.scheduler.created_schedules[exam_id] = schedule
+
+            schedule.scheduled_date = target_date
+            schedule.start_time = start_time
+            schedule.end_time = end_time
+            rooms_by_id = self.scheduler.problem.rooms_by_id
+            schedule.assign_rooms([rooms_by_id[room_id] for room_id in room_ids], self.exams[exam_id].student_count)
+            self.scheduler.exam_rows[exam_id].status = 'planned'
+
+        return changed
@@ -0,0 +1,187 @@
+import os
+import pickle
+import random
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+from services.snapshot import ScheduleProblem
+
+# Problem shared by every task of a worker process, set by _init_worker
+_worker_problem = None
+
+
+class _SnapshotMixin:
+    """Run on a ScheduleProblem alone and keep placements in memory only"""
+
+    def _use_problem(self, problem):
+        super()._use_problem(problem)
+        self.room_occupancy.base_masks = dict(problem.base_masks)
+        self.room_occupancy.placed = {}
+        self.room_occupancy.masks = {}
+        for (room_id, target_date), mask in problem.base_masks.items():
+            self.room_occupancy.masks.setdefault(room_id, {})[target_date] = mask
+        self.room_occupancy.loaded_range = (problem.exam_dates[0], problem.exam_dates[-1])
+
+    def _create_exam_schedule(self, exam, rooms, target_date, start_time, end_time, daily_schedules):
+        self._record_placement(exam, rooms, target_date, start_time, end_time, daily_schedules)
+        return True
+
+
+def _snapshot_scheduler(kind, problem):
+    """Build an in-memory scheduler of the requested variant"""
+    # Imported here, the scheduler modules import this one
+    from services.advanced_scheduler import AdvancedSchedulerService
+    from services.scheduler_service import SchedulerService
+
+    base = SchedulerService if kind == 'standard' else AdvancedSchedulerService
+    scheduler = type('Snapshot' + base.__name__, (_SnapshotMixin, base), {})()
+    scheduler._use_problem(problem)
+    return scheduler
+
+
+def _shuffled_order(exams, seed):
+    """Seed 0 keeps the priority order; other seeds perturb it locally"""
+    if seed == 0:
+        return list(exams)
+
+    rnd = random.Random(seed)
+    spread = max(3, len(exams) // 5)
+    keyed = [(position + rnd.random() * spread, exam) for position, exam in enumerate(exams)]
+    keyed.sort(key=lambda item: item[0])
+    return [exam for _, exam in keyed]
+
+
+def _preferred_dates(exam):
+    """Get preferred dates as date objects"""
+    preferred = set()
+    for pref_date in exam.preferred_dates:
+        if isinstance(pref_date, str):
+            try:
+                pref_date = datetime.strptime(pref_date, '%Y-%m-%d').date()
+            except ValueError:
+                continue
+        preferred.add(pref_date)
+    return preferred
+
+
+def run_ordering(problem, kind, seed):
+    """Greedily place one ordering of the exams and score the result"""
+    scheduler = _snapshot_scheduler(kind, problem)
+    daily_schedules = {}
+
+    for exam in _shuffled_order(problem.exams, seed):
+        scheduler._place_exam_greedy(exam, problem.exam_dates, daily_schedules)
+
+    placements = scheduler.placements
+    preferred_hits = sum(1 for exam in problem.exams
+                         if exam.id in placements and placements[exam.id][0] in _preferred_dates(exam))
+    return {
+        'seed': seed,
+        'failed_count': len(problem.exams) - len(placements),
+        'preferred_hits': preferred_hits,
+        'room_count': sum(len(placement[3]) for placement in placements.values()),
+        'placements': placements
+    }
+
+
+def _score(result):
+    """Lower is better: failures, then missed preferred dates, then rooms used"""
+    return (result['failed_count'], -result['preferred_hits'], result['room_count'], result['seed'])
+
+
+def _init_worker(problem_bytes):
+    global _worker_problem
+    _worker_problem = pickle.loads(problem_bytes)
+
+
+def _run_worker(kind, seed):
+    return run_ordering(_worker_problem, kind, seed)
+
+
+def run_multi_start(problem, kind, restarts=None):
+    """Run `restarts` orderings across a process pool and return the best one"""
+    restarts = max(1, restarts or os.cpu_count() or 1)
+    workers = min(restarts, os.cpu_count() or 1)
+
+    if workers == 1:
+        results = [run_ordering(problem, kind, seed) for seed in range(restarts)]
+    else:
+        # Ship the problem once per worker; tasks only carry their seed
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(pickle.dumps(problem),)) as executor:
+            results = list(executor.map(_run_worker, [kind] * restarts, range(restarts)))
+
+    best = min(results, key=_score)
+    best['runs'] = restarts
+    return best
+
+
+def _exam_room_names(problem, exam, kind):
+    """Names of the active rooms an exam may use"""
+    names = {name.strip() for name in exam.available_rooms} & set(problem.rooms_by_name)
+    if not exam.available_rooms and kind == 'standard':
+        # The standard scheduler falls back to every active room
+        names = set(problem.rooms_by_name)
+    return names
+
+
+def split_problem(problem, kind):
+    """Split a problem into independent room-sharing components
+
+    Exams are linked when they may use a common room; each connected
+    component gets its own exams, rooms and existing room usage.
+    """
+    parent = {}
+
+    def find(node):
+        while parent.setdefault(node, node) != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    exam_names = {}
+    for exam in problem.exams:
+        names = _exam_room_names(problem, exam, kind)
+        exam_names[exam.id] = names
+        for name in names:
+            parent[find(('room', name))] = find(('exam', exam.id))
+        find(('exam', exam.id))
+
+    # Keep the priority order of exams inside every component
+    grouped = {}
+    for exam in problem.exams:
+        grouped.setdefault(find(('exam', exam.id)), []).append(exam)
+
+    subproblems = []
+    for exams in grouped.values():
+        names = set().union(*(exam_names[exam.id] for exam in exams))
+        rooms = [room for room in problem.rooms if room.name.strip() in names]
+        room_ids = {room.id for room in rooms}
+        base_masks = {key: mask for key, mask in problem.base_masks.items() if key[0] in room_ids}
+        subproblems.append(ScheduleProblem(exams, rooms, problem.exam_dates, base_masks))
+
+    # Largest components first so they start as early as possible
+    subproblems.sort(key=lambda sub: len(sub.exams), reverse=True)
+    return subproblems
+
+
+def run_partitioned(problem, kind):
+    """Schedule every room-sharing component concurrently and merge the placements"""
+    subproblems = split_problem(problem, kind)
+    workers = min(len(subproblems), os.cpu_count() or 1)
+
+    placements = {}
+    if workers <= 1:
+        for sub in subproblems:
+            placements.update(run_ordering(sub, kind, 0)['placements'])
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(run_ordering, sub, kind, 0) for sub in subproblems]
+            for future in as_completed(futures):
+                placements.update(future.result()['placements'])
+
+    return {
+        'components': len(subproblems),
+        'largest_component': len(subproblems[0].exams) if subproblems else 0,
+        'placements': placements
+    }
@@ -0,0 +1,206 @@
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from functools import wraps
+from threading import Lock
+
+from database import db
+from flask import Response, current_app, request
+from models import ResponseCacheGeneration
+from sqlalchemy import select
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+
+GLOBAL_TAG = 'global'
+ALL_DEPARTMENTS_TAG = 'departments'
+
+
+def department_tag(department_id):
+    return f'department:{department_id}'
+
+
+class ResponseCache(ABC):
+    """Interface of the serialized response cache
+
+    Entries are never deleted on writes. Every key embeds the current
+    generation of its tags, and invalidating a tag bumps its generation,
+    so stale entries become unreachable and age out by LRU/TTL. A reader
+    that raced the write stores its result under the old generation,
+    where nobody looks for it.
+
+    Backends whose generations live in the database bump them inside the
+    writing transaction (invalidates_in_transaction); the others are
+    invalidated once the write has committed.
+    """
+
+    invalidates_in_transaction = False
+
+    @abstractmethod
+    def get(self, key):
+        """Cached body for key, or None"""
+
+    @abstractmethod
+    def set(self, key, body):
+        """Store a body under key"""
+
+    @abstractmethod
+    def generations(self, tags):
+        """Current generation of each tag"""
+
+    @abstractmethod
+    def invalidate(self, tags):
+        """Bump the generation of each tag"""
+
+
+class LocalResponseCache(ResponseCache):
+    """In-process LRU cache with size and TTL eviction (one cache per worker)
+
+    Tag generations are rows of response_cache_generations, so a write
+    handled by one worker invalidates the matching entries of all workers.
+    """
+
+    invalidates_in_transaction = True
+
+    def __init__(self, max_entries=256, ttl_seconds=300):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, body):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def generations(self, tags):
+        rows = dict(db.session.execute(
+            select(ResponseCacheGeneration.tag, ResponseCacheGeneration.generation)
+            .where(ResponseCacheGeneration.tag.in_(tags))
+        ).all())
+        return [rows.get(tag, 0) for tag in tags]
+
+    def invalidate(self, tags):
+        for tag in tags:
+            db.session.execute(_bump_generation_statement(tag))
+
+
+def _bump_generation_statement(tag):
+    """Upsert that creates the tag's generation row or increments it"""
+    dialect = db.session.get_bind().dialect.name
+    next_generation = ResponseCacheGeneration.generation + 1
+    if dialect == 'mysql':
+        return mysql.insert(ResponseCacheGeneration).values(tag=tag, generation=1).on_duplicate_key_update(
+            generation=next_generation
+        )
+    dialect_module = postgresql if dialect == 'postgresql' else sqlite
+    return dialect_module.insert(ResponseCacheGeneration).values(tag=tag, generation=1).on_conflict_do_update(
+        index_elements=[ResponseCacheGeneration.tag], set_={'generation': next_generation}
+    )
+
+
+class RedisResponseCache(ResponseCache):
+    """Cache shared by every worker in a Redis-compatible server
+
+    Eviction is left to the server (TTL per key, maxmemory-policy for LRU).
+    """
+
+    def __init__(self, url, ttl_seconds=300, prefix='exam-orchestrator:'):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError('RESPONSE_CACHE_BACKEND=redis requires the redis package')
+        self.client = redis.Redis.from_url(url)
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+
+    def get(self, key):
+        return self.client.get(self.prefix + key)
+
+    def set(self, key, body):
+        self.client.set(self.prefix + key, body, ex=self.ttl_seconds)
+
+    def generations(self, tags):
+        values = self.client.mget([f'{self.prefix}gen:{tag}' for tag in tags])
+        return [int(value) if value else 0 for value in values]
+
+    def invalidate(self, tags):
+        pipeline = self.client.pipeline()
+        for tag in tags:
+            pipeline.incr(f'{self.prefix}gen:{tag}')
+        pipeline.execute()
+
+
+def create_response_cache(app_config):
+    """Cache backend selected by RESPONSE_CACHE_BACKEND (local, redis or none)"""
+    backend = app_config.get('RESPONSE_CACHE_BACKEND', 'local')
+    ttl_seconds = app_config.get('RESPONSE_CACHE_TTL_SECONDS', 300)
+
+    if backend == 'none':
+        return None
+    if backend == 'redis':
+        return RedisResponseCache(app_config['RESPONSE_CACHE_URL'], ttl_seconds)
+    if backend == 'local':
+        return LocalResponseCache(app_config.get('RESPONSE_CACHE_MAX_ENTRIES', 256), ttl_seconds)
+    raise ValueError(f'Unknown RESPONSE_CACHE_BACKEND: {backend}')
+
+def get_response_cache():
+    """Response cache of the current app, created on first use"""
+    if 'response_cache' not in current_app.extensions:
+        current_app.extensions['response_cache'] = create_response_cache(current_app.config)
+    return current_app.extensions['response_cache']
+
+def invalidate_departments(department_ids=None):
+    """Drop cached responses of the given departments, or all of them for None"""
+    cache = get_response_cache()
+    if cache is None:
+        return
+    if department_ids is None:
+        cache.invalidate([GLOBAL_TAG])
+    else:
+        cache.invalidate([department_tag(department_id) for department_id in department_ids] + [ALL_DEPARTMENTS_TAG])
+
+def cached_response(department_of):
+    """Cache a JSON view's 200 responses per path and query string
+
+    department_of(view_kwargs) returns the department the response covers,
+    or None when it spans every department.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            cache = get_response_cache()
+            if cache is None:
+                return view(*args, **kwargs)
+
+            department_id = department_of(kwargs)
+            scope_tag = ALL_DEPARTMENTS_TAG if department_id in (None, '') else department_tag(department_id)
+            tags = [GLOBAL_TAG, scope_tag]
+            generations = '.'.join(str(generation) for generation in cache.generations(tags))
+            query = '&'.join(f'{name}={value}' for name, value in sorted(request.args.items(multi=True)))
+            key = f'{request.path}?{query}#{scope_tag}@{generations}'
+
+            body = cache.get(key)
+            if body is not None:
+                return Response(body, 200, mimetype='application/json')
+
+            response = current_app.make_response(view(*args, **kwargs))
+            if response.status_code == 200:
+                cache.set(key, response.get_data())
+            return response
+        return wrapper
+    return decorator
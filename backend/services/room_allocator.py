@@ -0,0 +1,59 @@
+class RoomAllocator:
+    """Pick the room set that seats an exam with the fewest rooms and empty seats
+
+    Solves a small 0/1 knapsack over seat totals for each request. Results
+    are cached per (free room IDs, student count), so repeated checks of the
+    same slot situation are dictionary lookups.
+    """
+
+    def __init__(self):
+        # (sorted room IDs, required capacity, max rooms) -> chosen room IDs
+        self._cache = {}
+        self.hits = 0
+        self.misses = 0
+
+    def allocate(self, rooms, required_capacity, max_rooms=None):
+        """Return the best room combination (largest room first), or [] if none seats everyone"""
+        rooms_by_id = {room.id: room for room in rooms}
+        if not rooms_by_id:
+            return []
+
+        key = (tuple(sorted(rooms_by_id)), required_capacity, max_rooms)
+        room_ids = self._cache.get(key)
+        if room_ids is None:
+            self.misses += 1
+            room_ids = self._solve(rooms_by_id.values(), required_capacity, max_rooms)
+            self._cache[key] = room_ids
+        else:
+            self.hits += 1
+
+        return [rooms_by_id[room_id] for room_id in room_ids]
+
+    def _solve(self, rooms, required_capacity, max_rooms):
+        """Minimize (room count, wasted seats) over room subsets that fit everyone"""
+        # Largest first, so ties keep the biggest room as the primary room
+        ordered = sorted(rooms, key=lambda r: (-r.capacity, r.id))
+
+        # Seat total still short of the requirement -> fewest rooms reaching it.
+        # An optimal set only crosses the requirement with its last room, so
+        # totals at or above it never need to be extended.
+        partial = {0: ()}
+        best = None  # (room count, wasted seats, room IDs)
+
+        for room in ordered:
+            for total, room_ids in list(partial.items()):
+                if max_rooms and len(room_ids) >= max_rooms:
+                    continue
+
+                new_total = total + room.capacity
+                new_ids = room_ids + (room.id,)
+                if new_total >= required_capacity:
+                    candidate = (len(new_ids), new_total - required_capacity, new_ids)
+                    if best is None or candidate[:2] < best[:2]:
+                        best = candidate
+                else:
+                    current = partial.get(new_total)
+                    if current is None or len(new_ids) < len(current):
+                        partial[new_total] = new_ids
+
+        return best[2] if best else ()
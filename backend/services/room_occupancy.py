@@ -0,0 +1,89 @@
+from database import db
+from models import ScheduleRoomAssignment
+from utils.time_grid import mask_to_intervals, time_interval_mask
+
+
+class RoomOccupancyIndex:
+    """In-memory index of room usage, keyed by room ID and date"""
+
+    def __init__(self):
+        # {room_id: {date: occupied cell bitmask}}, see utils.time_grid
+        self.masks = {}
+        # Usage loaded from the database: {(room_id, date): mask}
+        self.base_masks = {}
+        # Usage placed during this run: {(room_id, date): {owner: mask}}
+        self.placed = {}
+        self.loaded_range = None
+
+    def load(self, start_date, end_date, exclude_schedule_ids=None):
+        """Load every schedule in the date range with a single query
+
+        Schedules in exclude_schedule_ids are left out, e.g. the ones a
+        caller re-places itself.
+        """
+        self.masks = {}
+        self.base_masks = {}
+        self.placed = {}
+
+        # One row per room an exam uses, primary and additional alike
+        assignments = db.session.query(
+            ScheduleRoomAssignment.room_id,
+            ScheduleRoomAssignment.scheduled_date,
+            ScheduleRoomAssignment.start_time,
+            ScheduleRoomAssignment.end_time
+        ).filter(
+            ScheduleRoomAssignment.scheduled_date >= start_date,
+            ScheduleRoomAssignment.scheduled_date <= end_date
+        )
+        if exclude_schedule_ids:
+            assignments = assignments.filter(ScheduleRoomAssignment.schedule_id.notin_(list(exclude_schedule_ids)))
+        assignments = assignments.all()
+
+        for room_id, scheduled_date, start_time, end_time in assignments:
+            self.add([room_id], scheduled_date, start_time, end_time)
+
+        self.loaded_range = (start_date, end_date)
+        return len(assignments)
+
+    def covers(self, target_date):
+        """Check if the loaded range contains the given date"""
+        if not self.loaded_range:
+            return False
+        return self.loaded_range[0] <= target_date <= self.loaded_range[1]
+
+    def add(self, room_ids, target_date, start_time, end_time, owner=None):
+        """Mark rooms as occupied for the given interval
+
+        Usage added with an owner (e.g. an exam ID) can later be removed.
+        """
+        mask = time_interval_mask(start_time, end_time)
+        for room_id in room_ids:
+            room_days = self.masks.setdefault(room_id, {})
+            room_days[target_date] = room_days.get(target_date, 0) | mask
+
+            key = (room_id, target_date)
+            if owner is None:
+                self.base_masks[key] = self.base_masks.get(key, 0) | mask
+            else:
+                self.placed.setdefault(key, {})[owner] = mask
+
+    def remove(self, room_ids, target_date, owner):
+        """Release rooms held by an owner, rebuilding only the touched room-days"""
+        for room_id in room_ids:
+            key = (room_id, target_date)
+            owners = self.placed.get(key, {})
+            owners.pop(owner, None)
+
+            mask = self.base_masks.get(key, 0)
+            for owner_mask in owners.values():
+                mask |= owner_mask
+            self.masks.setdefault(room_id, {})[target_date] = mask
+
+    def is_available(self, room_id, target_date, start_time, end_time):
+        """Check if room is free for the whole interval"""
+        occupied = self.masks.get(room_id, {}).get(target_date, 0)
+        return occupied & time_interval_mask(start_time, end_time) == 0
+
+    def busy_intervals(self, room_id, target_date):
+        """Occupied (start_minutes, end_minutes) runs for a room on a date"""
+        return mask_to_intervals(self.masks.get(room_id, {}).get(target_date, 0))
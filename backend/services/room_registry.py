@@ -0,0 +1,77 @@
+from flask import g
+
+from database import db
+from models import Room
+
+
+def normalize_room_name(room_name):
+    """Room names are compared without surrounding whitespace"""
+    return (room_name or '').strip()
+
+
+class RoomRecord:
+    """Compact copy of the room fields the schedulers read"""
+
+    __slots__ = ('id', 'name', 'capacity', 'has_computer', 'department_id', 'is_active')
+
+    def __init__(self, id, name, capacity, has_computer, department_id=None, is_active=True):
+        self.id = id
+        self.name = name
+        self.capacity = capacity
+        self.has_computer = has_computer
+        self.department_id = department_id
+        self.is_active = is_active
+
+
+class RoomRegistry:
+    """Every room loaded with one query, looked up by normalized name"""
+
+    def __init__(self):
+        self.rooms = []
+        self._active_by_name = {}
+        self._by_department_name = {}
+
+        rows = db.session.query(
+            Room.id, Room.name, Room.capacity, Room.has_computer, Room.department_id, Room.is_active
+        ).order_by(Room.id).all()
+        for room_id, name, capacity, has_computer, department_id, is_active in rows:
+            self._add(RoomRecord(room_id, name, capacity, bool(has_computer), department_id, bool(is_active)))
+
+    def _add(self, record):
+        self.rooms.append(record)
+        name = normalize_room_name(record.name)
+        # The lowest ID wins when names repeat, as with an ordered .first()
+        if record.is_active:
+            self._active_by_name.setdefault(name, record)
+        self._by_department_name.setdefault((record.department_id, name), record)
+
+    def register(self, room):
+        """Add a room created during this request (after flush, so it has an ID)"""
+        record = RoomRecord(room.id, room.name, room.capacity, bool(room.has_computer),
+                            room.department_id, room.is_active is not False)
+        self._add(record)
+        return record
+
+    def get_active(self, room_name):
+        """Active room with the given name, or None"""
+        return self._active_by_name.get(normalize_room_name(room_name))
+
+    def active_rooms(self):
+        """All active rooms ordered by ID"""
+        return [room for room in self.rooms if room.is_active]
+
+    def find(self, room_name, department_id):
+        """Room of a department with the given name, active or not"""
+        return self._by_department_name.get((department_id, normalize_room_name(room_name)))
+
+
+def get_room_registry():
+    """Room registry of the current request, loaded on first use"""
+    if 'room_registry' not in g:
+        g.room_registry = RoomRegistry()
+    return g.room_registry
+
+
+def invalidate_room_registry():
+    """Drop the cached rooms after rooms are created, updated or deleted"""
+    g.pop('room_registry', None)
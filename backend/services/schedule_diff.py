@@ -0,0 +1,128 @@
+from sqlalchemy.orm import selectinload
+
+from database import db
+from models import ExamSchedule, ScheduleRoomAssignment
+from utils.time_grid import CELL_MINUTES, interval_mask, time_to_minutes
+
+
+def _placement_of(schedule):
+    """(date, start_time, end_time, room IDs) of a persisted schedule"""
+    return (schedule.scheduled_date, schedule.start_time, schedule.end_time,
+            tuple(assignment.room_id for assignment in schedule.room_assignments))
+
+def _placement_data(placement):
+    target_date, start_time, end_time, room_ids = placement
+    return {
+        'date': target_date.strftime('%d/%m/%Y'),
+        'scheduled_date': target_date.isoformat(),
+        'start_time': start_time.isoformat(),
+        'end_time': end_time.isoformat(),
+        'room_ids': list(room_ids)
+    }
+
+def _minutes(start_time, end_time):
+    return time_to_minutes(end_time) - time_to_minutes(start_time)
+
+def _bookable_minutes(time_grid, exam_dates):
+    """Minutes a room can host exams over the exam dates (working hours minus breaks)"""
+    total = 0
+    for target_date in exam_dates:
+        free = interval_mask(time_grid.day_start, time_grid.day_end) & ~time_grid.blocked_mask(target_date)
+        total += bin(free).count('1') * CELL_MINUTES
+    return total
+
+def build_schedule_diff(scheduler, exams, exam_dates, replace_existing=False):
+    """Diff of a dry run's in-memory placements against the persisted schedule
+
+    exams are the records of the run. A candidate placement supersedes the
+    exam's persisted schedule; with replace_existing the persisted schedules
+    of failed exams are dropped too (force_regenerate).
+    """
+    exam_ids = [exam.id for exam in exams]
+    persisted = {}
+    if exam_ids:
+        schedules = ExamSchedule.query.options(selectinload(ExamSchedule.room_assignments)).filter(
+            ExamSchedule.exam_id.in_(exam_ids)
+        ).order_by(ExamSchedule.id).all()
+        for schedule in schedules:
+            persisted.setdefault(schedule.exam_id, []).append(schedule)
+
+    placed = []
+    moved = []
+    failed = []
+    unchanged_count = 0
+    # Room minutes removed and added by the candidate: {room_id: minutes}
+    delta_minutes = {}
+
+    for exam in exams:
+        summary = {'exam_id': exam.id, 'course_code': exam.course_code, 'department_id': exam.department_id}
+        candidate = scheduler.placements.get(exam.id)
+        previous = [_placement_of(schedule) for schedule in persisted.get(exam.id, [])]
+
+        if candidate is not None or replace_existing:
+            for target_date, start_time, end_time, room_ids in previous:
+                for room_id in room_ids:
+                    delta_minutes[room_id] = delta_minutes.get(room_id, 0) - _minutes(start_time, end_time)
+        if candidate is not None:
+            target_date, start_time, end_time, room_ids = candidate
+            for room_id in room_ids:
+                delta_minutes[room_id] = delta_minutes.get(room_id, 0) + _minutes(start_time, end_time)
+
+        if candidate is None:
+            summary['previous'] = _placement_data(previous[0]) if previous else None
+            failed.append(summary)
+        elif not previous:
+            summary.update(_placement_data(candidate))
+            placed.append(summary)
+        elif previous[0] == candidate:
+            unchanged_count += 1
+        else:
+            summary['from'] = _placement_data(previous[0])
+            summary['to'] = _placement_data(candidate)
+            moved.append(summary)
+
+    return {
+        'placed': placed,
+        'moved': moved,
+        'failed': failed,
+        'unchanged_count': unchanged_count,
+        'room_utilization': _room_utilization(scheduler, exam_dates, delta_minutes)
+    }
+
+def _room_utilization(scheduler, exam_dates, delta_minutes):
+    """Booked minutes and share of bookable time, before and after, for each room the candidate changes"""
+    changed_room_ids = [room_id for room_id, minutes in sorted(delta_minutes.items()) if minutes]
+    if not changed_room_ids:
+        return []
+
+    # Persisted usage of the exam week, every exam included
+    before_minutes = dict.fromkeys(changed_room_ids, 0)
+    rows = db.session.query(
+        ScheduleRoomAssignment.room_id,
+        ScheduleRoomAssignment.start_time,
+        ScheduleRoomAssignment.end_time
+    ).filter(
+        ScheduleRoomAssignment.room_id.in_(changed_room_ids),
+        ScheduleRoomAssignment.scheduled_date >= exam_dates[0],
+        ScheduleRoomAssignment.scheduled_date <= exam_dates[-1]
+    ).all()
+    for room_id, start_time, end_time in rows:
+        before_minutes[room_id] += _minutes(start_time, end_time)
+
+    bookable = _bookable_minutes(scheduler.time_grid, exam_dates)
+    rooms_by_id = scheduler.problem.rooms_by_id
+    utilization = []
+    for room_id in changed_room_ids:
+        before = before_minutes[room_id]
+        after = before + delta_minutes[room_id]
+        room = rooms_by_id.get(room_id)
+        utilization.append({
+            'room_id': room_id,
+            'room_name': room.name if room else None,
+            'before_minutes': before,
+            'after_minutes': after,
+            'delta_minutes': after - before,
+            'before_utilization': round(before / bookable, 3) if bookable else None,
+            'after_utilization': round(after / bookable, 3) if bookable else None
+        })
+    return utilization
@@ -0,0 +1,96 @@
+from functools import wraps
+
+from flask import has_app_context, make_response, request
+from sqlalchemy import event, select, update
+from sqlalchemy.orm import Session
+
+from database import db
+from models import ScheduleVersion
+from services.response_cache import get_response_cache, invalidate_departments
+
+VERSION_ROW_ID = 1
+
+
+def current_schedule_version():
+    """Current schedule version, read with one primary-key lookup"""
+    version = db.session.execute(
+        select(ScheduleVersion.version).where(ScheduleVersion.id == VERSION_ROW_ID)
+    ).scalar()
+    return version or 0
+
+def bump_schedule_version(department_ids=None):
+    """Increment the schedule version inside the current transaction
+
+    Call it before the commit of the write it versions, so both become
+    visible together. The UPDATE is atomic, so concurrent writers never
+    hand out the same version twice. The row is created with the table
+    (or by migrate_schedule_version.py), never here. Cached responses of
+    department_ids (every department for None) are invalidated with the
+    commit, or once it succeeds for caches kept outside the database.
+    """
+    result = db.session.execute(
+        update(ScheduleVersion)
+        .where(ScheduleVersion.id == VERSION_ROW_ID)
+        .values(version=ScheduleVersion.version + 1)
+    )
+    if result.rowcount == 0:
+        raise RuntimeError('schedule_version row missing; run migrate_schedule_version.py')
+
+    cache = get_response_cache()
+    if cache is not None and cache.invalidates_in_transaction:
+        # Committed or rolled back together with the write itself; sorted to lock rows in one order
+        invalidate_departments(None if department_ids is None else sorted(
+            {int(department_id) for department_id in department_ids if department_id is not None}
+        ))
+        return
+
+    info = db.session.info
+    if department_ids is None:
+        info['invalidate_all_departments'] = True
+    else:
+        info.setdefault('invalidate_departments', set()).update(
+            int(department_id) for department_id in department_ids if department_id is not None
+        )
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_committed_departments(session):
+    invalidate_all = session.info.pop('invalidate_all_departments', False)
+    department_ids = session.info.pop('invalidate_departments', None)
+    if not has_app_context():
+        return
+    if invalidate_all:
+        invalidate_departments()
+    elif department_ids:
+        invalidate_departments(sorted(department_ids))
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_rolled_back_departments(session):
+    session.info.pop('invalidate_all_departments', None)
+    session.info.pop('invalidate_departments', None)
+
+def schedule_etag(version):
+    return f'schedule-v{version}'
+
+def versioned_by_schedule(view):
+    """Serve a read endpoint with the schedule version as strong ETag
+
+    A request whose If-None-Match matches gets 304 before the view runs.
+    The version is read before the view, so a write racing the request
+    at worst makes the client fetch the same data once more.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        etag = schedule_etag(current_schedule_version())
+
+        if etag in request.if_none_match:
+            response = make_response('', 304)
+        else:
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+
+        response.set_etag(etag)
+        # Let browsers keep the body but revalidate on every poll
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+    return wrapper
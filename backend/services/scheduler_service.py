@@ -1,26 +1,42 @@
+import logging
 from datetime import date, datetime, time, timedelta
 
 from database import db
 from models import Exam, ExamSchedule, Room, Settings
 from services.advanced_scheduler import AdvancedSchedulerService
+from services.event_broker import deleted_schedule_delta, queue_schedule_event
+from services.schedule_diff import build_schedule_diff
+from services.schedule_version import bump_schedule_version
+from utils.time_grid import minutes_to_time, time_to_minutes
+
+logger = logging.getLogger(__name__)
 
 
 class SchedulerService(AdvancedSchedulerService):
-    def __init__(self):
-        # Define working hours
-        self.working_hours_start = time(9, 0)  # 09:00 AM
-        self.working_hours_end = time(17, 0)   # 05:00 PM
-        
-        # Lunch break
-        self.lunch_break_start = time(12, 15)
-        self.lunch_break_end = time(13, 0)
-        
-        # Friday prayer time
-        self.friday_prayer_start = time(12, 0)
-        self.friday_prayer_end = time(13, 30)
+    # Scheduler variant rebuilt inside multi-start worker processes
+    snapshot_kind = 'standard'
 
-    def generate_schedule(self, force_regenerate=False, department_id=None):
-        """Generate automatic schedule for pending exams with advanced rules"""
+    # Fixed slots, one room per exam, no gap or class level rule (see the _check_* overrides)
+    enforces_time_gap = False
+    enforces_class_level_conflicts = False
+    max_rooms_per_exam = 1
+
+    def __init__(self):
+        # Working hours, lunch break, Friday prayer and time grid come from the base scheduler
+        super().__init__()
+
+    def generate_schedule(self, force_regenerate=False, department_id=None, solver='greedy', solver_time_limit=30,
+                          time_budget_ms=0, restarts=None, dry_run=False):
+        """Generate automatic schedule for pending exams with advanced rules
+
+        solver='cpsat' replaces the greedy pass with ExactSolverService;
+        solver='multistart' keeps the best of `restarts` randomized orderings;
+        solver='partitioned' solves independent room-sharing components concurrently.
+        A positive time_budget_ms runs a local-search improvement phase after
+        the greedy pass. dry_run=True saves nothing and returns the candidate
+        schedule as a diff against the persisted one.
+        """
+        self.dry_run = dry_run
         try:
             # Get exam week settings
             exam_week = self._get_exam_week_settings()
@@ -47,28 +63,85 @@ class SchedulerService(AdvancedSchedulerService):
                 }
 
             # If force regenerate, clear existing schedules for these exams
-            if force_regenerate:
-                for exam in pending_exams:
-                    if exam.exam_schedule:
-                        db.session.delete(exam.exam_schedule)
-                        exam.status = 'pending'
+            replaced_schedule_ids = None
+            if force_regenerate and dry_run:
+                # Keep them saved; plan as if they were gone
+                replaced_schedule_ids = self._schedule_ids_of([exam.id for exam in pending_exams])
+            elif force_regenerate:
+                # One query for every schedule; room assignments go with them
+                departments = {exam.id: exam.department_id for exam in pending_exams}
+                for schedule in ExamSchedule.query.filter(ExamSchedule.exam_id.in_(list(departments))).all():
+                    queue_schedule_event('schedule_deleted',
+                                         deleted_schedule_delta(schedule, departments[schedule.exam_id]))
+                    db.session.delete(schedule)
+                bump_schedule_version({exam.department_id for exam in pending_exams})
                 db.session.commit()
 
             scheduled_count = 0
             failed_count = 0
             failed_exams = []
 
-            # Sort exams by priority with new rules
-            sorted_exams = self._prioritize_exams_advanced(pending_exams)
+            # Load room usage once; every availability check hits the index
+            self._load_room_occupancy(exam_week['start_date'], exam_week['end_date'], replaced_schedule_ids)
+
+            # Every weekday of the exam week
+            exam_dates = []
+            current_date = exam_week['start_date']
+            while current_date <= exam_week['end_date']:
+                if current_date.weekday() < 5:
+                    exam_dates.append(current_date)
+                current_date += timedelta(days=1)
+
+            # Snapshot the exams, sorted by priority with new rules
+            sorted_exams = self._load_snapshot(pending_exams, exam_dates)
 
             # Track daily schedules for constraint checking
             daily_schedules = {}
-
-            for exam in sorted_exams:
-                success, reason = self._schedule_exam_advanced(exam, exam_week, daily_schedules)
-                if success:
-                    scheduled_count += 1
+            improvement = None
+
+            if solver in ('cpsat', 'multistart', 'partitioned'):
+                self._report_progress('solving', total=len(sorted_exams), placed=0, failed=0)
+                if solver == 'cpsat':
+                    # Solve the whole week at once
+                    solver_result = self._schedule_with_solver(sorted_exams, exam_dates, daily_schedules, solver_time_limit)
+                elif solver == 'partitioned':
+                    # Independent room-sharing components are solved concurrently
+                    solver_result = self._schedule_partitioned(sorted_exams, exam_dates, daily_schedules)
                 else:
+                    # Keep the best of several randomized greedy orderings
+                    solver_result = self._schedule_with_multi_start(sorted_exams, exam_dates, daily_schedules, restarts)
+                if not solver_result['success']:
+                    db.session.rollback()
+                    return {
+                        'success': False,
+                        'message': solver_result['message']
+                    }
+
+                scheduled_count = len(solver_result['scheduled'])
+                outcomes = [(exam, False, reason) for exam, reason in solver_result['failed']]
+            else:
+                outcomes = []
+                placed = 0
+                self._report_progress('placing', total=len(sorted_exams), placed=0, failed=0)
+                for exam in sorted_exams:
+                    success, reason = self._schedule_exam_advanced(exam, exam_week, daily_schedules)
+                    outcomes.append((exam, success, reason))
+                    placed += 1 if success else 0
+                    self._report_progress('placing', placed=placed, failed=len(outcomes) - placed)
+
+                if time_budget_ms and time_budget_ms > 0:
+                    self._report_progress('improving', placed=placed, failed=len(outcomes) - placed)
+                    # Like the greedy pass, each exam may only move among its own valid preferred dates
+                    allowed_dates = {exam.id: self._get_valid_preferred_dates(exam, exam_week) for exam in sorted_exams}
+                    improvement = self._run_improvement_phase(sorted_exams, exam_dates, daily_schedules, time_budget_ms,
+                                                              allowed_dates)
+                    outcomes = [(exam, exam.id in self.placements, reason) for exam, _, reason in outcomes]
+
+                scheduled_count = sum(1 for _, success, _ in outcomes if success)
+
+            for exam, success, reason in outcomes:
+                if not success:
+                    exam = self.exam_rows[exam.id]
                     failed_count += 1
                     failed_exams.append({
                         'id': exam.id,
@@ -78,15 +151,28 @@ class SchedulerService(AdvancedSchedulerService):
                         'reason': reason
                     })
 
-            db.session.commit()
+            if dry_run:
+                # Nothing was added to the session; compare with what is saved instead
+                diff = build_schedule_diff(self, sorted_exams, exam_dates, replace_existing=force_regenerate)
+            else:
+                self._report_progress('committing', placed=scheduled_count, failed=failed_count)
+                self._queue_created_schedule_events()
+                bump_schedule_version({exam.department_id for exam in pending_exams})
+                db.session.commit()
 
-            return {
+            result = {
                 'success': True,
                 'message': f'Scheduling completed. {scheduled_count} exams scheduled, {failed_count} failed.',
                 'scheduled_count': scheduled_count,
                 'failed_count': failed_count,
                 'failed_exams': failed_exams
             }
+            if improvement:
+                result['score_trajectory'] = improvement['score_trajectory']
+            if dry_run:
+                result['message'] = f'Dry run: {scheduled_count} exams would be scheduled, {failed_count} would fail. Nothing was saved.'
+                result['diff'] = diff
+            return result
 
         except Exception as e:
             db.session.rollback()
@@ -154,6 +240,23 @@ class SchedulerService(AdvancedSchedulerService):
 
         return sorted(exams, key=priority_key, reverse=True)
 
+    def _order_exams(self, exams):
+        """Sort exams by priority with advanced rules"""
+        return self._prioritize_exams_advanced(exams)
+
+    def _place_exam_greedy(self, exam, exam_dates, daily_schedules):
+        """Place one exam on its valid preferred dates
+
+        Returns (scheduled_date, on_preferred_date, failure_reason).
+        """
+        exam_week = {'start_date': exam_dates[0], 'end_date': exam_dates[-1]}
+        success, reason = self._schedule_exam_advanced(exam, exam_week, daily_schedules)
+        if not success:
+            return None, False, reason
+
+        scheduled_date = self.placements[exam.id][0]
+        return scheduled_date, scheduled_date in self._get_valid_preferred_dates(exam, exam_week), None
+
     def _schedule_exam_advanced(self, exam, exam_week, daily_schedules):
         """Try to schedule a single exam with advanced constraints"""
         # Get valid preferred dates
@@ -211,6 +314,19 @@ class SchedulerService(AdvancedSchedulerService):
 
         return preferred_dates
 
+    def _candidate_slots(self, exam, target_date):
+        """Fixed slots of the day that fit the exam and the time rules"""
+        slots = []
+        for start_time in self._get_possible_start_times(target_date, exam.duration):
+            end_time = self._calculate_end_time(start_time, exam.duration)
+            if self._check_time_slot_rules(target_date, start_time, end_time):
+                slots.append((start_time, end_time))
+        return slots
+
+    def _candidate_dates(self, exam, exam_dates):
+        """Valid preferred dates of the exam, or the whole week without any"""
+        return self._get_valid_preferred_dates(exam, {'start_date': exam_dates[0], 'end_date': exam_dates[-1]})
+
     def _get_time_slots_for_date(self, target_date):
         """Get appropriate time slots for a specific date"""
         if target_date.weekday() == 4:  # Friday
@@ -220,85 +336,7 @@ class SchedulerService(AdvancedSchedulerService):
 
     def _calculate_end_time(self, start_time, duration_minutes):
         """Calculate end time based on start time and duration"""
-        start_datetime = datetime.combine(date.today(), start_time)
-        end_datetime = start_datetime + timedelta(minutes=duration_minutes)
-        return end_datetime.time()
-
-    def _check_time_slot_rules(self, target_date, start_time, end_time):
-        """Check time slot constraints"""
-        # Check if exam is within working hours (9 AM - 5 PM)
-        working_hours_start = time(9, 0)
-        working_hours_end = time(17, 0)
-
-        if start_time < working_hours_start or end_time > working_hours_end:
-            return False
-
-        # Rule 1: No exams during lunch break (12:15-13:00)
-        lunch_break_start = time(12, 15)
-        lunch_break_end = time(13, 0)
-        if (start_time < lunch_break_end and end_time > lunch_break_start):
-            return False
-
-        # Rule 2: Friday prayer time restriction (12:00-13:30)
-        if target_date.weekday() == 4:  # Friday
-            friday_prayer_start = time(12, 0)
-            friday_prayer_end = time(13, 30)
-            if (start_time < friday_prayer_end and end_time > friday_prayer_start):
-                return False
-
-        return True
-
-    def _check_difficulty_level_rules(self, exam, target_date, daily_schedules):
-        """Check difficulty level constraints based on user-defined Excel input"""
-        # Get existing schedules for the day
-        date_key = target_date.strftime('%Y-%m-%d')
-        if date_key not in daily_schedules:
-            return True
-
-        # Updated Rules based on user requirements:
-        # 1. "Zor" (hard) sınavlar - o gün başka hiçbir sınav yapılamaz
-        # 2. "Orta" (normal) sınavlar - aynı gün birden fazla orta sınav olabilir + kolay sınavlar da eklenebilir
-        # 3. "Kolay" (easy) sınavlar - birden fazla olabilir (zor yoksa)
-
-        difficulty_counts = {
-            'hard': 0,      # Zor
-            'normal': 0,    # Orta
-            'easy': 0       # Kolay
-        }
-
-        # Count existing exams by difficulty
-        for scheduled_exam in daily_schedules[date_key]:
-            difficulty = getattr(scheduled_exam, 'difficulty_level', 'normal')
-            # Map old difficulty levels to new system
-            if difficulty == 'very_hard':
-                difficulty = 'hard'
-            difficulty_counts[difficulty] = difficulty_counts.get(difficulty, 0) + 1
-
-        # Check constraints for the new exam
-        exam_difficulty = getattr(exam, 'difficulty_level', 'normal')
-        if exam_difficulty == 'very_hard':
-            exam_difficulty = 'hard'
-
-        print(f"DEBUG: Checking difficulty rules for {exam.course.code if exam.course else 'Unknown'}")
-        print(f"DEBUG: Exam difficulty: {exam_difficulty}")
-        print(f"DEBUG: Existing counts: {difficulty_counts}")
-
-        if exam_difficulty == 'hard':  # Zor sınav
-            # Zor sınav varsa o gün başka hiçbir sınav yapılamaz
-            total_existing = difficulty_counts['hard'] + difficulty_counts['normal'] + difficulty_counts['easy']
-            result = total_existing == 0
-            print(f"DEBUG: Hard exam check - total existing: {total_existing}, result: {result}")
-            return result
-        elif exam_difficulty == 'normal':  # Orta sınav
-            # Orta sınavlar: Zor sınav yoksa birden fazla orta + kolay olabilir
-            result = difficulty_counts['hard'] == 0
-            print(f"DEBUG: Normal exam check - hard count: {difficulty_counts['hard']}, result: {result}")
-            return result
-        else:  # easy - Kolay sınav
-            # Kolay sınavlar: Zor sınav yoksa birden fazla olabilir
-            result = difficulty_counts['hard'] == 0
-            print(f"DEBUG: Easy exam check - hard count: {difficulty_counts['hard']}, result: {result}")
-            return result
+        return minutes_to_time(time_to_minutes(start_time) + duration_minutes)
 
     def _check_class_level_conflicts(self, exam, target_date, start_time, end_time, daily_schedules):
         """Check class level conflict constraints - SIMPLIFIED"""
@@ -355,27 +393,31 @@ class SchedulerService(AdvancedSchedulerService):
 
         # Check which slots can accommodate the exam duration
         for start_time, slot_end_time in time_slots:
-            # Calculate if exam fits in this slot
-            exam_end_time = (datetime.combine(date.today(), start_time) +
-                           timedelta(minutes=duration)).time()
-
-            if exam_end_time <= time(17, 0):  # Must end by 5 PM
+            # Must end by 5 PM
+            if time_to_minutes(start_time) + duration <= self.time_grid.day_end:
                 possible_times.append(start_time)
 
         return possible_times
 
+    def _get_candidate_rooms(self, exam):
+        """Get active rooms the exam may use, falling back to all rooms"""
+        if getattr(exam, 'available_rooms', None):
+            return super()._get_candidate_rooms(exam)
+
+        return [room for room in self._get_active_rooms() if room.has_computer or not exam.needs_computer]
+
     def _find_suitable_rooms(self, exam, target_date, start_time, end_time):
         """Find suitable rooms for the exam"""
         # Get available rooms from exam's available_rooms list
         available_room_names = getattr(exam, 'available_rooms', [])
         if not available_room_names:
             # Fallback to all rooms if no specific rooms defined
-            available_rooms = Room.query.filter_by(is_active=True).all()
+            available_rooms = self._get_active_rooms()
         else:
             # Get room objects that match the names
             available_rooms = []
             for room_name in available_room_names:
-                room = Room.query.filter_by(name=room_name.strip(), is_active=True).first()
+                room = self._get_room_by_name(room_name)
                 if room:
                     available_rooms.append(room)
 
@@ -394,7 +436,8 @@ class SchedulerService(AdvancedSchedulerService):
             if self._is_room_available(room.id, target_date, start_time, end_time):
                 suitable_rooms.append(room)
 
-        return suitable_rooms[:1] if suitable_rooms else []  # Return first suitable room
+        # Single room with the fewest empty seats
+        return self.room_allocator.allocate(suitable_rooms, exam.student_count, max_rooms=1)
 
     def _create_exam_schedule(self, exam, rooms, target_date, start_time, end_time, daily_schedules):
         """Create exam schedule with room assignments"""
@@ -402,31 +445,35 @@ class SchedulerService(AdvancedSchedulerService):
             if not rooms:
                 return False
 
-            # Use the first room
+            if self.dry_run:
+                self._record_placement(exam, rooms, target_date, start_time, end_time, daily_schedules)
+                return True
+
+            # Use the first room; any further rooms (exact solver) become additional rooms
             room = rooms[0]
 
             schedule = ExamSchedule(
                 exam_id=exam.id,
-                room_id=room.id,
                 scheduled_date=target_date,
                 start_time=start_time,
                 end_time=end_time
             )
+            schedule.assign_rooms(rooms, exam.student_count)
 
             db.session.add(schedule)
-            exam.status = 'planned'
+            self.exam_rows[exam.id].status = 'planned'
+            self.created_schedules[exam.id] = schedule
 
-            # Update daily schedules tracking
-            date_key = target_date.strftime('%Y-%m-%d')
-            if date_key not in daily_schedules:
-                daily_schedules[date_key] = []
-            daily_schedules[date_key].append(exam)
+            # Block rooms and update daily schedules tracking
+            self._record_placement(exam, rooms, target_date, start_time, end_time, daily_schedules)
+            self._report_placement(exam, rooms, target_date, start_time, end_time)
 
-            print(f"DEBUG: Scheduled {exam.course.code if exam.course else 'Unknown'} on {target_date} at {start_time}-{end_time} in {room.name}")
+            logger.debug("Scheduled %s on %s at %s-%s in %s",
+                         exam.course_code or 'Unknown', target_date, start_time, end_time, room.name)
             return True
 
         except Exception as e:
-            print(f"Error creating exam schedule: {str(e)}")
+            logger.exception("Error creating exam schedule: %s", e)
             return False
 
     def _schedule_exam(self, exam, exam_week):
@@ -506,32 +553,3 @@ class SchedulerService(AdvancedSchedulerService):
                 return room
 
         return None
-
-    def _is_room_available(self, room_id, target_date, start_time, end_time):
-        """Check if room is available at the given time"""
-        # Check for overlapping schedules
-        overlapping = ExamSchedule.query.filter(
-            ExamSchedule.room_id == room_id,
-            ExamSchedule.scheduled_date == target_date,
-            db.or_(
-                # New exam starts during existing exam
-                db.and_(
-                    ExamSchedule.start_time <= start_time,
-                    ExamSchedule.end_time > start_time
-                ),
-                # New exam ends during existing exam
-                db.and_(
-                    ExamSchedule.start_time < end_time,
-                    ExamSchedule.end_time >= end_time
-                ),
-                # New exam completely contains existing exam
-                db.and_(
-                    ExamSchedule.start_time >= start_time,
-                    ExamSchedule.end_time <= end_time
-                )
-            )
-        ).first()
-
-        return overlapping is None
-
-
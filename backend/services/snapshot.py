@@ -0,0 +1,78 @@
+from database import db
+from models import Course, Exam
+from services.room_registry import get_room_registry
+
+
+class ExamRecord:
+    """Compact copy of the exam fields the schedulers read"""
+
+    __slots__ = ('id', 'course_code', 'class_name', 'student_count', 'duration', 'needs_computer',
+                 'preferred_dates', 'available_rooms', 'difficulty_level', 'department_id')
+
+    def __init__(self, id, course_code, class_name, student_count, duration, needs_computer,
+                 preferred_dates, available_rooms, difficulty_level, department_id):
+        self.id = id
+        self.course_code = course_code
+        self.class_name = class_name
+        self.student_count = student_count
+        self.duration = duration
+        self.needs_computer = needs_computer
+        self.preferred_dates = preferred_dates
+        self.available_rooms = available_rooms
+        self.difficulty_level = difficulty_level
+        self.department_id = department_id
+
+
+class ScheduleProblem:
+    """Exams, rooms and room usage of one scheduling run, detached from the database"""
+
+    def __init__(self, exams, rooms, exam_dates, base_masks):
+        self.exams = exams            # ExamRecords in priority order
+        self.rooms = rooms            # Active RoomRecords ordered by ID
+        self.exam_dates = exam_dates
+        self.base_masks = base_masks  # {(room_id, date): mask} of existing schedules
+
+        self.rooms_by_id = {room.id: room for room in rooms}
+        self.rooms_by_name = {}
+        for room in rooms:
+            self.rooms_by_name.setdefault(room.name.strip(), room)
+
+
+def load_exam_records(exam_ids):
+    """Load exams with their course fields in one query, keyed by exam ID"""
+    if not exam_ids:
+        return {}
+
+    rows = db.session.query(
+        Exam.id, Course.code, Course.class_level, Exam.student_count, Exam.duration,
+        Exam.needs_computer, Exam.preferred_dates, Exam.available_rooms,
+        Exam.difficulty_level, Exam.department_id
+    ).outerjoin(Course, Exam.course_id == Course.id).filter(Exam.id.in_(list(exam_ids))).all()
+
+    records = {}
+    for (exam_id, code, class_level, student_count, duration, needs_computer,
+         preferred_dates, available_rooms, difficulty_level, department_id) in rows:
+        records[exam_id] = ExamRecord(
+            exam_id,
+            code or '',
+            str(class_level) if class_level is not None else '',
+            student_count,
+            duration,
+            bool(needs_computer),
+            list(preferred_dates or []),
+            list(available_rooms or []),
+            difficulty_level,
+            department_id
+        )
+    return records
+
+
+def build_schedule_problem(exam_ids, exam_dates, room_occupancy):
+    """Snapshot exams (in the given order), active rooms and loaded room usage"""
+    records = load_exam_records(exam_ids)
+    return ScheduleProblem(
+        [records[exam_id] for exam_id in exam_ids if exam_id in records],
+        get_room_registry().active_rooms(),
+        list(exam_dates),
+        dict(room_occupancy.base_masks)
+    )
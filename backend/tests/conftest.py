@@ -0,0 +1,25 @@
+import os
+import sys
+
+import pytest
+
+# Run from the repository root or from backend/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from database import db
+
+
+@pytest.fixture
+def app():
+    """App on an in-memory SQLite database with empty tables"""
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
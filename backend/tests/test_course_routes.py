@@ -0,0 +1,48 @@
+from database import db
+from models import Course, Department
+
+
+def _add_courses():
+    db.session.add_all([Department(name='Bilgisayar', code='BM'), Department(name='Endüstri', code='EM')])
+    db.session.flush()
+    db.session.add_all([
+        Course(name='Fizik I', code='BM102', credits=3, class_level=1, department_id=1),
+        Course(name='Matematik I', code='BM101', credits=4, class_level=1, department_id=1),
+        Course(name='Veri Yapıları', code='BM201', credits=4, class_level=2, department_id=1),
+        Course(name='Eski Ders', code='BM999', credits=2, class_level=1, department_id=1, is_active=False),
+        Course(name='Calculus I', code='EM101', credits=5, class_level=1, department_id=2)
+    ])
+    db.session.commit()
+
+def test_courses_by_department(client):
+    _add_courses()
+
+    response = client.get('/api/courses/by-department/1')
+
+    assert response.status_code == 200
+    assert [course['code'] for course in response.json['data']] == ['BM102', 'BM101', 'BM201']
+    assert 'next_cursor' not in response.json
+
+def test_courses_by_department_pages_with_cursor(client):
+    _add_courses()
+
+    first = client.get('/api/courses/by-department/1?limit=2&fields=code')
+    second = client.get(f"/api/courses/by-department/1?limit=2&fields=code&cursor={first.json['next_cursor']}")
+
+    assert first.status_code == 200
+    assert first.json['data'] == [{'code': 'BM102'}, {'code': 'BM101'}]
+    assert second.json['data'] == [{'code': 'BM201'}]
+    assert second.json['next_cursor'] is None
+
+def test_courses_by_department_filters_class_level(client):
+    _add_courses()
+
+    response = client.get('/api/courses/by-department/1?class_level=2')
+
+    assert [course['code'] for course in response.json['data']] == ['BM201']
+
+def test_courses_by_department_rejects_bad_parameters(client):
+    _add_courses()
+
+    assert client.get('/api/courses/by-department/1?limit=abc').status_code == 400
+    assert client.get('/api/courses/by-department/1?fields=nope').status_code == 400
@@ -0,0 +1,53 @@
+import json
+
+from database import db
+from models import Department
+from services.event_broker import event_stream, format_sse, get_event_broker, queue_schedule_event
+
+
+def test_schedule_events_publish_on_commit_only(app):
+    broker = get_event_broker()
+    subscriber = broker.subscribe()
+
+    db.session.add(Department(name='Bilgisayar', code='BM'))
+    db.session.flush()
+    queue_schedule_event('schedule_deleted', {'id': 1, 'department_id': 1})
+    db.session.rollback()
+    assert subscriber.empty()
+
+    db.session.add(Department(name='Bilgisayar', code='BM'))
+    db.session.flush()
+    queue_schedule_event('schedule_deleted', {'id': 2, 'department_id': 1})
+    db.session.commit()
+    assert subscriber.get_nowait()[1:] == ('schedule_deleted', {'id': 2, 'department_id': 1})
+
+def test_event_stream_filters_by_department(app):
+    broker = get_event_broker()
+    stream = event_stream(broker, broker.subscribe(), department_id=1, keepalive_seconds=0.01)
+    assert next(stream) == 'retry: 3000\n\n'
+
+    broker.publish('schedule_created', {'id': 5, 'department_id': 2})
+    broker.publish('schedule_created', {'id': 6, 'department_id': 1})
+    assert next(stream) == format_sse((2, 'schedule_created', {'id': 6, 'department_id': 1}))
+    # Nothing left for this department
+    assert next(stream).startswith(': keepalive')
+
+    stream.close()
+    assert not broker.has_subscribers()
+
+def test_stream_resumes_after_last_event_id(client):
+    broker = get_event_broker()
+    broker.publish('schedule_deleted', {'id': 1, 'department_id': 1})
+    broker.publish('schedule_deleted', {'id': 2, 'department_id': 1})
+    # Progress events are never replayed
+    broker.publish('exam_placed', {'exam_id': 3, 'department_id': 1}, replayable=False)
+
+    response = client.get('/api/schedule/stream', headers={'Last-Event-ID': '1'}, buffered=False)
+    assert response.mimetype == 'text/event-stream'
+    chunks = iter(response.response)
+    assert next(chunks) == b'retry: 3000\n\n'
+
+    event_id, event_type, data = next(chunks).decode().strip().splitlines()
+    assert (event_id, event_type) == ('id: 2', 'event: schedule_deleted')
+    assert json.loads(data[len('data: '):]) == {'id': 2, 'department_id': 1}
+    response.close()
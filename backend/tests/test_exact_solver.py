@@ -0,0 +1,54 @@
+from datetime import date
+
+from database import db
+from models import Course, Department, Exam, ExamSchedule, Room, Settings
+from services.exact_solver import ExactSolverService
+from services.scheduler_service import SchedulerService
+
+
+def _add_same_level_exams(count=8):
+    """Same class level exams that all prefer one day, with four 40-seat rooms"""
+    db.session.add(Department(name='Bilgisayar', code='BM'))
+    db.session.flush()
+    room_names = ['R1', 'R2', 'R3', 'R4']
+    db.session.add_all([Room(name=name, capacity=40, department_id=1) for name in room_names] + [
+        Settings(key='exam_week_start', value='2024-01-15'),
+        Settings(key='exam_week_end', value='2024-01-19')
+    ])
+    for index in range(count):
+        course = Course(name=f'Ders {index}', code=f'BM{100 + index}', credits=3, class_level=1, department_id=1)
+        db.session.add(course)
+        db.session.flush()
+        db.session.add(Exam(course_id=course.id, instructor='Dr. X', student_count=30, duration=90,
+                            preferred_dates=['2024-01-16'], available_rooms=room_names, department_id=1,
+                            status='pending'))
+    db.session.commit()
+
+
+def test_cpsat_follows_the_standard_scheduler_rules(app):
+    _add_same_level_exams()
+    scheduler = SchedulerService()
+
+    result = scheduler.generate_schedule(solver='cpsat', solver_time_limit=10)
+    assert result['success']
+    # The standard scheduler has no class level rule, so CP-SAT places as many as greedy
+    assert result['scheduled_count'] == 8
+
+    for schedule in ExamSchedule.query:
+        assert schedule.scheduled_date == date(2024, 1, 16)
+        assert len(schedule.room_assignments) == 1
+        assert schedule.start_time in scheduler._get_possible_start_times(schedule.scheduled_date, 90)
+
+def test_cpsat_falls_back_to_greedy(app, monkeypatch):
+    _add_same_level_exams()
+
+    def no_solution(self, exams, exam_dates):
+        return {'success': False, 'message': 'Solver found no schedule within 10s (UNKNOWN)',
+                'placements': [], 'failed': [(exam, 'Solver found no schedule') for exam in exams]}
+    monkeypatch.setattr(ExactSolverService, 'solve', no_solution)
+
+    result = SchedulerService().generate_schedule(solver='cpsat', solver_time_limit=10)
+    assert result['success']
+    assert result['scheduled_count'] == 8
+    assert ExamSchedule.query.count() == 8
+    assert {exam.status for exam in Exam.query} == {'planned'}
@@ -0,0 +1,48 @@
+from database import db
+from models import Course, Department, Exam, ExamSchedule, Room, ScheduleRoomAssignment, Settings
+from services.incremental_scheduler import IncrementalSchedulerService
+
+
+def _add_placed_exam():
+    """A department with two rooms and one exam placed in them"""
+    db.session.add(Department(name='Bilgisayar', code='BM'))
+    db.session.flush()
+    db.session.add_all([
+        Room(name='A401', capacity=120, department_id=1),
+        Room(name='D111', capacity=40, department_id=1),
+        Settings(key='exam_week_start', value='2024-01-15'),
+        Settings(key='exam_week_end', value='2024-01-19')
+    ])
+    course = Course(name='Ders', code='BM101', credits=3, class_level=1, department_id=1)
+    db.session.add(course)
+    db.session.flush()
+    exam = Exam(course_id=course.id, instructor='Dr. X', student_count=30, duration=90,
+                preferred_dates=['2024-01-15'], available_rooms=['A401', 'D111'], department_id=1, status='pending')
+    db.session.add(exam)
+    db.session.commit()
+
+    result = IncrementalSchedulerService().place_exam(exam.id)
+    assert result['success']
+    return exam.id
+
+
+def test_update_exam_reschedules(client):
+    exam_id = _add_placed_exam()
+
+    response = client.put(f'/api/exams/{exam_id}', json={'student_count': 140})
+    assert response.status_code == 200
+    assert db.session.get(Exam, exam_id).status == 'planned'
+    assert sum(assignment.seats_allocated for assignment in ScheduleRoomAssignment.query) == 140
+
+def test_update_exam_unschedules_when_it_no_longer_fits(client):
+    exam_id = _add_placed_exam()
+
+    # More students than all rooms together hold
+    response = client.put(f'/api/exams/{exam_id}', json={'student_count': 500})
+    assert response.status_code == 200
+    assert 'beklemede' in response.get_json()['message']
+
+    db.session.expire_all()
+    assert db.session.get(Exam, exam_id).status == 'pending'
+    assert ExamSchedule.query.count() == 0
+    assert ScheduleRoomAssignment.query.count() == 0
@@ -0,0 +1,157 @@
+import io
+from tempfile import SpooledTemporaryFile
+
+import pandas as pd
+from database import db
+from flask import request
+from models import Department, Exam, ExamSchedule, ExcelImport, Settings
+from services.excel_service import ExcelService
+
+
+def _row(code, **values):
+    """One valid workbook row for the course code"""
+    row = {
+        'Sınıf Seviyesi': 1,
+        'Ders Kodu': code,
+        'Ders Adı': f'Ders {code}',
+        'Öğretim Üyesi': 'Dr. X',
+        'Öğrenci Sayısı': 30,
+        'Sınav Süresi (dakika)': 90,
+        'Sınav Zorluğu': 'Orta',
+        'Tercih 1': '2024-01-15',
+        'Tercih 2': '2024-01-16',
+        'Tercih 3': '2024-01-17',
+        'Bilgisayar Gerekli mi?': 'Hayır',
+        'Kullanılabilir Derslikler': 'A401,D111'
+    }
+    row.update(values)
+    return row
+
+def _workbook(rows):
+    out = io.BytesIO()
+    pd.DataFrame(rows).to_excel(out, index=False)
+    return out.getvalue()
+
+
+def test_row_hashes_ignore_chunk_dtypes(app):
+    # '101' is read as text next to 'BM102' but as a number in a chunk of its own
+    content = _workbook([_row('101'), _row('BM102')])
+    service = ExcelService()
+    whole = service.validate_excel_file(io.BytesIO(content), chunk_size=2, fingerprint=True)
+    split = service.validate_excel_file(io.BytesIO(content), chunk_size=1, fingerprint=True)
+
+    assert whole['valid'] and split['valid']
+    assert whole['row_hashes'] == split['row_hashes']
+    assert whole['content_hash'] == split['content_hash']
+
+def _setup_department():
+    db.session.add(Department(name='Bilgisayar', code='BM'))
+    db.session.add_all([
+        Settings(key='exam_week_start', value='2024-01-15'),
+        Settings(key='exam_week_end', value='2024-01-19')
+    ])
+    db.session.commit()
+
+def _upload(client, content):
+    # Rows the test loaded would otherwise linger in the shared session as the upload recreates them
+    db.session.expunge_all()
+    response = client.post('/api/excel/upload', data={
+        'department_id': '1',
+        'file': (io.BytesIO(content), 'exams.xlsx')
+    }, content_type='multipart/form-data')
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()
+
+
+def test_identical_upload_is_cached(client):
+    _setup_department()
+    content = _workbook([_row('BM101'), _row('BM102')])
+    assert _upload(client, content)['import_mode'] == 'full'
+    assert _upload(client, content)['import_mode'] == 'cached'
+
+def test_exam_edit_invalidates_import(client):
+    _setup_department()
+    content = _workbook([_row('BM101'), _row('BM102')])
+    _upload(client, content)
+    exam = Exam.query.order_by(Exam.id).first()
+
+    response = client.put(f'/api/exams/{exam.id}', json={'instructor': 'Dr. Y'})
+    assert response.status_code == 200
+    assert ExcelImport.query.count() == 0
+
+    assert _upload(client, content)['import_mode'] == 'full'
+    assert {exam.instructor for exam in Exam.query} == {'Dr. X'}
+
+def test_schedule_edits_invalidate_import(client):
+    _setup_department()
+    content = _workbook([_row('BM101'), _row('BM102')])
+    _upload(client, content)
+    schedules = ExamSchedule.query.order_by(ExamSchedule.id).all()
+    assert len(schedules) == 2
+
+    response = client.put(f'/api/schedule/{schedules[0].id}', json={'start_time': '16:00', 'end_time': '17:30'})
+    assert response.status_code == 200
+    assert _upload(client, content)['import_mode'] == 'full'
+
+    schedule = ExamSchedule.query.order_by(ExamSchedule.id).first()
+    response = client.delete(f'/api/schedule/{schedule.id}')
+    assert response.status_code == 200
+    assert _upload(client, content)['import_mode'] == 'full'
+    assert ExamSchedule.query.count() == 2
+
+def test_unreadable_upload_is_rejected(client):
+    _setup_department()
+    truncated = _workbook([_row('BM101')])[:200]
+    for content in (b'not an excel file', truncated):
+        response = client.post('/api/excel/upload', data={
+            'department_id': '1',
+            'file': (io.BytesIO(content), 'exams.xlsx')
+        }, content_type='multipart/form-data')
+        assert response.status_code == 400
+        assert response.get_json()['valid'] is False
+    assert Exam.query.count() == 0
+
+def test_chunks_match_a_single_read(app):
+    content = _workbook([_row(f'BM10{index}') for index in range(5)])
+    chunks = list(ExcelService().read_excel_chunks(io.BytesIO(content), chunk_size=2))
+
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+    whole = pd.read_excel(io.BytesIO(content))
+    streamed = pd.concat(chunks)
+    assert list(streamed.columns) == list(whole.columns)
+    assert list(streamed.index) == list(whole.index)
+    assert list(streamed['Ders Kodu']) == list(whole['Ders Kodu'])
+
+def test_chunked_import_creates_every_exam(app):
+    _setup_department()
+    content = _workbook([_row(f'BM10{index}') for index in range(5)])
+
+    result = ExcelService().process_excel_file(io.BytesIO(content), 1, 'session', chunk_size=2)
+    assert result['success']
+    assert (result['processed'], result['failed']) == (5, 0)
+    assert sorted(exam.course.code for exam in Exam.query) == [f'BM10{index}' for index in range(5)]
+
+def test_uploads_are_spooled_in_memory(app):
+    content = _workbook([_row('BM101')])
+    data = {'file': (io.BytesIO(content), 'exams.xlsx')}
+    with app.test_request_context('/api/excel/validate', method='POST', data=data):
+        stream = request.files['file'].stream
+        assert isinstance(stream, SpooledTemporaryFile)
+        assert not stream._rolled
+
+    # Past the limit the upload moves to an anonymous temporary file
+    app.config['UPLOAD_SPOOL_MAX_BYTES'] = 1024
+    data = {'file': (io.BytesIO(content), 'exams.xlsx')}
+    with app.test_request_context('/api/excel/validate', method='POST', data=data):
+        assert request.files['file'].stream._rolled
+
+def test_validate_writes_no_files(client, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    client.application.config['UPLOAD_SPOOL_MAX_BYTES'] = 1024
+    content = _workbook([_row(f'BM10{index}') for index in range(5)])
+
+    response = client.post('/api/excel/validate', data={'file': (io.BytesIO(content), 'exams.xlsx')},
+                           content_type='multipart/form-data')
+    assert response.status_code == 200
+    assert response.get_json()['valid'] is True
+    assert list(tmp_path.iterdir()) == []
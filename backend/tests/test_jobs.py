@@ -0,0 +1,61 @@
+import time
+
+from database import db
+from models import Course, Department, Exam, ExamSchedule, Room, Settings
+from services.job_service import get_job_manager
+
+
+def _wait_for(client, job_id, timeout=10):
+    """Poll the job until it finishes and return its last state"""
+    deadline = time.monotonic() + timeout
+    while True:
+        response = client.get(f'/api/jobs/{job_id}')
+        assert response.status_code == 200
+        job = response.get_json()['data']
+        if job['status'] in ('completed', 'failed') or time.monotonic() > deadline:
+            return job
+        time.sleep(0.05)
+
+def test_generate_schedule_job_reports_progress_and_result(client):
+    db.session.add(Department(name='Bilgisayar', code='BM'))
+    db.session.flush()
+    db.session.add_all([
+        Room(name='A401', capacity=120, department_id=1),
+        Settings(key='exam_week_start', value='2024-01-15'),
+        Settings(key='exam_week_end', value='2024-01-19')
+    ])
+    course = Course(name='Ders', code='BM101', credits=3, class_level=1, department_id=1)
+    db.session.add(course)
+    db.session.flush()
+    db.session.add(Exam(course_id=course.id, instructor='Dr. X', student_count=30, duration=90,
+                        preferred_dates=['2024-01-16'], available_rooms=['A401'], department_id=1, status='pending'))
+    db.session.commit()
+
+    response = client.post('/api/schedule/generate', json={'async': True})
+    assert response.status_code == 202
+    data = response.get_json()['data']
+    assert data['status_url'] == f"/api/jobs/{data['job_id']}"
+
+    job = _wait_for(client, data['job_id'])
+    assert job['status'] == 'completed'
+    assert job['phase'] == 'done'
+    assert (job['total'], job['placed'], job['failed']) == (1, 1, 0)
+    assert job['result']['scheduled_count'] == 1
+
+    db.session.expire_all()
+    assert ExamSchedule.query.count() == 1
+
+def test_failed_job_is_logged(client, caplog):
+    def explode(job):
+        raise RuntimeError('boom')
+
+    job = get_job_manager().submit('test', explode)
+    state = _wait_for(client, job.id)
+    assert state['status'] == 'failed'
+    assert state['message'] == 'Job failed: boom'
+    assert any(record.exc_info and f'Job {job.id} failed' in record.getMessage() for record in caplog.records)
+
+def test_unknown_job_is_not_found(client):
+    response = client.get('/api/jobs/missing')
+    assert response.status_code == 404
+    assert response.get_json()['success'] is False
@@ -0,0 +1,118 @@
+from datetime import date
+
+from database import db
+from models import Course, Department, Exam, ExamSchedule, Room, Settings
+from services.advanced_scheduler import AdvancedSchedulerService
+from services.local_search import LocalSearchImprover
+from services.scheduler_service import SchedulerService
+from sqlalchemy import inspect
+
+EXAM_DATES = [date(2024, 1, 15), date(2024, 1, 16), date(2024, 1, 17), date(2024, 1, 18), date(2024, 1, 19)]
+
+
+def _add_exams(preferred_dates):
+    """One department with a few rooms and one exam per entry of preferred_dates"""
+    db.session.add(Department(name='Bilgisayar', code='BM'))
+    db.session.flush()
+    db.session.add_all([
+        Room(name='A401', capacity=120, department_id=1),
+        Room(name='D111', capacity=40, department_id=1),
+        Settings(key='exam_week_start', value='2024-01-15'),
+        Settings(key='exam_week_end', value='2024-01-19')
+    ])
+    exams = []
+    for index, dates in enumerate(preferred_dates):
+        course = Course(name=f'Ders {index}', code=f'BM{100 + index}', credits=3, class_level=index % 4 + 1,
+                        department_id=1)
+        db.session.add(course)
+        db.session.flush()
+        exam = Exam(course_id=course.id, instructor='Dr. X', student_count=30, duration=90,
+                    preferred_dates=dates, available_rooms=['A401', 'D111'], department_id=1, status='pending')
+        db.session.add(exam)
+        exams.append(exam)
+    db.session.commit()
+    return exams
+
+def _place(scheduler, exams):
+    scheduler._load_room_occupancy(EXAM_DATES[0], EXAM_DATES[-1])
+    records = scheduler._load_snapshot(exams, EXAM_DATES)
+    daily_schedules = {}
+    for record in records:
+        assert scheduler._place_exam_greedy(record, EXAM_DATES, daily_schedules)[0] is not None
+    return records, daily_schedules
+
+def test_write_back_drops_unflushed_schedule(app):
+    exam = _add_exams([['2024-01-16']])[0]
+    scheduler = AdvancedSchedulerService()
+    records, daily_schedules = _place(scheduler, [exam])
+    schedule = scheduler.created_schedules[exam.id]
+    assert inspect(schedule).pending
+
+    # The annealer ends with the exam unplaced
+    improver = LocalSearchImprover(scheduler, records, EXAM_DATES, daily_schedules, 0)
+    improver._unplace(exam.id)
+    assert improver._write_back() == 1
+    db.session.commit()
+
+    assert ExamSchedule.query.count() == 0
+    assert db.session.get(Exam, exam.id).status == 'pending'
+    assert exam.id not in scheduler.created_schedules
+
+def test_write_back_deletes_flushed_schedule(app):
+    exam = _add_exams([['2024-01-16']])[0]
+    scheduler = AdvancedSchedulerService()
+    records, daily_schedules = _place(scheduler, [exam])
+    db.session.flush()
+    assert inspect(scheduler.created_schedules[exam.id]).persistent
+
+    improver = LocalSearchImprover(scheduler, records, EXAM_DATES, daily_schedules, 0)
+    improver._unplace(exam.id)
+    improver._write_back()
+    db.session.commit()
+
+    assert ExamSchedule.query.count() == 0
+
+def test_moves_stay_on_allowed_dates(app):
+    exams = _add_exams([['2024-01-16'], ['2024-01-17', '2024-01-18']])
+    scheduler = AdvancedSchedulerService()
+    records, daily_schedules = _place(scheduler, exams)
+    allowed = {exams[0].id: [date(2024, 1, 16)], exams[1].id: [date(2024, 1, 17), date(2024, 1, 18)]}
+
+    improver = LocalSearchImprover(scheduler, records, EXAM_DATES, daily_schedules, 0, seed=1, allowed_dates=allowed)
+
+    for _ in range(200):
+        assert improver._pick_date(exams[0].id) == date(2024, 1, 16)
+        assert improver._pick_date(exams[1].id) in allowed[exams[1].id]
+    # Swapping would put each exam on the other's date
+    assert improver._try_swap([exams[0].id, exams[1].id], 1.0) is None
+
+def test_improvement_phase_keeps_preferred_dates(app):
+    preferred = [['2024-01-15'], ['2024-01-16', '2024-01-17'], ['2024-01-18'], ['2024-01-19', '2024-01-15'],
+                 ['2024-01-17'], ['2024-01-16']]
+    exams = _add_exams(preferred)
+    exam_ids = [exam.id for exam in exams]
+
+    result = SchedulerService().generate_schedule(time_budget_ms=300)
+
+    assert result['success']
+    for exam_id, dates in zip(exam_ids, preferred):
+        for schedule in ExamSchedule.query.filter_by(exam_id=exam_id):
+            assert schedule.scheduled_date.isoformat() in dates
+
+def test_standard_scheduler_moves_use_fixed_slots(app):
+    exams = _add_exams([['2024-01-15'], ['2024-01-16'], ['2024-01-17'], ['2024-01-18']])
+    scheduler = SchedulerService()
+    records, daily_schedules = _place(scheduler, exams)
+
+    improver = LocalSearchImprover(scheduler, records, EXAM_DATES, daily_schedules, 0, seed=3)
+    for _ in range(300):
+        improver._random_move(1.0)
+        # The failed and placed pools follow every placement change
+        assert set(improver.placed.items) == {exam_id for exam_id, p in improver.placements.items() if p}
+        assert set(improver.failed.items) == {exam_id for exam_id, p in improver.placements.items() if not p}
+
+    for exam_id, placement in improver.placements.items():
+        if placement is not None:
+            target_date, start_time, end_time, room_ids = placement
+            assert (start_time, end_time) in scheduler._candidate_slots(improver.exams[exam_id], target_date)
+            assert len(room_ids) == 1
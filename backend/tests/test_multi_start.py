@@ -0,0 +1,121 @@
+from datetime import date
+
+from database import db
+from models import Course, Department, Exam, ExamSchedule, Room, Settings
+from services.advanced_scheduler import AdvancedSchedulerService
+from services.multi_start import _score, run_multi_start, run_ordering, split_problem
+
+EXAM_DATES = [date(2024, 1, 15), date(2024, 1, 16), date(2024, 1, 17), date(2024, 1, 18), date(2024, 1, 19)]
+
+
+def _add_exams(count):
+    """One department with two rooms and `count` exams competing for the first days"""
+    db.session.add(Department(name='Bilgisayar', code='BM'))
+    db.session.flush()
+    db.session.add_all([
+        Room(name='A401', capacity=120, department_id=1),
+        Room(name='D111', capacity=40, department_id=1),
+        Settings(key='exam_week_start', value='2024-01-15'),
+        Settings(key='exam_week_end', value='2024-01-19')
+    ])
+    exams = []
+    for index in range(count):
+        course = Course(name=f'Ders {index}', code=f'BM{100 + index}', credits=3, class_level=index % 4 + 1,
+                        department_id=1)
+        db.session.add(course)
+        db.session.flush()
+        exam = Exam(course_id=course.id, instructor='Dr. X', student_count=30 + 10 * index, duration=90,
+                    preferred_dates=[EXAM_DATES[index % 2].isoformat()], available_rooms=['A401', 'D111'],
+                    difficulty_level='hard' if index % 5 == 0 else 'normal', department_id=1, status='pending')
+        db.session.add(exam)
+        exams.append(exam)
+    db.session.commit()
+    return exams
+
+def _problem(exams):
+    scheduler = AdvancedSchedulerService()
+    scheduler._load_room_occupancy(EXAM_DATES[0], EXAM_DATES[-1])
+    scheduler._load_snapshot(exams, EXAM_DATES)
+    return scheduler.problem
+
+def test_run_ordering_is_repeatable_and_quiet(app, capsys):
+    problem = _problem(_add_exams(10))
+
+    first = run_ordering(problem, 'advanced', 3)
+    assert run_ordering(problem, 'advanced', 3)['placements'] == first['placements']
+    assert first['failed_count'] + len(first['placements']) == 10
+    # Placements are logged, not printed
+    assert capsys.readouterr().out == ''
+
+def test_multi_start_keeps_the_best_ordering(app):
+    problem = _problem(_add_exams(10))
+
+    best = run_multi_start(problem, 'advanced', restarts=4)
+    assert best['runs'] == 4
+    assert _score(best) == min(_score(run_ordering(problem, 'advanced', seed)) for seed in range(4))
+
+def test_multi_start_saves_the_best_schedule(app):
+    exams = _add_exams(10)
+    exam_ids = [exam.id for exam in exams]
+
+    result = AdvancedSchedulerService().schedule_exams([{'id': exam_id} for exam_id in exam_ids],
+                                                       solver='multistart', restarts=3)
+    assert result['success']
+    assert result['scheduled_count'] + result['failed_count'] == 10
+    assert ExamSchedule.query.count() == result['scheduled_count']
+    assert Exam.query.filter_by(status='planned').count() == result['scheduled_count']
+
+def _add_department_exams(code, room_names, exam_specs):
+    """A department with its own rooms; exam_specs are (rooms, preferred date, difficulty) tuples"""
+    department = Department(name=code, code=code)
+    db.session.add(department)
+    db.session.flush()
+    db.session.add_all([Room(name=name, capacity=60, department_id=department.id) for name in room_names])
+    exams = []
+    for index, (rooms, preferred_date, difficulty) in enumerate(exam_specs):
+        course = Course(name=f'{code} {index}', code=f'{code}{100 + index}', credits=3, class_level=index + 1,
+                        department_id=department.id)
+        db.session.add(course)
+        db.session.flush()
+        exam = Exam(course_id=course.id, instructor='Dr. X', student_count=30, duration=90,
+                    preferred_dates=[preferred_date], available_rooms=rooms, difficulty_level=difficulty,
+                    department_id=department.id, status='pending')
+        db.session.add(exam)
+        exams.append(exam)
+    db.session.commit()
+    return exams
+
+def _add_exam_week():
+    db.session.add_all([Settings(key='exam_week_start', value='2024-01-15'),
+                        Settings(key='exam_week_end', value='2024-01-19')])
+    db.session.commit()
+
+def test_split_problem_follows_shared_rooms(app):
+    _add_exam_week()
+    bm = _add_department_exams('BM', ['A401'], [(['A401'], '2024-01-15', 'normal')] * 2)
+    ee = _add_department_exams('EE', ['E101'], [(['E101'], '2024-01-15', 'normal')])
+    me = _add_department_exams('ME', ['M101'], [(['M101', 'A401'], '2024-01-15', 'normal')])
+
+    components = split_problem(_problem(bm + ee + me), 'advanced')
+
+    # ME may use A401, so it joins the BM component
+    assert sorted(sorted(exam.id for exam in sub.exams) for sub in components) == sorted([
+        sorted(exam.id for exam in bm + me), [ee[0].id]])
+    for sub in components:
+        names = {room.name for room in sub.rooms}
+        assert names == ({'E101'} if sub.exams[0].id == ee[0].id else {'A401', 'M101'})
+
+def test_partitioned_merge_keeps_hard_exams_apart(app):
+    _add_exam_week()
+    # Separate rooms, but a hard exam must still be alone on its day across departments
+    _add_department_exams('BM', ['A401'], [(['A401'], '2024-01-15', 'hard')])
+    _add_department_exams('EE', ['E101'], [(['E101'], '2024-01-15', 'hard')])
+    exam_ids = [exam.id for exam in Exam.query]
+
+    result = AdvancedSchedulerService().schedule_exams([{'id': exam_id} for exam_id in exam_ids],
+                                                       solver='partitioned')
+    assert result['success']
+    assert result['scheduled_count'] == 2
+    dates = [schedule.scheduled_date for schedule in ExamSchedule.query]
+    assert len(set(dates)) == 2
+    assert date(2024, 1, 15) in dates
@@ -0,0 +1,52 @@
+import pytest
+from database import db
+from flask import jsonify
+from services.response_cache import (ALL_DEPARTMENTS_TAG, LocalResponseCache, ResponseCache,
+                                     cached_response, department_tag)
+from services.schedule_version import bump_schedule_version
+
+
+def _add_cached_view(app):
+    """A cached view per department that counts how often it really runs"""
+    calls = []
+
+    @app.route('/api/test/cached/<int:department_id>')
+    @cached_response(lambda kwargs: kwargs['department_id'])
+    def cached_view(department_id):
+        calls.append(department_id)
+        return jsonify({'calls': calls.count(department_id)})
+
+    return calls
+
+
+def test_response_cache_is_abstract():
+    with pytest.raises(TypeError):
+        ResponseCache()
+
+def test_write_invalidates_only_its_department(app, client):
+    calls = _add_cached_view(app)
+    client.get('/api/test/cached/1')
+    client.get('/api/test/cached/2')
+
+    bump_schedule_version([1])
+    db.session.commit()
+    assert client.get('/api/test/cached/1').get_json() == {'calls': 2}
+    assert client.get('/api/test/cached/2').get_json() == {'calls': 1}
+    assert calls == [1, 2, 1]
+
+def test_rolled_back_write_keeps_entries(app, client):
+    _add_cached_view(app)
+    client.get('/api/test/cached/1')
+
+    bump_schedule_version([1])
+    db.session.rollback()
+    assert client.get('/api/test/cached/1').get_json() == {'calls': 1}
+
+def test_invalidation_by_another_worker(app, client):
+    _add_cached_view(app)
+    client.get('/api/test/cached/1')
+
+    # Another worker's cache shares the generations through the database
+    LocalResponseCache().invalidate([department_tag(1), ALL_DEPARTMENTS_TAG])
+    db.session.commit()
+    assert client.get('/api/test/cached/1').get_json() == {'calls': 2}
@@ -0,0 +1,34 @@
+from types import SimpleNamespace
+
+from services.room_allocator import RoomAllocator
+
+
+def _rooms(*capacities):
+    return [SimpleNamespace(id=index + 1, capacity=capacity) for index, capacity in enumerate(capacities)]
+
+
+def _capacities(rooms):
+    return [room.capacity for room in rooms]
+
+
+def test_one_room_beats_a_tighter_pair():
+    allocator = RoomAllocator()
+    assert _capacities(allocator.allocate(_rooms(120, 40, 200), 150)) == [200]
+
+def test_pair_with_fewest_empty_seats():
+    allocator = RoomAllocator()
+    # 100 + 55 leaves 5 seats empty; taking the largest rooms first would leave 70
+    assert _capacities(allocator.allocate(_rooms(100, 60, 55, 120), 150)) == [100, 55]
+
+def test_room_limit_and_missing_capacity():
+    allocator = RoomAllocator()
+    assert allocator.allocate(_rooms(100, 60), 150, max_rooms=1) == []
+    assert allocator.allocate(_rooms(100, 40), 150) == []
+    assert allocator.allocate([], 10) == []
+
+def test_repeated_requests_hit_the_cache():
+    allocator = RoomAllocator()
+    rooms = _rooms(120, 40)
+    first = allocator.allocate(rooms, 150)
+    assert allocator.allocate(list(reversed(rooms)), 150) == first
+    assert (allocator.hits, allocator.misses) == (1, 1)
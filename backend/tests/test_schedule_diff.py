@@ -0,0 +1,68 @@
+from datetime import date, time
+
+from database import db
+from models import Course, Department, Exam, ExamSchedule, Room, Settings
+from services.scheduler_service import SchedulerService
+
+
+def _add_pending_exam():
+    """A pending exam of 30 students that prefers Wednesday, with one room"""
+    db.session.add(Department(name='Bilgisayar', code='BM'))
+    db.session.flush()
+    room = Room(name='A401', capacity=120, department_id=1)
+    db.session.add_all([
+        room,
+        Settings(key='exam_week_start', value='2024-01-15'),
+        Settings(key='exam_week_end', value='2024-01-19')
+    ])
+    course = Course(name='Ders', code='BM101', credits=3, class_level=1, department_id=1)
+    db.session.add(course)
+    db.session.flush()
+    exam = Exam(course_id=course.id, instructor='Dr. X', student_count=30, duration=90,
+                preferred_dates=['2024-01-17'], available_rooms=['A401'], department_id=1, status='pending')
+    db.session.add(exam)
+    db.session.commit()
+    return exam, room
+
+
+def test_dry_run_returns_a_diff_and_saves_nothing(client):
+    exam, room = _add_pending_exam()
+
+    response = client.post('/api/schedule/generate', json={'dry_run': True})
+    assert response.status_code == 200
+    data = response.get_json()['data']
+    assert data['dry_run'] is True
+    assert data['scheduled_count'] == 1
+
+    diff = data['diff']
+    assert [(entry['exam_id'], entry['scheduled_date'], entry['room_ids']) for entry in diff['placed']] == [
+        (exam.id, '2024-01-17', [room.id])]
+    assert (diff['moved'], diff['failed'], diff['unchanged_count']) == ([], [], 0)
+    utilization = diff['room_utilization']
+    assert [(entry['room_id'], entry['before_minutes'], entry['after_minutes']) for entry in utilization] == [
+        (room.id, 0, 90)]
+
+    db.session.expire_all()
+    assert ExamSchedule.query.count() == 0
+    assert db.session.get(Exam, exam.id).status == 'pending'
+
+def test_dry_run_force_regenerate_reports_moves(app):
+    exam, room = _add_pending_exam()
+    saved = ExamSchedule(exam_id=exam.id, scheduled_date=date(2024, 1, 15), start_time=time(9, 0),
+                         end_time=time(10, 30))
+    saved.assign_rooms([room], exam.student_count)
+    db.session.add(saved)
+    db.session.commit()
+
+    result = SchedulerService().generate_schedule(force_regenerate=True, dry_run=True)
+    assert result['success']
+
+    moved = result['diff']['moved']
+    assert len(moved) == 1
+    assert moved[0]['from']['scheduled_date'] == '2024-01-15'
+    assert moved[0]['to']['scheduled_date'] == '2024-01-17'
+    # Same room for the same length, so no room's usage changes
+    assert result['diff']['room_utilization'] == []
+
+    db.session.expire_all()
+    assert [schedule.scheduled_date for schedule in ExamSchedule.query] == [date(2024, 1, 15)]
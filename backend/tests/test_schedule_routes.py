@@ -0,0 +1,58 @@
+from datetime import date, time
+
+from database import db
+from models import Course, Department, Exam, ExamSchedule, Room
+
+
+def _add_schedule():
+    """An exam of 150 students seated in A401 (120) and D111 (40)"""
+    db.session.add(Department(name='Bilgisayar', code='BM'))
+    db.session.flush()
+    rooms = [Room(name='A401', capacity=120, department_id=1), Room(name='D111', capacity=40, department_id=1),
+             Room(name='D112', capacity=200, department_id=1)]
+    course = Course(name='Ders', code='BM101', credits=3, class_level=1, department_id=1)
+    db.session.add_all(rooms + [course])
+    db.session.flush()
+    exam = Exam(course_id=course.id, instructor='Dr. X', student_count=150, duration=90,
+                department_id=1, status='planned')
+    db.session.add(exam)
+    db.session.flush()
+    schedule = ExamSchedule(exam_id=exam.id, scheduled_date=date(2024, 1, 15),
+                            start_time=time(9, 0), end_time=time(10, 30))
+    schedule.assign_rooms(rooms[:2], exam.student_count)
+    db.session.add(schedule)
+    db.session.commit()
+    return schedule.id, rooms
+
+
+def _seats(schedule_id):
+    db.session.expire_all()
+    schedule = db.session.get(ExamSchedule, schedule_id)
+    return [(assignment.room.name, assignment.seats_allocated) for assignment in schedule.room_assignments]
+
+
+def test_update_schedule_room_recomputes_seats(client):
+    schedule_id, rooms = _add_schedule()
+    assert _seats(schedule_id) == [('A401', 120), ('D111', 30)]
+
+    # The new room replaces the primary one; the students are split again
+    response = client.put(f'/api/schedule/{schedule_id}', json={'room_id': rooms[2].id})
+    assert response.status_code == 200
+    # D112 seats everyone, so D111 is released
+    assert _seats(schedule_id) == [('D112', 150)]
+    assert db.session.get(ExamSchedule, schedule_id).additional_rooms is None
+
+    response = client.put(f'/api/schedule/{schedule_id}', json={'room_id': rooms[0].id, 'start_time': '13:00'})
+    assert response.status_code == 200
+    assert _seats(schedule_id) == [('A401', 120)]
+    assert {assignment.start_time for assignment in db.session.get(ExamSchedule, schedule_id).room_assignments} == {
+        time(13, 0)}
+
+def test_update_schedule_time_keeps_seats(client):
+    schedule_id, _ = _add_schedule()
+
+    response = client.put(f'/api/schedule/{schedule_id}', json={'scheduled_date': '2024-01-16'})
+    assert response.status_code == 200
+    assert _seats(schedule_id) == [('A401', 120), ('D111', 30)]
+    assert {assignment.scheduled_date for assignment in db.session.get(ExamSchedule, schedule_id).room_assignments} == {
+        date(2024, 1, 16)}
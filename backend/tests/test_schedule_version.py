@@ -0,0 +1,15 @@
+from database import db
+from models import ScheduleVersion
+from services.schedule_version import bump_schedule_version, current_schedule_version
+
+
+def test_version_row_created_with_table(app):
+    assert ScheduleVersion.query.count() == 1
+    assert current_schedule_version() == 1
+
+def test_bump_increments_version(app):
+    bump_schedule_version([1])
+    bump_schedule_version()
+    db.session.commit()
+    assert current_schedule_version() == 3
+    assert ScheduleVersion.query.count() == 1
@@ -0,0 +1,38 @@
+from datetime import date, time
+
+from database import db
+from models import Course, Department, Exam, ExamSchedule, Room, ScheduleRoomAssignment, Settings
+from services.scheduler_service import SchedulerService
+
+
+def test_force_regenerate_replaces_saved_schedules(app):
+    db.session.add(Department(name='Bilgisayar', code='BM'))
+    db.session.flush()
+    room = Room(name='A401', capacity=120, department_id=1)
+    db.session.add_all([
+        room,
+        Settings(key='exam_week_start', value='2024-01-15'),
+        Settings(key='exam_week_end', value='2024-01-19')
+    ])
+    course = Course(name='Ders', code='BM101', credits=3, class_level=1, department_id=1)
+    db.session.add(course)
+    db.session.flush()
+    exam = Exam(course_id=course.id, instructor='Dr. X', student_count=30, duration=90,
+                preferred_dates=['2024-01-17'], available_rooms=['A401'], department_id=1, status='pending')
+    db.session.add(exam)
+    db.session.flush()
+    # A schedule left behind for the pending exam
+    stale = ExamSchedule(exam_id=exam.id, scheduled_date=date(2024, 1, 15), start_time=time(9, 0),
+                         end_time=time(10, 30))
+    stale.assign_rooms([room], exam.student_count)
+    db.session.add(stale)
+    db.session.commit()
+
+    result = SchedulerService().generate_schedule(force_regenerate=True)
+    assert result['success']
+    assert result['scheduled_count'] == 1
+
+    db.session.expire_all()
+    schedules = ExamSchedule.query.all()
+    assert [schedule.scheduled_date for schedule in schedules] == [date(2024, 1, 17)]
+    assert [assignment.schedule_id for assignment in ScheduleRoomAssignment.query] == [schedules[0].id]
@@ -1,6 +1,8 @@
 from datetime import datetime, date, time, timedelta
 import json
 
+from utils.time_grid import MINUTES_PER_DAY, minutes_to_time, time_to_minutes
+
 def parse_date(date_str, format_str='%Y-%m-%d'):
     """Parse date string to date object"""
     try:
@@ -51,20 +53,17 @@ def is_time_overlap(start1, end1, start2, end2):
 
 def add_minutes_to_time(time_obj, minutes):
     """Add minutes to a time object"""
-    dt = datetime.combine(date.today(), time_obj)
-    dt += timedelta(minutes=minutes)
-    return dt.time()
+    return minutes_to_time(time_to_minutes(time_obj) + minutes)
 
 def time_difference_minutes(start_time, end_time):
     """Calculate difference between two times in minutes"""
-    start_dt = datetime.combine(date.today(), start_time)
-    end_dt = datetime.combine(date.today(), end_time)
+    difference = time_to_minutes(end_time) - time_to_minutes(start_time)
     
     # Handle case where end time is next day
-    if end_dt < start_dt:
-        end_dt += timedelta(days=1)
+    if difference < 0:
+        difference += MINUTES_PER_DAY
     
-    return int((end_dt - start_dt).total_seconds() / 60)
+    return difference
 
 def validate_date_range(start_date, end_date):
     """Validate that start date is before end date"""
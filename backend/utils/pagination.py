@@ -0,0 +1,115 @@
+import base64
+import json
+from datetime import date, datetime, time
+
+from sqlalchemy import and_, inspect, or_
+from sqlalchemy.orm import load_only
+
+MAX_PAGE_SIZE = 500
+
+
+def parse_limit(args, max_limit=MAX_PAGE_SIZE):
+    """Page size from ?limit=, None when every row is requested"""
+    raw = args.get('limit')
+    if raw is None or raw == '':
+        return None
+    try:
+        limit = int(raw)
+    except ValueError:
+        raise ValueError('limit must be an integer')
+    if limit <= 0:
+        raise ValueError('limit must be a positive integer')
+    return min(limit, max_limit)
+
+def parse_fields(args, allowed):
+    """Requested fields from ?fields=a,b,c, None when every field is requested"""
+    raw = args.get('fields')
+    if not raw:
+        return None
+    fields = list(dict.fromkeys(field.strip() for field in raw.split(',') if field.strip()))
+    unknown = [field for field in fields if field not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return fields
+
+def _encode_value(value):
+    if isinstance(value, (date, time, datetime)):
+        return value.isoformat()
+    return value
+
+def _decode_value(value, column):
+    if value is None:
+        return None
+    python_type = column.type.python_type
+    if python_type in (date, time, datetime):
+        return python_type.fromisoformat(value)
+    return python_type(value)
+
+def encode_cursor(values):
+    """Opaque cursor for the sort key values of the last row of a page"""
+    payload = json.dumps([_encode_value(value) for value in values])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor, columns):
+    """Sort key values from a cursor made by encode_cursor"""
+    try:
+        payload = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(payload)
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError
+        return [_decode_value(value, column) for value, column in zip(values, columns)]
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor')
+
+def parse_cursor(args, columns):
+    """Sort key values from ?cursor=, None for the first page"""
+    cursor = args.get('cursor')
+    return decode_cursor(cursor, columns) if cursor else None
+
+def keyset_condition(columns, values):
+    """Rows sorting after values: (a, b, c) > (x, y, z) spelled out for any database"""
+    clauses = []
+    for i, column in enumerate(columns):
+        equal = [columns[j] == values[j] for j in range(i)]
+        clauses.append(and_(*equal, column > values[i]))
+    return or_(*clauses)
+
+def projection_options(model, fields, sort_columns, loaders):
+    """Query options that load only the columns and relationships behind the requested fields
+
+    loaders maps a field to the eager-load options it needs. With fields=None
+    every column and every loader is used.
+    """
+    options = []
+    if fields is None:
+        fields = list(loaders)
+    else:
+        column_keys = {attr.key for attr in inspect(model).column_attrs}
+        keys = dict.fromkeys([column.key for column in sort_columns] + fields)
+        options.append(load_only(*[getattr(model, key) for key in keys if key in column_keys]))
+
+    seen = set()
+    for field in fields:
+        for option in loaders.get(field, ()):
+            if id(option) not in seen:
+                seen.add(id(option))
+                options.append(option)
+    return options
+
+def keyset_page(query, sort_columns, limit=None, after=None):
+    """Order by sort_columns and return (rows, next_cursor) for the page after the given key"""
+    if after is not None:
+        query = query.filter(keyset_condition(sort_columns, after))
+    query = query.order_by(*[column.asc() for column in sort_columns])
+
+    if limit is None:
+        return query.all(), None
+
+    # One extra row tells whether another page exists
+    rows = query.limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor([getattr(last, column.key) for column in sort_columns])
@@ -0,0 +1,106 @@
+# Plain-dict serializers for hot read paths. They return the same dictionaries
+# as the marshmallow schemas in models.py; callers eager-load the relationships.
+
+
+def _iso(value):
+    """ISO format like marshmallow's Date/Time/DateTime fields, None stays None"""
+    return value.isoformat() if value is not None else None
+
+
+def serialize_department_brief(department):
+    """DepartmentSchema(only=['id', 'name', 'code'])"""
+    if department is None:
+        return None
+    return {
+        'id': department.id,
+        'name': department.name,
+        'code': department.code
+    }
+
+
+def serialize_course_brief(course):
+    """CourseSchema(only=['id', 'name', 'code', 'credits', 'class_level'])"""
+    if course is None:
+        return None
+    return {
+        'id': course.id,
+        'name': course.name,
+        'code': course.code,
+        'credits': course.credits,
+        'class_level': course.class_level
+    }
+
+
+def serialize_room(room):
+    """RoomSchema"""
+    if room is None:
+        return None
+    return {
+        'id': room.id,
+        'name': room.name,
+        'capacity': room.capacity,
+        'has_computer': room.has_computer,
+        'department_id': room.department_id,
+        'is_active': room.is_active,
+        'created_at': _iso(room.created_at),
+        'department': serialize_department_brief(room.department)
+    }
+
+
+def serialize_exam(exam):
+    """ExamSchema without its exam_schedules"""
+    if exam is None:
+        return None
+    course = exam.course
+    return {
+        'id': exam.id,
+        'course_id': exam.course_id,
+        'instructor': exam.instructor,
+        'student_count': exam.student_count,
+        'duration': exam.duration,
+        'needs_computer': exam.needs_computer,
+        'preferred_dates': exam.preferred_dates,
+        'status': exam.status,
+        'department_id': exam.department_id,
+        'difficulty_level': exam.difficulty_level,
+        'available_rooms': exam.available_rooms,
+        'exam_session_id': exam.exam_session_id,
+        'created_at': _iso(exam.created_at),
+        'updated_at': _iso(exam.updated_at),
+        'department': serialize_department_brief(exam.department),
+        'course': serialize_course_brief(course),
+        'course_name': course.name if course else "",
+        'class_name': str(course.class_level) if course else "",
+        'credits': course.credits if course else 3
+    }
+
+
+def _additional_room_details(schedule):
+    return [{
+        'id': room.id,
+        'name': room.name,
+        'capacity': room.capacity,
+        'has_computer': room.has_computer
+    } for room in schedule.additional_room_objects]
+
+
+# Field name -> getter, in ExamScheduleSchema's terms
+SCHEDULE_FIELDS = {
+    'id': lambda schedule: schedule.id,
+    'exam_id': lambda schedule: schedule.exam_id,
+    'room_id': lambda schedule: schedule.room_id,
+    'scheduled_date': lambda schedule: _iso(schedule.scheduled_date),
+    'start_time': lambda schedule: _iso(schedule.start_time),
+    'end_time': lambda schedule: _iso(schedule.end_time),
+    'created_at': lambda schedule: _iso(schedule.created_at),
+    'updated_at': lambda schedule: _iso(schedule.updated_at),
+    'exam': lambda schedule: serialize_exam(schedule.exam),
+    'room': lambda schedule: serialize_room(schedule.room),
+    'additional_rooms': lambda schedule: schedule.additional_rooms,
+    'additional_room_details': _additional_room_details
+}
+
+
+def serialize_schedule(schedule, fields=None):
+    """ExamScheduleSchema, optionally narrowed to the given fields"""
+    return {field: SCHEDULE_FIELDS[field](schedule) for field in (fields or SCHEDULE_FIELDS)}
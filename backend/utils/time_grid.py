@@ -0,0 +1,146 @@
+from datetime import time
+
+# A day is split into 5-minute cells; bit i of a mask covers minutes [5*i, 5*i + 5)
+CELL_MINUTES = 5
+MINUTES_PER_DAY = 24 * 60
+
+
+def time_to_minutes(time_obj):
+    """Convert a time object to minutes since midnight"""
+    return time_obj.hour * 60 + time_obj.minute
+
+def minutes_to_time(minutes):
+    """Convert minutes since midnight to a time object (wraps past midnight)"""
+    minutes %= MINUTES_PER_DAY
+    return time(minutes // 60, minutes % 60)
+
+def interval_mask(start_minutes, end_minutes):
+    """Bitmask of the cells touched by [start_minutes, end_minutes)
+
+    Times that are not on a cell boundary are rounded outward, so the mask
+    never under-reports an occupied interval.
+    """
+    start_cell = max(start_minutes, 0) // CELL_MINUTES
+    end_cell = -(-end_minutes // CELL_MINUTES)  # ceil
+    if end_cell <= start_cell:
+        return 0
+    return ((1 << (end_cell - start_cell)) - 1) << start_cell
+
+def time_interval_mask(start_time, end_time):
+    """Bitmask of the cells touched by a time range"""
+    return interval_mask(time_to_minutes(start_time), time_to_minutes(end_time))
+
+def mask_to_intervals(mask):
+    """Split a mask into (start_minutes, end_minutes) runs of occupied cells"""
+    intervals = []
+    cell = 0
+    while mask:
+        # Skip free cells, then measure the run of occupied cells
+        skip = (mask & -mask).bit_length() - 1
+        mask >>= skip
+        cell += skip
+        run = (~mask & (mask + 1)).bit_length() - 1
+        intervals.append((cell * CELL_MINUTES, (cell + run) * CELL_MINUTES))
+        mask >>= run
+        cell += run
+    return intervals
+
+
+class TimeGrid:
+    """Bitmask engine for exam slot feasibility on a single day"""
+
+    def __init__(self, working_hours_start, working_hours_end, lunch_break_start, lunch_break_end,
+                 friday_prayer_start, friday_prayer_end, slot_interval=15, gap_minutes=15):
+        self.day_start = time_to_minutes(working_hours_start)
+        self.day_end = time_to_minutes(working_hours_end)
+        self.slot_interval = slot_interval
+        self.gap_minutes = gap_minutes
+
+        # Everything outside working hours is blocked
+        all_cells = (1 << (MINUTES_PER_DAY // CELL_MINUTES + 1)) - 1
+        outside_hours = all_cells & ~interval_mask(self.day_start, self.day_end)
+        lunch_mask = time_interval_mask(lunch_break_start, lunch_break_end)
+        prayer_mask = time_interval_mask(friday_prayer_start, friday_prayer_end)
+
+        # Blocked cells for Monday-Thursday (False) and Friday (True)
+        self.blocked_masks = {
+            False: outside_hours | lunch_mask,
+            True: outside_hours | lunch_mask | prayer_mask
+        }
+
+        # (is_friday, duration) -> tuple of (start_time, end_time, mask)
+        self._candidate_cache = {}
+
+    def blocked_mask(self, target_date):
+        """Cells where no exam may run on the given date"""
+        return self.blocked_masks[target_date.weekday() == 4]
+
+    def fits(self, target_date, start_minutes, end_minutes):
+        """Check working hours, lunch break and Friday prayer rules"""
+        if end_minutes > self.day_end or start_minutes < self.day_start:
+            return False
+        return interval_mask(start_minutes, end_minutes) & self.blocked_mask(target_date) == 0
+
+    def candidates(self, target_date, duration):
+        """All rule-compliant (start_time, end_time, mask) slots for a duration"""
+        key = (target_date.weekday() == 4, duration)
+        slots = self._candidate_cache.get(key)
+        if slots is None:
+            slots = []
+            for start in range(self.day_start, self.day_end, self.slot_interval):
+                end = start + duration
+                if self.fits(target_date, start, end):
+                    slots.append((minutes_to_time(start), minutes_to_time(end), interval_mask(start, end)))
+            slots = tuple(slots)
+            self._candidate_cache[key] = slots
+        return slots
+
+    def gap_mask(self, start_time, end_time):
+        """Mask of an exam widened by the minimum gap on both sides"""
+        return interval_mask(time_to_minutes(start_time) - self.gap_minutes,
+                             time_to_minutes(end_time) + self.gap_minutes)
+
+
+def normalize_difficulty(difficulty):
+    """Map old difficulty levels to the new system"""
+    return 'hard' if difficulty == 'very_hard' else difficulty
+
+
+class DayGrid:
+    """Exams placed on one date, with occupancy masks and difficulty counters for fast rule checks"""
+
+    __slots__ = ('occupied', 'level_masks', 'exam_masks', 'difficulty_counts')
+
+    def __init__(self):
+        self.occupied = 0            # Union of all exam masks on this date
+        self.level_masks = {}        # class level -> union of its exam masks
+        self.exam_masks = {}         # exam id -> (class level, difficulty, mask)
+        self.difficulty_counts = {}  # difficulty -> number of exams
+
+    def add(self, exam, class_level, mask):
+        """Record an exam occupying the given cells"""
+        difficulty = normalize_difficulty(getattr(exam, 'difficulty_level', 'normal'))
+        self.exam_masks[exam.id] = (class_level, difficulty, mask)
+        self.occupied |= mask
+        self.level_masks[class_level] = self.level_masks.get(class_level, 0) | mask
+        self.difficulty_counts[difficulty] = self.difficulty_counts.get(difficulty, 0) + 1
+
+    def remove(self, exam):
+        """Drop an exam, rebuilding only the masks it contributed to"""
+        entry = self.exam_masks.pop(exam.id, None)
+        if entry is None:
+            return
+        class_level, difficulty, _ = entry
+        self.difficulty_counts[difficulty] -= 1
+
+        self.occupied = 0
+        level_mask = 0
+        for other_level, _, mask in self.exam_masks.values():
+            self.occupied |= mask
+            if other_level == class_level:
+                level_mask |= mask
+        self.level_masks[class_level] = level_mask
+
+    def count(self, difficulty):
+        """Number of exams of a difficulty on this date"""
+        return self.difficulty_counts.get(difficulty, 0)
@@ -0,0 +1,20 @@
+from tempfile import SpooledTemporaryFile
+
+from flask import Request, current_app
+
+
+class SpooledUploadRequest(Request):
+    """Request that keeps uploaded files in memory up to UPLOAD_SPOOL_MAX_BYTES
+
+    Larger files spill to an anonymous temporary file, which is removed when
+    the request closes; nothing is written under a named path.
+    """
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return SpooledTemporaryFile(max_size=current_app.config.get('UPLOAD_SPOOL_MAX_BYTES', 1024 * 1024), mode='rb+')
+
+def upload_stream(file):
+    """Binary stream of an uploaded file, rewound for reading"""
+    stream = file.stream
+    stream.seek(0)
+    return stream
@@ -20,6 +20,7 @@ interface UploadResult {
   errors: string[];
   created_exams: Array<{
     id: number;
+    row: number;
     course_code: string;
     instructor: string;
     difficulty: string;
@@ -30,6 +31,14 @@ interface UploadResult {
     scheduled_count?: number;
     failed_count?: number;
   };
+  // full = department rebuilt, partial = only changed rows swapped, cached = identical to the last upload
+  import_mode?: 'full' | 'partial' | 'cached';
+  diff?: {
+    added: number;
+    removed: number;
+    unchanged: number;
+  };
+  content_hash?: string;
 }
 
 export function ExcelUpload({ departmentId, onUploadComplete }: ExcelUploadProps) {
@@ -6,8 +6,22 @@ interface ApiResponse<T> {
   success: boolean;
   message: string;
   data?: T;
+  next_cursor?: string | null; // Set on paginated list responses; null on the last page
 }
 
+// Keyset pagination and field projection for list endpoints
+interface ListParams {
+  limit?: number;
+  cursor?: string;
+  fields?: string[];
+}
+
+const appendListParams = (queryParams: URLSearchParams, params?: ListParams) => {
+  if (params?.limit) queryParams.append('limit', params.limit.toString());
+  if (params?.cursor) queryParams.append('cursor', params.cursor);
+  if (params?.fields?.length) queryParams.append('fields', params.fields.join(','));
+};
+
 interface Exam {
   id?: number;
   course_id: number;
@@ -79,6 +93,58 @@ interface ScheduleDay {
   timeSlots: ExamSchedule[];
 }
 
+// Events of /api/schedule/stream
+type ScheduleStreamEvent = 'exam_placed' | 'schedule_created' | 'schedule_moved' | 'schedule_deleted';
+
+// Background scheduling job, polled through /api/jobs/<id>
+interface Job {
+  id: string;
+  kind: string;
+  status: 'queued' | 'running' | 'completed' | 'failed';
+  phase: string;
+  message: string | null;
+  total: number | null;
+  placed: number;
+  failed: number;
+  eta_seconds: number | null;
+  created_at: string;
+  started_at: string | null;
+  finished_at: string | null;
+  result: any;
+}
+
+// Placement of an exam in a dry-run diff
+interface DiffPlacement {
+  date: string;
+  scheduled_date: string;
+  start_time: string;
+  end_time: string;
+  room_ids: number[];
+}
+
+interface DiffExam {
+  exam_id: number;
+  course_code: string;
+  department_id: number;
+}
+
+// Candidate schedule of a dry run compared with the saved one
+interface ScheduleDiff {
+  placed: (DiffExam & DiffPlacement)[];
+  moved: (DiffExam & { from: DiffPlacement; to: DiffPlacement })[];
+  failed: (DiffExam & { previous: DiffPlacement | null })[];
+  unchanged_count: number;
+  room_utilization: {
+    room_id: number;
+    room_name: string | null;
+    before_minutes: number;
+    after_minutes: number;
+    delta_minutes: number;
+    before_utilization: number | null;
+    after_utilization: number | null;
+  }[];
+}
+
 class ApiClient {
   private baseUrl: string;
 
@@ -121,8 +187,12 @@ class ApiClient {
   }
 
   // Exams API
-  async getExams(): Promise<ApiResponse<Exam[]>> {
-    return this.request('/api/exams');
+  async getExams(params?: ListParams): Promise<ApiResponse<Exam[]>> {
+    const queryParams = new URLSearchParams();
+    appendListParams(queryParams, params);
+
+    const endpoint = `/api/exams${queryParams.toString() ? `?${queryParams.toString()}` : ''}`;
+    return this.request(endpoint);
   }
 
   async createExam(exam: Omit<Exam, 'id'>): Promise<ApiResponse<Exam>> {
@@ -150,7 +220,7 @@ class ApiClient {
   }
 
   // Schedule API
-  async getSchedule(params?: {
+  async getSchedule(params?: ListParams & {
     start_date?: string;
     end_date?: string;
     department_id?: number;
@@ -159,6 +229,7 @@ class ApiClient {
     if (params?.start_date) queryParams.append('start_date', params.start_date);
     if (params?.end_date) queryParams.append('end_date', params.end_date);
     if (params?.department_id) queryParams.append('department_id', params.department_id.toString());
+    appendListParams(queryParams, params);
 
     const endpoint = `/api/schedule${queryParams.toString() ? `?${queryParams.toString()}` : ''}`;
     return this.request(endpoint);
@@ -167,10 +238,17 @@ class ApiClient {
   async generateSchedule(params?: {
     force_regenerate?: boolean;
     department_id?: number;
+    solver?: 'greedy' | 'cpsat' | 'multistart' | 'partitioned';
+    time_budget_ms?: number;
+    restarts?: number;
+    dry_run?: boolean;
   }): Promise<ApiResponse<{
     scheduled_count: number;
     failed_count: number;
     failed_exams: any[];
+    score_trajectory?: { elapsed_ms: number; cost: number; failed_count: number }[];
+    dry_run?: boolean;
+    diff?: ScheduleDiff;
   }>> {
     return this.request('/api/schedule/generate', {
       method: 'POST',
@@ -178,6 +256,35 @@ class ApiClient {
     });
   }
 
+  // Live scheduling progress and schedule deltas (Server-Sent Events); call close() on the result to stop
+  streamSchedule(
+    handlers: Partial<Record<ScheduleStreamEvent, (data: any) => void>>,
+    departmentId?: number
+  ): EventSource {
+    const query = departmentId ? `?department_id=${departmentId}` : '';
+    const source = new EventSource(`${this.baseUrl}/api/schedule/stream${query}`);
+    (Object.keys(handlers) as ScheduleStreamEvent[]).forEach((eventType) => {
+      source.addEventListener(eventType, (event) => handlers[eventType]?.(JSON.parse((event as MessageEvent).data)));
+    });
+    return source;
+  }
+
+  // Queue a scheduling job; poll getJob(job_id) for progress and the result
+  async generateScheduleAsync(params?: Parameters<ApiClient['generateSchedule']>[0]): Promise<ApiResponse<{
+    job_id: string;
+    status_url: string;
+  }>> {
+    return this.request('/api/schedule/generate', {
+      method: 'POST',
+      body: JSON.stringify({ ...(params || {}), async: true }),
+    });
+  }
+
+  // Jobs API
+  async getJob(jobId: string): Promise<ApiResponse<Job>> {
+    return this.request(`/api/jobs/${jobId}`);
+  }
+
   async updateSchedule(id: number, schedule: Partial<ExamSchedule>): Promise<ApiResponse<ExamSchedule>> {
     return this.request(`/api/schedule/${id}`, {
       method: 'PUT',
@@ -192,13 +299,14 @@ class ApiClient {
   }
 
   // Courses API
-  async getCourses(params?: {
+  async getCourses(params?: ListParams & {
     department_id?: number;
     class_level?: number;
   }): Promise<ApiResponse<Course[]>> {
     const queryParams = new URLSearchParams();
     if (params?.department_id) queryParams.append('department_id', params.department_id.toString());
     if (params?.class_level) queryParams.append('class_level', params.class_level.toString());
+    appendListParams(queryParams, params);
 
     const endpoint = `/api/courses${queryParams.toString() ? `?${queryParams.toString()}` : ''}`;
     return this.request(endpoint);
@@ -354,7 +462,7 @@ export const apiClient = new ApiClient();
 // Export types
 export type {
     ApiResponse, Course, Department, Exam, ExamSchedule,
-    ExamWeekSettings, Room, ScheduleDay
+    ExamWeekSettings, Job, ListParams, Room, ScheduleDay, ScheduleDiff, ScheduleStreamEvent
 };
 
 // Utility function to download blob as file